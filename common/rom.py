@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from migen import *
+
+# Goals:
+# - implement large lookup tables in block RAM instead of LUTs
+# - understand the cost: a block RAM read is synchronous (1 cycle of latency), the logic using
+#   the table has to be pipelined accordingly
+
+# ROM ----------------------------------------------------------------------------------------------
+
+class ROM(Module):
+    """Read-only lookup table
+
+    Tables of less than bram_threshold bits are implemented as an asynchronous read port (LUTs,
+    latency 0: dat_r is the data at adr in the same cycle). Larger tables get a synchronous read
+    port, implemented in block RAM (latency 1: dat_r is the data at the adr of the previous cycle).
+    bram forces the implementation. The consumer must handle self.latency (see ROMReader).
+    """
+    def __init__(self, init, width=8, bram_threshold=1024, bram=None):
+        if bram is None:
+            bram = len(init)*width >= bram_threshold
+        # Module's interface
+        self.adr     = Signal(max=max(len(init), 2)) # input
+        self.dat_r   = Signal(width)                 # output
+        self.latency = 1 if bram else 0
+
+        # # #
+
+        mem  = Memory(width, depth=len(init), init=init)
+        port = mem.get_port(async_read=not bram, mode=READ_FIRST)
+        if bram:
+            # Without it, Vivado/Yosys can still implement a synchronous ROM in LUTs
+            mem.attr = {("rom_style", "block")}
+        self.specials += mem, port
+        self.comb += [
+            port.adr.eq(self.adr),
+            self.dat_r.eq(port.dat_r),
+        ]
+
+# ROMReader ----------------------------------------------------------------------------------------
+
+class ROMReader(Module):
+    """Read a ROM sequentially (one entry per cycle when ready), whatever its latency
+
+    With a latency of 1, the ROM is addressed with the next index: the data is available as soon as
+    the index is updated and the reader does not lose a cycle per entry (the only cost is a cycle
+    after reset). When done, index is length.
+    """
+    def __init__(self, rom, length):
+        # Module's interface
+        self.ready = Signal() # input
+        self.valid = Signal() # output
+        self.index = Signal(max=length + 1) # output
+        self.data  = Signal(len(rom.dat_r)) # output
+        self.done  = Signal() # output
+
+        # # #
+
+        index_next = Signal(max=length + 1)
+        self.comb += [
+            self.done.eq(self.index == length),
+            index_next.eq(self.index + (self.valid & self.ready)),
+            self.data.eq(rom.dat_r),
+        ]
+        self.sync += self.index.eq(index_next)
+        if rom.latency == 0:
+            self.comb += [
+                rom.adr.eq(self.index),
+                self.valid.eq(~self.done),
+            ]
+        else:
+            primed = Signal()
+            self.sync += primed.eq(1)
+            self.comb += [
+                rom.adr.eq(index_next),
+                self.valid.eq(primed & ~self.done),
+            ]
+
+# Simulation ---------------------------------------------------------------------------------------
+
+class _Table(Module):
+    # ROMReader of a table, read at each cycle
+    def __init__(self, init, bram):
+        self.submodules.rom    = rom    = ROM(init, bram=bram)
+        self.submodules.reader = reader = ROMReader(rom, len(init))
+        self.comb += reader.ready.eq(1)
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    # ROMReader simulation: both latencies must give the same sequence, one entry per cycle
+    print("ROMReader simulation")
+    for bram in [False, True]:
+        init = [(7*i + 3) & 0xff for i in range(32)]
+        dut  = _Table(init, bram)
+        def dut_tb(dut):
+            datas = []
+            for cycle in range(len(init) + 4):
+                if (yield dut.reader.valid):
+                    assert (yield dut.reader.index) == len(datas)
+                    datas.append((yield dut.reader.data))
+                yield
+            assert datas == init
+            print("latency {}: {} entries in {} cycles: OK".format(dut.rom.latency, len(datas),
+                len(init) + dut.rom.latency))
+        run_simulation(dut, dut_tb(dut))
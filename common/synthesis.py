@@ -0,0 +1,65 @@
+import re
+import shutil
+import tempfile
+import subprocess
+
+from migen import ClockDomain
+from migen.fhdl.tools import list_clock_domains
+
+from litex.gen.fhdl import verilog
+
+# Goals:
+# - estimate the resources of a design without running the full Vivado flow (Yosys synth_xilinx)
+# - count the cells the same way in all the reports, so that they can be compared
+
+# Synthesis ----------------------------------------------------------------------------------------
+
+def synthesize(module, ios, map_luts=True):
+    """Synthesize module with Yosys (synth_xilinx), return the cell counts: {cell: count}."""
+    yosys = shutil.which("yosys") or shutil.which("yowasp-yosys")
+    if yosys is None:
+        raise OSError("Yosys not found (install yosys, or pip install yowasp-yosys)")
+    # Create the clock domains the design uses without defining them (as Migen's Verilog generator
+    # does): their clk/rst become top-level ios.
+    f   = module.get_fragment()
+    ios = set(ios)
+    for cd_name in sorted(list_clock_domains(f)):
+        if cd_name not in [cd.name for cd in f.clock_domains]:
+            cd = ClockDomain(cd_name)
+            f.clock_domains.append(cd)
+            ios |= {cd.clk, cd.rst}
+    with tempfile.TemporaryDirectory() as build_dir:
+        # (LiteX's Verilog generator, as in the builds: Migen's ignores the memory attributes)
+        v = verilog.convert(f, ios=ios, name="top")
+        for filename, data in [("top.v", v.main_source)] + list(v.data_files.items()):
+            with open(build_dir + "/" + filename, "w") as f:
+                f.write(data)
+        script = "read_verilog top.v; synth_xilinx -flatten -top top{}; tee -q -o stat.txt stat".format(
+            "" if map_luts else " -run :map_luts")
+        p = subprocess.run([yosys, "-q", "-p", script], cwd=build_dir, capture_output=True, text=True)
+        if p.returncode != 0:
+            raise RuntimeError("Yosys failed:\n" + p.stdout + p.stderr)
+        with open(build_dir + "/stat.txt") as f:
+            stat = f.read()
+    # Totals (including submodules)
+    stat = stat.split("=== design hierarchy ===")[-1]
+    cells = {}
+    for count, cell in re.findall(r"^\s+(\d+)\s+([\w$]+)\s*$", stat, re.MULTILINE):
+        cells[cell] = cells.get(cell, 0) + int(count)
+    return cells
+
+def summarize(cells):
+    """Group the cell counts by resource (LUTs, FFs, carry chains, wide muxes, LUT RAMs, BRAMs)."""
+    r = {
+        "LUT":    sum(v for k, v in cells.items() if re.match(r"LUT\d$", k)),
+        "FF":     sum(v for k, v in cells.items() if re.match(r"FD[RSCP]E$", k)),
+        "CARRY4": cells.get("CARRY4", 0),
+        "MUXF":   sum(v for k, v in cells.items() if re.match(r"MUXF\d$", k)),
+        "LUTRAM": sum(v for k, v in cells.items() if re.match(r"RAM\d+[MSX]", k)),
+        "BRAM":   sum(v for k, v in cells.items() if re.match(r"RAMB\d+", k)),
+    }
+    # Logic not mapped to LUTs yet (map_luts=False)
+    gates = sum(v for k, v in cells.items() if k.startswith("$_"))
+    if gates:
+        r["gates"] = gates
+    return r
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 
 from migen import *
 
 from litex.build.generic_platform import *
 from litex.build.xilinx import XilinxPlatform
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from rom import ROM, ROMReader
+
 # Info
 # #########################
 # - Completer le questionnaire (en commentant les réponses avec #)
@@ -241,7 +245,7 @@ content = [
 
 class Transmitter(Module):
     """Send sequence of data"""
-    def __init__(self):
+    def __init__(self, bram=None):
         # Module's interface
         self.start = start = Signal() # output
         self.data = data = Signal(8)  # output
@@ -250,35 +254,33 @@ class Transmitter(Module):
 
         # # #
 
-        lut = Memory(8, depth=len(content), init=content)
-        port = lut.get_port(async_read=True)
-        self.specials += lut, port
+        # content in block RAM (see common/rom.py, bram=False for LUTs)
+        rom    = ROM(content, bram=bram)
+        reader = ROMReader(rom, len(content))
+        self.submodules += rom, reader
 
         tick = Tick(100e6, 0.005)
         self.submodules += tick
 
-        count = Signal(max=len(content))
-        self.comb += port.adr.eq(count)
-
         fsm = FSM(reset_state="START")
         self.submodules.fsm = fsm
         fsm.act("START",
-            If(tick.ce,
+            If(tick.ce & reader.valid,
+                reader.ready.eq(1),
                 NextValue(start, 1),
-                If(count >= 152,
-                    NextValue(data, port.dat_r - self.decode),
+                If(reader.index >= 152,
+                    NextValue(data, reader.data - self.decode),
                 ).Else(
-                    NextValue(data, port.dat_r),
+                    NextValue(data, reader.data),
                 ),
                 NextState("WAIT")
             )
         )
         fsm.act("WAIT",
             NextValue(start, 0),
-            If(count >= (len(content) - 1),
+            If(reader.done,
                 NextState("DONE")
             ).Else(
-                NextValue(count, count + 1),
                 NextState("START")
             )
         )
@@ -286,8 +288,6 @@ class Transmitter(Module):
             NextValue(start, 0),
         )
 
-        self.comb += port.adr.eq(count)
-
 # ###### NE PAS MODIFIER  ######
 
 # 6) Instancier les modules Transmitter et Serializer dans le design et les
@@ -321,6 +321,7 @@ class Design(Module):
 
 # Build --------------------------------------------------------------------------------------------
 
-platform = Platform()
-design   = Design(platform)
-platform.build(design)
+if __name__ == "__main__":
+    platform = Platform()
+    design   = Design(platform)
+    platform.build(design)
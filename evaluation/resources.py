@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+
+from migen import *
+
+import evaluation
+from evaluation import Transmitter, content
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from synthesis import synthesize, summarize
+
+# Goals:
+# - check that the Transmitter sends the same bytes with its content in LUTs or in block RAM
+# - compare the resources of both implementations (see common/rom.py)
+
+# Simulation ---------------------------------------------------------------------------------------
+
+def transmitter_bytes(bram, decode=5):
+    # (one byte every 16 cycles instead of every 5ms)
+    tick = evaluation.Tick
+    evaluation.Tick = lambda sys_clk_freq, period: tick(sys_clk_freq, 16/sys_clk_freq)
+    try:
+        dut = Transmitter(bram=bram)
+    finally:
+        evaluation.Tick = tick
+    datas = []
+    def dut_tb(dut):
+        yield dut.decode.eq(decode)
+        for cycle in range(20*len(content)):
+            if (yield dut.start):
+                datas.append((yield dut.data))
+            yield
+    run_simulation(dut, dut_tb(dut))
+    return datas
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Transmitter simulation and LUT/BRAM resources report")
+    parser.add_argument("--no-resources", action="store_true", help="Only run the simulation")
+    args = parser.parse_args()
+
+    print("Transmitter simulation")
+    expected = [(c - 5) & 0xff if n >= 152 else c for n, c in enumerate(content)]
+    for name, bram in [("LUT (async read)", False), ("BRAM (sync read)", True)]:
+        assert transmitter_bytes(bram) == expected
+        print("  {}: {} bytes: OK".format(name, len(expected)))
+
+    if not args.no_resources:
+        print("Transmitter resources (content: {} x 8 bits)".format(len(content)))
+        results = {}
+        for name, bram in [("LUT (async read)", False), ("BRAM (sync read)", True)]:
+            dut = Transmitter(bram=bram)
+            results[name] = summarize(synthesize(dut, {dut.start, dut.data, dut.decode}))
+        columns = list(next(iter(results.values())).keys())
+        print("  {:18s} | ".format("") + " | ".join("{:>6s}".format(c) for c in columns))
+        for name, r in results.items():
+            print("  {:18s} | ".format(name) + " | ".join("{:6d}".format(r[c]) for c in columns))
+        lut, bram = results["LUT (async read)"], results["BRAM (sync read)"]
+        print("  LUT savings: {} ({:.0f}%)".format(lut["LUT"] - bram["LUT"],
+            100*(lut["LUT"] - bram["LUT"])/max(lut["LUT"], 1)))
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+
+from migen import *
+from migen.genlib.io import CRG
+
+from litex.soc.interconnect import stream
+
+from evaluation import Platform, content
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from rom import ROM, ROMReader
+
+# Goals:
+# - send the content message at the full UART line rate (the Transmitter of evaluation.py sends one
+#   byte every 5ms and the Serializer has no ready: bytes sent back to back would be corrupted)
+# - understand the valid/ready handshake of LiteX streams: producer, FIFO and consumer only move a
+#   data when valid and ready are both set
+
+# UARTTX -------------------------------------------------------------------------------------------
+
+class UARTTX(Module):
+    """Serialize the sink's bytes on tx (start bit, data[0]..data[7], stop bit)
+
+    sink.ready is set when idle and during the last cycle of the stop bit: bytes available on the
+    sink are sent back to back (10 bits per byte, no idle bit between them).
+    """
+    def __init__(self, sys_clk_freq, baudrate=115200):
+        # Module's interface
+        self.sink = sink = stream.Endpoint([("data", 8)]) # input
+        self.tx   = tx   = Signal()                       # output
+
+        # # #
+
+        divider = int(round(sys_clk_freq/baudrate))
+        counter = Signal(max=divider)
+        tick    = Signal()
+        shift   = Signal(10, reset=0b1111111111)
+        bits    = Signal(4) # remaining bits, 0: idle
+
+        self.comb += [
+            tick.eq(counter == divider - 1),
+            tx.eq(shift[0]),
+            sink.ready.eq((bits == 0) | ((bits == 1) & tick)),
+        ]
+        self.sync += [
+            If(sink.valid & sink.ready,
+                counter.eq(0),
+                shift.eq(Cat(0b0, sink.data, 0b1)),
+                bits.eq(10)
+            ).Else(
+                counter.eq(counter + 1),
+                If(tick,
+                    counter.eq(0),
+                    If(bits != 0,
+                        shift.eq(Cat(shift[1:], 0b1)),
+                        bits.eq(bits - 1)
+                    )
+                )
+            )
+        ]
+
+# ContentReader ------------------------------------------------------------------------------------
+
+class ContentReader(Module):
+    """Stream the content memory (decoded as in evaluation.Transmitter) once, then set done
+
+    The content is a ROM (see common/rom.py: block RAM by default, bram=False for LUTs).
+    """
+    def __init__(self, content=content, bram=None):
+        # Module's interface
+        self.source = source = stream.Endpoint([("data", 8)]) # output
+        self.decode = Signal(4)                               # input
+        self.done   = Signal()                                # output
+
+        # # #
+
+        self.submodules.rom    = rom    = ROM(content, bram=bram)
+        self.submodules.reader = reader = ROMReader(rom, len(content))
+        self.comb += [
+            reader.ready.eq(source.ready),
+            source.valid.eq(reader.valid),
+            source.last.eq(reader.index == len(content) - 1),
+            self.done.eq(reader.done),
+            If(reader.index >= 152,
+                source.data.eq(reader.data - self.decode)
+            ).Else(
+                source.data.eq(reader.data)
+            )
+        ]
+
+# StreamTransmitter --------------------------------------------------------------------------------
+
+class StreamTransmitter(Module):
+    """ContentReader -> SyncFIFO -> UARTTX"""
+    def __init__(self, sys_clk_freq, baudrate=115200, fifo_depth=16, content=content):
+        # Module's interface
+        self.tx     = Signal() # output
+        self.decode = Signal(4) # input
+        self.done   = Signal() # output (all the bytes sent)
+
+        # # #
+
+        self.submodules.reader = reader = ContentReader(content)
+        self.submodules.fifo   = fifo   = stream.SyncFIFO([("data", 8)], fifo_depth)
+        self.submodules.uart   = uart   = UARTTX(sys_clk_freq, baudrate)
+        self.comb += [
+            reader.decode.eq(self.decode),
+            reader.source.connect(fifo.sink),
+            fifo.source.connect(uart.sink),
+            self.tx.eq(uart.tx),
+            self.done.eq(reader.done & ~fifo.source.valid & uart.sink.ready),
+        ]
+
+# Design -------------------------------------------------------------------------------------------
+
+class StreamDesign(Module):
+    def __init__(self, platform, baudrate=115200):
+        self.submodules.crg = CRG(platform.request("clk100"), ~platform.request("rst"))
+
+        self.submodules.transmitter = transmitter = StreamTransmitter(100e6, baudrate)
+        self.comb += [
+            transmitter.decode.eq(Cat(*[platform.request("user_sw", i) for i in range(4)])),
+            platform.request("serial_tx").eq(transmitter.tx),
+        ]
+
+# Simulation ---------------------------------------------------------------------------------------
+
+def expected(decode):
+    return [(c - decode) & 0xff if n >= 152 else c for n, c in enumerate(content)]
+
+@passive
+def uart_decoder(tx, divider, received):
+    # Sample tx in the middle of each bit, received gets (start cycle, byte) per byte
+    cycle = 0
+    while True:
+        while (yield tx):
+            cycle += 1
+            yield
+        start = cycle
+        bits  = []
+        for i in range(10):
+            while cycle < start + divider*i + divider//2:
+                cycle += 1
+                yield
+            bits.append((yield tx))
+        assert bits[0] == 0, "bad start bit at cycle {}".format(start)
+        assert bits[9] == 1, "bad stop bit at cycle {}".format(start)
+        received.append((start, sum(b << i for i, b in enumerate(bits[1:9]))))
+        # Wait the end of the stop bit
+        while cycle < start + divider*10 - 1:
+            cycle += 1
+            yield
+
+def sim(sys_clk_freq, baudrate, decode=5, fifo_depth=16):
+    divider  = int(round(sys_clk_freq/baudrate))
+    received = []
+    dut = StreamTransmitter(sys_clk_freq, baudrate, fifo_depth)
+
+    def dut_tb(dut):
+        yield dut.decode.eq(decode)
+        yield
+        while not (yield dut.done):
+            yield
+        # Wait the end of the last byte
+        for i in range(divider*10):
+            yield
+
+    run_simulation(dut, [dut_tb(dut), uart_decoder(dut.tx, divider, received)])
+
+    datas = [data for start, data in received]
+    assert datas == expected(decode), "received data mismatch"
+    starts = [start for start, data in received]
+    gaps   = set(b - a for a, b in zip(starts, starts[1:]))
+    assert gaps == {10*divider}, "bytes not sent back to back: {}".format(gaps)
+    elapsed = (starts[-1] - starts[0] + 10*divider)/sys_clk_freq
+    print("{} bytes at {:.0f} bauds ({} cycles/bit): {:.3f}ms, {:.0f} bytes/s (line rate: {:.0f}): OK".format(
+        len(datas), sys_clk_freq/divider, divider, 1e3*elapsed, len(datas)/elapsed, baudrate/10))
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Streaming UART transmitter of the content message")
+    parser.add_argument("--build",    action="store_true", help="Build the design (default: simulate)")
+    parser.add_argument("--baudrate", default=115200, type=int, help="UART baudrate")
+    parser.add_argument("--sim-clk",  default=None, type=float,
+        help="Simulated clock frequency (default: 16 cycles/bit to keep the simulation short)")
+    args = parser.parse_args()
+
+    if args.build:
+        platform = Platform()
+        design   = StreamDesign(platform, args.baudrate)
+        platform.build(design)
+    else:
+        sim(args.sim_clk or 16*args.baudrate, args.baudrate)
@@ -3,7 +3,6 @@
 from datetime import datetime, timedelta
 
 from migen import *
-from migen.genlib.cdc import MultiReg
 
 from litex.build.generic_platform import *
 from litex.build.xilinx import XilinxPlatform
@@ -12,6 +11,7 @@ from tick import *
 from display import *
 from bcd import *
 from core import *
+from debounce import *
 
 # IOs ----------------------------------------------------------------------------------------------
 
@@ -49,44 +49,6 @@ class Platform(XilinxPlatform):
 
 # Design -------------------------------------------------------------------------------------------
 
-# User button detection
-class UserButtonPress(Module):
-    def __init__(self, user_btn):
-        rising = Signal()
-
-        self.pressed = debounce(self, rising)
-
-        # # #
-
-        _user_btn = Signal()
-        _user_btn_d = Signal()
-
-        # resynchronize user_btn
-        self.specials += MultiReg(user_btn, _user_btn)
-        # detect rising edge
-        self.sync += [
-            _user_btn_d.eq(user_btn),
-            rising.eq(_user_btn & ~_user_btn_d)
-        ]
-
-# Debouncing
-def debounce(mod, s):
-    counter = Signal(20, reset=1)
-    out = Signal()
-
-    mod.comb += out.eq(counter == 0)
-    mod.sync += [
-        If(counter == 1,
-            If(s, counter.eq(2)),
-        ).Elif(counter > 1,
-            counter.eq(counter + 1),
-        ).Else(
-            counter.eq(1),
-        ),
-    ]
-
-    return out
-
 # Create our platform (fpga interface)
 platform = Platform()
 
@@ -98,8 +60,11 @@ class Clock(Module):
             disp_dot, config, right, left, up, down, center,
         ):
         # -- TO BE COMPLETED --
+        # Shared prescaler: every module below takes its strobe from it
+        self.submodules.timebase = timebase = Timebase(Clock.sys_clk_freq)
+
         # Tick generation : timebase
-        self.submodules.tick = Tick(Clock.sys_clk_freq, 1)
+        self.submodules.tick = Tick(Clock.sys_clk_freq, 1, timebase)
 
         # SevenSegmentDisplay
         self.submodules.disp = SevenSegmentDisplay(
@@ -107,6 +72,7 @@ class Clock(Module):
             # cs_period=(1/40),
             # cs_period=0.5,
             digits=8,
+            timebase=timebase,
         )
 
         # Core : counts ss/mm/hh
@@ -124,12 +90,11 @@ class Clock(Module):
         self.submodules.seconds = BCD()
         # self.submodules.centis = BCD()
 
-        # Buttons.
-        self.submodules.left = UserButtonPress(left)
-        self.submodules.right = UserButtonPress(right)
-        self.submodules.up = UserButtonPress(up)
-        self.submodules.down = UserButtonPress(down)
-        self.submodules.center = UserButtonPress(center)
+        # Buttons: debounced together, actions are taken on release.
+        self.submodules.buttons = InputConditioner(5, timebase)
+        self.comb += self.buttons.i.eq(Cat(right, left, up, down, center))
+        right_released, left_released, up_released, down_released, center_released = \
+            [self.buttons.released[i] for i in range(5)]
 
         # use the generated verilog file
         # no.
@@ -137,7 +102,7 @@ class Clock(Module):
         am_pm = Signal()
 
         self.submodules.blink = Pulse(
-                Clock.sys_clk_freq, 1/1.5, 1/3)
+                Clock.sys_clk_freq, 1/1.5, 1/3, timebase)
 
         missouri_time = Signal()
         tz_hours = Signal(5)
@@ -230,10 +195,10 @@ class Clock(Module):
                 "default": disp_dot.eq(1),
             }),
 
-            self.core.inc_hours.eq(config & self.up.pressed),
-            self.core.dec_hours.eq(config & self.down.pressed),
-            self.core.inc_minutes.eq(config & self.right.pressed),
-            self.core.dec_minutes.eq(config & self.left.pressed),
+            self.core.inc_hours.eq(config & up_released),
+            self.core.dec_hours.eq(config & down_released),
+            self.core.inc_minutes.eq(config & right_released),
+            self.core.dec_minutes.eq(config & left_released),
 
         ]
         # -- TO BE COMPLETED --
@@ -241,7 +206,7 @@ class Clock(Module):
         # center_pressed = debounce(self, self.center.rising)
 
         self.sync += [
-            If(self.center.pressed, missouri_time.eq(~missouri_time)),
+            If(center_released, missouri_time.eq(~missouri_time)),
             # If(self.center.rising, led.eq(~led)),
             # If(self.blink.ce, led.eq(~led)),
             # If(self.blink.ce, blink.eq(~blink)),
@@ -0,0 +1,201 @@
+from migen import *
+from migen.genlib.cdc import MultiReg
+
+from tick import Timebase
+
+# Goals:
+# - understand why mechanical buttons/switches need to be debounced
+# - share the same debouncing logic between all the inputs of a bus
+
+# UserButtonPress ----------------------------------------------------------------------------------
+
+# User button detection
+class UserButtonPress(Module):
+    def __init__(self, user_btn, timebase=None, bits=20):
+        rising = Signal()
+
+        self.pressed = debounce(self, rising, timebase, bits)
+
+        # # #
+
+        _user_btn = Signal()
+        _user_btn_d = Signal()
+
+        # resynchronize user_btn
+        self.specials += MultiReg(user_btn, _user_btn)
+        # detect rising edge
+        self.sync += [
+            _user_btn_d.eq(user_btn),
+            rising.eq(_user_btn & ~_user_btn_d)
+        ]
+
+# Debouncing
+def debounce(mod, s, timebase=None, bits=20):
+    if timebase is not None:
+        return debounce_timebase(mod, s, timebase, bits)
+
+    counter = Signal(bits, reset=1)
+    out = Signal()
+
+    mod.comb += out.eq(counter == 0)
+    mod.sync += [
+        If(counter == 1,
+            If(s, counter.eq(2)),
+        ).Elif(counter > 1,
+            counter.eq(counter + 1),
+        ).Else(
+            counter.eq(1),
+        ),
+    ]
+
+    return out
+
+# Debouncing on a shared Timebase: same ~2**bits cycles dead time, counted in resolution steps.
+def debounce_timebase(mod, s, timebase, bits=20):
+    step  = timebase.get_ce(timebase.resolution)
+    steps = -(-2**bits//timebase.cycles(timebase.resolution))
+    busy    = Signal()
+    counter = Signal(max=steps)
+    out = Signal()
+
+    mod.comb += out.eq(busy & step & (counter == steps - 1))
+    mod.sync += [
+        If(~busy,
+            If(s, busy.eq(1), counter.eq(0)),
+        ).Elif(step,
+            If(counter == steps - 1,
+                busy.eq(0),
+            ).Else(
+                counter.eq(counter + 1),
+            ),
+        ),
+    ]
+
+    return out
+
+# InputConditioner ---------------------------------------------------------------------------------
+
+class InputConditioner(Module):
+    """Debounce a whole bus of buttons/switches
+
+    The bus is resynchronized once and sampled on a shared low-rate strobe of the Timebase. Each
+    bit only has a small saturating integrator: level goes high when the integrator reaches its
+    top value and low when it gets back to 0, so bounces shorter than a few sample periods are
+    filtered out. pressed/released pulse for one cycle when level changes.
+    """
+    def __init__(self, width, timebase, sample_period=4e-3, integrator_bits=2):
+        # Module's interface
+        self.i        = Signal(width) # input
+        self.level    = Signal(width) # output
+        self.pressed  = Signal(width) # output
+        self.released = Signal(width) # output
+
+        # # #
+
+        # Resynchronize the whole bus
+        i = Signal(width)
+        self.specials += MultiReg(self.i, i)
+
+        # Shared sampling strobe
+        sample = timebase.get_ce(sample_period)
+
+        top = 2**integrator_bits - 1
+        for n in range(width):
+            integrator = Signal(integrator_bits)
+            self.comb += [
+                self.pressed[n].eq( sample &  i[n] & (integrator == (top - 1)) & ~self.level[n]),
+                self.released[n].eq(sample & ~i[n] & (integrator == 1)         &  self.level[n]),
+            ]
+            self.sync += [
+                If(sample,
+                    If(i[n],
+                        If(integrator != top, integrator.eq(integrator + 1))
+                    ).Else(
+                        If(integrator != 0, integrator.eq(integrator - 1))
+                    )
+                ),
+                If(self.pressed[n],  self.level[n].eq(1)),
+                If(self.released[n], self.level[n].eq(0)),
+            ]
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    # Compare InputConditioner with the per-button debouncer on the same bouncy presses.
+    # The clock is scaled down to 100kHz (and the debouncer to 10 bits) to keep the simulation short.
+    print("InputConditioner simulation")
+    import random
+
+    sys_clk_freq = 100e3
+
+    class DUT(Module):
+        def __init__(self, width):
+            self.buttons = Signal(width)
+            self.submodules.timebase = Timebase(sys_clk_freq)
+            self.submodules.conditioner = InputConditioner(width, self.timebase)
+            self.comb += self.conditioner.i.eq(self.buttons)
+            self.refs = []
+            for n in range(width):
+                ref = UserButtonPress(self.buttons[n], bits=10)
+                self.submodules += ref
+                self.refs.append(ref)
+
+    width = 2
+    prng  = random.Random(42)
+
+    def bouncy(level, cycles):
+        # Contact bounces during ~3ms before settling.
+        t = 0
+        while t < 300:
+            n = prng.randrange(10, 60)
+            yield (prng.randrange(2), n)
+            t += n
+        yield (level, cycles)
+
+    def stimulus(press_bounces):
+        for press in range(4):
+            if press_bounces:
+                yield from bouncy(1, prng.randrange(2000, 4000))
+            else:
+                yield (1, prng.randrange(2000, 4000))
+            yield from bouncy(0, prng.randrange(2000, 4000))
+
+    def dut_tb(dut, events, press_bounces):
+        stimuli = [list(stimulus(press_bounces)) for n in range(width)]
+        levels  = [[] for n in range(width)]
+        for n in range(width):
+            for level, cycles in stimuli[n]:
+                levels[n] += [level]*cycles
+        for cycle in range(max(len(l) for l in levels)):
+            value = 0
+            for n in range(width):
+                if cycle < len(levels[n]):
+                    value |= levels[n][cycle] << n
+            yield dut.buttons.eq(value)
+            yield
+            released = (yield dut.conditioner.released)
+            for n in range(width):
+                if (yield dut.refs[n].pressed):
+                    events["ref"][n].append(cycle)
+                if (released >> n) & 0b1:
+                    events["conditioner"][n].append(cycle)
+
+    # Note: UserButtonPress compares the resynchronized input with the raw one, so its pressed
+    # output actually fires on falling edges (button release). It is compared here with
+    # InputConditioner's released output.
+    # Bounces on release only: both must see the same releases.
+    # Bounces on press too: debounce is edge triggered and also fires on the press bounces.
+    for press_bounces in [False, True]:
+        print("Bounces on press: {}".format(press_bounces))
+        dut    = DUT(width)
+        events = {"ref": [[] for n in range(width)], "conditioner": [[] for n in range(width)]}
+        run_simulation(dut, dut_tb(dut, events, press_bounces), vcd_name="debounce.vcd")
+
+        for n in range(width):
+            ref, conditioner = events["ref"][n], events["conditioner"][n]
+            print("input {}: {} releases (debounce) / {} releases (InputConditioner)".format(
+                n, len(ref), len(conditioner)))
+            if not press_bounces:
+                for r, c in zip(ref, conditioner):
+                    print("  debounce @ {:6d} / InputConditioner @ {:6d}".format(r, c))
+                assert len(ref) == len(conditioner)
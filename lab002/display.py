@@ -46,7 +46,7 @@ class SevenSegment(Module):
 # SevenSegmentDisplay ------------------------------------------------------------------------------
 
 class SevenSegmentDisplay(Module):
-    def __init__(self, sys_clk_freq, cs_period=0.001, digits=8):
+    def __init__(self, sys_clk_freq, cs_period=0.001, digits=8, timebase=None, scan="onehot"):
         # Module's interface
         self.values = Array(Signal(5) for i in range(digits))  # input
 
@@ -61,38 +61,67 @@ class SevenSegmentDisplay(Module):
         self.comb += self.abcdefg.eq(seven_segment.abcdefg)
 
         # Create a tick every cs_period
-        self.submodules.tick = Tick(sys_clk_freq, cs_period)
-
-        # Rotate cs <digits> bits signals to alternate seven segments
-        # cycle 0 : 0b..000001
-        # cycle 1 : 0b..000010
-        # cycle 2 : 0b..000100
-        # cycle 3 : 0b..001000
-        # cycle 4 : 0b..010000
-        # cycle 5 : 0b..100000
-        # ..
-        # cycle n : 0b..000001
-        cs = Signal(digits, reset=1)
-        # Synchronous assigment
-        self.sync += [
-            If(self.tick.ce,
-                # rotate cs
-                cs.eq((cs << 1) | (cs == (1 << (digits - 1)))),
-            )
-        ]
-        # Combinatorial assigment
-        self.comb += self.cs.eq(cs)
-
-        # cs to value selection.
-        # Here we create a table to translate each of the <digits> cs possible values
-        # to input value selection.
-        cases = {
-            1 << i: seven_segment.value.eq(self.values[i])
-            for i in range(digits)
-        }
-
-        # Combinatorial assigment
-        self.comb += Case(self.cs, cases)
+        self.submodules.tick = Tick(sys_clk_freq, cs_period, timebase)
+
+        if scan == "onehot":
+            # Rotate cs <digits> bits signals to alternate seven segments
+            # cycle 0 : 0b..000001
+            # cycle 1 : 0b..000010
+            # cycle 2 : 0b..000100
+            # cycle 3 : 0b..001000
+            # cycle 4 : 0b..010000
+            # cycle 5 : 0b..100000
+            # ..
+            # cycle n : 0b..000001
+            cs = Signal(digits, reset=1)
+            # Synchronous assigment
+            self.sync += [
+                If(self.tick.ce,
+                    # rotate cs
+                    cs.eq((cs << 1) | (cs == (1 << (digits - 1)))),
+                )
+            ]
+            # Combinatorial assigment
+            self.comb += self.cs.eq(cs)
+
+            # cs to value selection.
+            # Here we create a table to translate each of the <digits> cs possible values
+            # to input value selection.
+            cases = {
+                1 << i: seven_segment.value.eq(self.values[i])
+                for i in range(digits)
+            }
+
+            # Combinatorial assigment
+            self.comb += Case(self.cs, cases)
+
+        elif scan == "binary":
+            # Count the digit index in binary: log2(digits) bits instead of <digits> bits
+            # (cheaper than onehot from 4 digits, see resources.py)
+            # cycle 0 : 0
+            # cycle 1 : 1
+            # ..
+            # cycle n : 0
+            index = Signal(max=digits)
+            # Synchronous assigment
+            self.sync += [
+                If(self.tick.ce,
+                    If(index == (digits - 1),
+                        index.eq(0)
+                    ).Else(
+                        index.eq(index + 1)
+                    )
+                )
+            ]
+
+            # Decode index to cs.
+            self.comb += Case(index, {i: self.cs.eq(1 << i) for i in range(digits)})
+
+            # index to value selection: directly index the values Array.
+            self.comb += seven_segment.value.eq(self.values[index])
+
+        else:
+            raise ValueError("Unsupported scan encoding: {}".format(scan))
 
 # Main ---------------------------------------------------------------------------------------------
 
@@ -130,3 +159,21 @@ if __name__ == '__main__':
             yield
 
     run_simulation(dut, dut_tb(dut), vcd_name="display.vcd")
+
+    # Binary scan simulation: must drive the same cs/abcdefg as the one-hot scan
+    print("SevenSegmentDisplay binary scan simulation")
+    class DUT(Module):
+        def __init__(self, digits):
+            self.submodules.onehot = SevenSegmentDisplay(100e6, 0.000001, digits, scan="onehot")
+            self.submodules.binary = SevenSegmentDisplay(100e6, 0.000001, digits, scan="binary")
+    dut = DUT(digits)
+    def dut_tb(dut):
+        for i in range(4096):
+            for j in range(digits):
+                yield dut.onehot.values[j].eq(i + j)
+                yield dut.binary.values[j].eq(i + j)
+            yield
+            assert (yield dut.onehot.cs)      == (yield dut.binary.cs)
+            assert (yield dut.onehot.abcdefg) == (yield dut.binary.abcdefg)
+
+    run_simulation(dut, dut_tb(dut), vcd_name="display_binary.vcd")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+
+from migen import *
+
+from display import SevenSegmentDisplay
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from synthesis import synthesize, summarize
+
+# Goals:
+# - estimate the resources (LUTs/Registers) of a design without running the full Vivado flow
+# - compare different implementations of the same module
+
+# Resources ----------------------------------------------------------------------------------------
+
+def resources(module, ios):
+    """Synthesize module with Yosys (synth_xilinx, see common/synthesis.py), return its (LUTs, Registers) count."""
+    r = summarize(synthesize(module, ios))
+    return r["LUT"], r["FF"]
+
+# Designs ------------------------------------------------------------------------------------------
+
+class _Display(Module):
+    def __init__(self, digits, scan):
+        # Flatten display's values so that they can be used as top-level ios
+        self.values  = Signal(5*digits)
+        self.cs      = Signal(digits)
+        self.abcdefg = Signal(7)
+
+        # # #
+
+        self.submodules.display = display = SevenSegmentDisplay(100e6, digits=digits, scan=scan)
+        self.comb += [display.values[i].eq(self.values[5*i:5*(i+1)]) for i in range(digits)]
+        self.comb += [
+            self.cs.eq(display.cs),
+            self.abcdefg.eq(display.abcdefg),
+        ]
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    print("SevenSegmentDisplay scan encoding (LUTs/Registers)")
+    print("digits | onehot    | binary")
+    for digits in [4, 6, 8, 16]:
+        line = "{:6d}".format(digits)
+        for scan in ["onehot", "binary"]:
+            dut = _Display(digits, scan)
+            line += " | {:3d}/{:3d}  ".format(*resources(dut, {dut.values, dut.cs, dut.abcdefg}))
+        print(line)
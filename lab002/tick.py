@@ -8,13 +8,19 @@ from migen import *
 # Tick ---------------------------------------------------------------------------------------------
 
 class Tick(Module):
-    def __init__(self, sys_clk_freq, period):
+    def __init__(self, sys_clk_freq, period, timebase=None):
         # Module's interface
         self.enable = Signal(reset=1) # input
         self.ce     = Signal()        # output
 
         # # #
 
+        # With a shared Timebase, just pick the strobe at our period (no local counter).
+        # Note: the strobe is free-running, so enable only masks it.
+        if timebase is not None:
+            self.comb += self.ce.eq(self.enable & timebase.get_ce(period))
+            return
+
         counter_preload = int(period*sys_clk_freq - 1)
         counter = Signal(max=counter_preload)
         # counter = Signal(max=int(period*sys_clk_freq - 1))
@@ -33,16 +39,22 @@ class Tick(Module):
 
 
 class Pulse(Module):
-    def __init__(self, sys_clk_freq, high_width, low_width):
+    def __init__(self, sys_clk_freq, high_width, low_width, timebase=None):
         self.ce = Signal() # output
 
         # # #
 
+        # Count sys_clk cycles, or Timebase resolution steps when a Timebase is shared.
+        step = C(1)
+        if timebase is not None:
+            sys_clk_freq = 1/timebase.resolution
+            step = timebase.get_ce(timebase.resolution)
+
         high_width = int(high_width*sys_clk_freq)
         low_width = int(low_width*sys_clk_freq)
         counter = Signal(max=low_width + high_width)
 
-        self.sync += [
+        self.sync += If(step,
             If(self.ce,
                If(counter == low_width + high_width,
                   self.ce.eq(0),
@@ -54,7 +66,53 @@ class Pulse(Module):
                    self.ce.eq(1),
                 ),
             ),
+        )
+
+# Timebase -----------------------------------------------------------------------------------------
+
+class Timebase(Module):
+    """Shared cascaded prescaler
+
+    Instead of having one wide counter per module, all the modules request their clock-enable
+    strobe from a single Timebase. A first stage divides sys_clk down to resolution, and each
+    requested period is derived from the slowest existing stage that divides it, so a 1s strobe
+    only costs a 10-bit counter on top of the 1ms stage.
+    """
+    def __init__(self, sys_clk_freq, resolution=1e-3):
+        self.sys_clk_freq = sys_clk_freq
+        self.resolution   = resolution
+
+        # # #
+
+        # Stages: period (in sys_clk cycles) -> strobe.
+        self.stages = {1: C(1)}
+        self.get_ce(resolution)
+
+    def cycles(self, period):
+        return max(int(round(period*self.sys_clk_freq)), 1)
+
+    def get_ce(self, period):
+        cycles = self.cycles(period)
+        if cycles in self.stages:
+            return self.stages[cycles]
+
+        # Cascade on the slowest existing stage whose period divides the requested one.
+        parent = max(c for c in self.stages if cycles % c == 0)
+        ratio  = cycles//parent
+        ce     = Signal()
+        counter = Signal(max=ratio)
+        self.comb += ce.eq(self.stages[parent] & (counter == 0))
+        self.sync += [
+            If(self.stages[parent],
+                If(counter == 0,
+                    counter.eq(ratio - 1)
+                ).Else(
+                    counter.eq(counter - 1)
+                )
+            )
         ]
+        self.stages[cycles] = ce
+        return ce
 
 # Main ---------------------------------------------------------------------------------------------
 
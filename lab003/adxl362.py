@@ -0,0 +1,336 @@
+from migen import *
+
+from litex.soc.interconnect.csr import *
+from litex.soc.interconnect import wishbone
+from litex.soc.cores.spi import SPIMaster
+
+# Goals:
+# - get the ADXL362 samples at its full output data rate (400Hz) without the host driving each SPI
+#   transfer over the (slow) UART bridge
+# - understand how a small FSM can sequence a SPI master and fill a ring buffer in BRAM
+
+# ADXL362 registers/commands
+ADXL362_WRITE      = 0x0a
+ADXL362_READ       = 0x0b
+ADXL362_XDATA_L    = 0x0e
+ADXL362_FILTER_CTL = 0x2c
+ADXL362_POWER_CTL  = 0x2d
+
+# ADXL362Stream ------------------------------------------------------------------------------------
+
+class ADXL362Stream(Module, AutoCSR):
+    """Autonomous ADXL362 acquisition into a BRAM ring buffer
+
+    When enable is set, the ADXL362 is configured (filter_ctl written to FILTER_CTL, measurement
+    mode set in POWER_CTL), then XDATA..ZDATA are read in a single burst every period cycles. Each
+    sample is stored in the ring buffer (a Wishbone slave of depth entries of 4 words):
+    - word 0: timestamp (us, taken at the sample strobe).
+    - word 1: Y (bits 16-31), X (bits 0-15), signed.
+    - word 2: Z (bits 0-15), signed.
+    - word 3: sample number.
+    Sample n goes to entry n % depth. count is the number of samples since enable was set: the host
+    reads the entries between its last count and the new one (see test/test_adxl362_stream.py),
+    samples older than count - depth have been overwritten.
+
+    The SPI pads are shared with a CSR controlled SPIMaster (host_pads): the host keeps the pads
+    while enable is 0 and must not start a transfer while enable is 1.
+
+    The SPI clk is sys_clk_freq/spi_clk_divider (reset: spi_clk_freq).
+
+    Note: the sample strobe is generated internally (the INT pins are not used), keep period close
+    to the output data rate selected in filter_ctl (reset: 400Hz, half bandwidth, +-2g).
+    """
+    def __init__(self, pads, sys_clk_freq, spi_clk_freq=1e6, rate=400, depth=512):
+        self.pads       = pads
+        self.host_pads  = Record(SPIMaster.pads_layout)
+        self.bus        = wishbone.Interface()
+        self.enable     = CSRStorage()
+        self.filter_ctl = CSRStorage(8, reset=0x15)
+        self.period     = CSRStorage(32, reset=int(sys_clk_freq/rate))
+        self.count      = CSRStatus(32)
+        self.depth      = depth
+
+        # # #
+
+        # SPI master (64-bit: command + address + 6 data bytes in a single transfer)
+        spi_pads = Record(SPIMaster.pads_layout)
+        self.submodules.spi = spi = SPIMaster(spi_pads, 64, sys_clk_freq, spi_clk_freq, with_csr=False)
+        spi.add_clk_divider()
+        active = Signal()
+        for pads_out in [self.host_pads, spi_pads]:
+            self.comb += pads_out.miso.eq(pads.miso)
+        self.comb += [
+            If(active,
+                pads.cs_n.eq(spi_pads.cs_n),
+                pads.clk.eq(spi_pads.clk),
+                pads.mosi.eq(spi_pads.mosi),
+            ).Else(
+                pads.cs_n.eq(self.host_pads.cs_n),
+                pads.clk.eq(self.host_pads.clk),
+                pads.mosi.eq(self.host_pads.mosi),
+            )
+        ]
+
+        # Timestamp (us)
+        timestamp = Signal(32)
+        prescaler = Signal(max=int(sys_clk_freq/1e6))
+        self.sync += [
+            prescaler.eq(prescaler + 1),
+            If(prescaler == int(sys_clk_freq/1e6) - 1,
+                prescaler.eq(0),
+                timestamp.eq(timestamp + 1)
+            )
+        ]
+
+        # Sample strobe (a strobe arriving while the previous one still waits for its transfer is
+        # dropped). The strobe's timestamp is latched with the strobe and moves to the sample when
+        # its transfer starts: strobes during the transfer do not change it.
+        timer   = Signal(32)
+        strobe  = Signal()
+        pending = Signal()
+        start   = Signal()
+        strobe_timestamp = Signal(32)
+        sample_timestamp = Signal(32)
+        self.comb += strobe.eq(timer >= self.period.storage - 1)
+        self.sync += [
+            If(~self.enable.storage,
+                timer.eq(0),
+                pending.eq(0)
+            ).Else(
+                If(strobe,
+                    timer.eq(0)
+                ).Else(
+                    timer.eq(timer + 1)
+                ),
+                If(strobe & (~pending | start),
+                    pending.eq(1),
+                    strobe_timestamp.eq(timestamp)
+                ).Elif(start,
+                    pending.eq(0)
+                )
+            ),
+            If(start, sample_timestamp.eq(strobe_timestamp))
+        ]
+
+        # Ring buffer: <depth> entries of 4 words
+        mem = Memory(128, depth)
+        write_port = mem.get_port(write_capable=True)
+        bus_port   = mem.get_port()
+        self.specials += mem, write_port, bus_port
+
+        count = Signal(32)
+        miso  = spi.miso
+        x     = Cat(miso[40:48], miso[32:40])
+        y     = Cat(miso[24:32], miso[16:24])
+        z     = Cat(miso[ 8:16], miso[ 0: 8])
+        self.comb += [
+            self.count.status.eq(count),
+            write_port.adr.eq(count[:log2_int(depth)]),
+            write_port.dat_w.eq(Cat(sample_timestamp, x, y, z, Replicate(0, 16), count)),
+        ]
+
+        # Acquisition FSM (the SPI length must be held during the transfer)
+        length = Signal(8)
+        def spi_write(addr, data):
+            return [
+                spi.mosi.eq(Cat(Replicate(0, 40), data, Constant(addr, 8), Constant(ADXL362_WRITE, 8))),
+                spi.start.eq(1),
+                NextValue(length, 24),
+            ]
+        self.comb += [
+            spi.cs.eq(1),
+            spi.length.eq(length),
+        ]
+        self.submodules.fsm = fsm = FSM(reset_state="IDLE")
+        fsm.act("IDLE",
+            If(self.enable.storage,
+                NextValue(count, 0),
+                NextValue(active, 1),
+                NextState("WRITE-FILTER")
+            ).Else(
+                NextValue(active, 0)
+            )
+        )
+        fsm.act("WRITE-FILTER",
+            spi_write(ADXL362_FILTER_CTL, self.filter_ctl.storage),
+            NextState("WAIT-FILTER")
+        )
+        fsm.act("WAIT-FILTER",
+            If(spi.done, NextState("WRITE-POWER"))
+        )
+        fsm.act("WRITE-POWER",
+            spi_write(ADXL362_POWER_CTL, Constant(0x02, 8)), # Measurement mode
+            NextState("WAIT-POWER")
+        )
+        fsm.act("WAIT-POWER",
+            If(spi.done, NextState("RUN"))
+        )
+        fsm.act("RUN",
+            If(~self.enable.storage,
+                NextState("IDLE")
+            ).Elif(pending,
+                start.eq(1),
+                spi.mosi.eq(Cat(Replicate(0, 48), Constant(ADXL362_XDATA_L, 8), Constant(ADXL362_READ, 8))),
+                spi.start.eq(1),
+                NextValue(length, 64),
+                NextState("READ")
+            )
+        )
+        fsm.act("READ",
+            If(spi.done, NextState("STORE"))
+        )
+        fsm.act("STORE",
+            write_port.we.eq(1),
+            NextValue(count, count + 1),
+            NextState("RUN")
+        )
+
+        # Wishbone access to the ring buffer (read-only, writes are acked and ignored)
+        word = Signal(2)
+        self.comb += [
+            bus_port.adr.eq(self.bus.adr[2:2 + log2_int(depth)]),
+            word.eq(self.bus.adr[:2]),
+            self.bus.dat_r.eq(Array(bus_port.dat_r[32*i:32*(i + 1)] for i in range(4))[word]),
+        ]
+        self.sync += [
+            self.bus.ack.eq(0),
+            If(self.bus.cyc & self.bus.stb & ~self.bus.ack,
+                self.bus.ack.eq(1)
+            )
+        ]
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    # Simple ADXL362 SPI model (mode 0: mosi sampled on clk rising edges, miso changed on falling edges)
+    regs   = {}
+    writes = []
+    @passive
+    def adxl362_model(pads):
+        clk_d, cs_n_d = 0, 1
+        while True:
+            clk, cs_n = (yield pads.clk), (yield pads.cs_n)
+            if cs_n:
+                bits, shift, out = 0, 0, []
+            elif clk and not clk_d:
+                shift = ((shift << 1) | (yield pads.mosi)) & 0xff
+                bits += 1
+                if bits % 8 == 0:
+                    n = bits//8
+                    if n == 1:
+                        cmd = shift
+                    elif n == 2:
+                        addr = shift
+                        if cmd == ADXL362_READ:
+                            out = [(regs.get(addr + i, 0) >> (7 - j)) & 1 for i in range(6) for j in range(8)]
+                    elif cmd == ADXL362_WRITE:
+                        writes.append((addr, shift))
+                        regs[addr] = shift
+                        addr += 1
+            elif not clk and clk_d and out:
+                yield pads.miso.eq(out.pop(0))
+            if cs_n and not cs_n_d:
+                yield pads.miso.eq(0)
+            clk_d, cs_n_d = clk, cs_n
+            yield
+
+    # SPIMaster clock divider simulation: mode 0 timing at each divider
+    print("SPIMaster clock divider simulation")
+    def spi_timing_tb(dut, divider):
+        regs[0x00] = 0xad # DEVID_AD
+        yield from dut._clk_divider.write(divider)
+        yield dut.cs.eq(1)
+        yield dut.length.eq(24)
+        yield dut.mosi.eq((ADXL362_READ << 24) | (0x00 << 16))
+        yield dut.start.eq(1)
+        yield
+        yield dut.start.eq(0)
+        yield
+        rises, edges, selected = [], [], None
+        clk_d, mosi_d, cycle = 0, 0, 0
+        while not (yield dut.done):
+            clk, mosi, cs_n = (yield pads.clk), (yield pads.mosi), (yield pads.cs_n)
+            # CPOL=0: clk idles low outside of the transfer
+            assert cs_n == 0 or clk == 0
+            if cs_n == 0 and selected is None:
+                selected = cycle
+            if clk != clk_d:
+                edges.append(cycle)
+                if clk:
+                    # CPHA=0: mosi is stable on clk rising edges, 1 cycle after CS
+                    assert mosi == mosi_d
+                    assert selected is not None and cycle > selected
+                    rises.append(cycle)
+            clk_d, mosi_d, cycle = clk, mosi, cycle + 1
+            yield
+        periods = [b - a for a, b in zip(rises, rises[1:])]
+        assert len(rises) == 24
+        assert periods == [divider]*23
+        assert (yield dut.miso) & 0xff == 0xad
+        print("divider {:3d}: {:7.3f}MHz, high {} cycles, low {} cycles: OK".format(
+            divider, 100/divider, edges[1] - edges[0], edges[2] - edges[1]))
+
+    # (dividers 2/3 give a 1 cycle low time: the model answers too late, as would any real device)
+    for divider in [4, 5, 8, 13, 25, 100]:
+        pads = Record(SPIMaster.pads_layout)
+        dut  = SPIMaster(pads, 32, 100e6, 1e6, with_csr=False)
+        dut.add_clk_divider()
+        run_simulation(dut, [spi_timing_tb(dut, divider), adxl362_model(pads)])
+
+    # ADXL362Stream simulation
+    print("ADXL362Stream simulation")
+    pads = Record(SPIMaster.pads_layout)
+    dut  = ADXL362Stream(pads, 100e6, spi_clk_freq=25e6, rate=100e6/1000, depth=4)
+
+    def set_sample(n):
+        # X = n, Y = -n, Z = 0x100 + n (signed 16-bit, little endian)
+        for i, v in enumerate([n, -n, 0x100 + n]):
+            regs[ADXL362_XDATA_L + 2*i + 0] = v & 0xff
+            regs[ADXL362_XDATA_L + 2*i + 1] = (v >> 8) & 0xff
+
+    def dut_tb(dut):
+        set_sample(0)
+        yield from dut.enable.write(1)
+        samples = []
+        while len(samples) < 6:
+            count = (yield from dut.count.read())
+            if count > len(samples):
+                entry = []
+                for i in range(4):
+                    entry.append((yield from dut.bus.read(4*(len(samples) % 4) + i)))
+                samples.append(entry)
+                set_sample(len(samples))
+            yield
+        yield from dut.enable.write(0)
+        assert writes[:2] == [(ADXL362_FILTER_CTL, 0x15), (ADXL362_POWER_CTL, 0x02)]
+        for n, (timestamp, xy, z, number) in enumerate(samples):
+            x, y = xy & 0xffff, xy >> 16
+            assert (x, y, z, number) == (n, (-n) & 0xffff, 0x100 + n, n)
+            if n:
+                assert timestamp - samples[n - 1][0] == 10 # 1000 cycles = 10us
+        print("{} samples, timestamps: {}".format(len(samples), [s[0] for s in samples]))
+
+    run_simulation(dut, [dut_tb(dut), adxl362_model(pads)], vcd_name="adxl362_stream.vcd")
+
+    # Period (2us) shorter than the SPI transfer (64 bits at 25MHz: >2.56us): strobes during a
+    # transfer are dropped, each sample keeps the timestamp of the strobe that started its transfer
+    print("ADXL362Stream simulation (period shorter than the transfer)")
+    pads = Record(SPIMaster.pads_layout)
+    dut  = ADXL362Stream(pads, 100e6, spi_clk_freq=25e6, rate=100e6/200, depth=4)
+
+    def fast_tb(dut):
+        yield dut.enable.storage.eq(1)
+        stores = []
+        cycle  = 0
+        while len(stores) < 6:
+            count = (yield dut.count.status)
+            if count > len(stores):
+                stores.append((cycle, (yield from dut.bus.read(4*((count - 1) % 4)))))
+            cycle += 1
+            yield
+        for (cycle, timestamp), (_, previous) in zip(stores[1:], stores):
+            assert (timestamp - previous) % 2 == 0
+            assert timestamp <= cycle/100 - 2.56
+        print("samples (store us, timestamp us): {}".format([(c/100, t) for c, t in stores]))
+
+    run_simulation(dut, [fast_tb(dut), adxl362_model(pads)])
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import argparse
+
 from migen import *
 
 from litex.build.generic_platform import *
@@ -7,12 +9,18 @@ from litex.build.xilinx import XilinxPlatform
 
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
+from litex.soc.integration.soc import SoCRegion
 from litex.soc.cores.uart import UARTWishboneBridge
 from litex.soc.cores import dna, xadc
 from litex.soc.cores.spi import SPIMaster
 
 from ios import Led, RGBLed, Button, Switch
-from display import SevenSegmentDisplay
+from display import FramebufferDisplay
+from perfmon import PerfMon, csr_locs
+from gather import GatherEngine
+from waitevent import WaitEvent
+from adxl362 import ADXL362Stream
+from csrmap import export_csr_map
 
 # IOs ----------------------------------------------------------------------------------------------
 
@@ -96,6 +104,39 @@ class Platform(XilinxPlatform):
     def __init__(self):
         XilinxPlatform.__init__(self, "xc7a100t-csg324-1", _io, toolchain="vivado")
 
+# Analyzer probes ----------------------------------------------------------------------------------
+
+# Probe sets selectable with --analyzer-probes, each set is captured as a separate analyzer group
+# (selected at runtime with test/test_analyzer.py --group).
+analyzer_probe_sets = {
+    "display": lambda soc: [
+        soc.display.tick.ce,
+        soc.display.cs,
+        soc.display.abcdefg,
+        soc.display.dot,
+    ],
+    "rgbled": lambda soc: [
+        soc.rgbled.pads.r,
+        soc.rgbled.pads.g,
+        soc.rgbled.pads.b,
+    ],
+    "adxl362": lambda soc: [
+        soc.adxl362_stream.pads.cs_n,
+        soc.adxl362_stream.pads.clk,
+        soc.adxl362_stream.pads.mosi,
+        soc.adxl362_stream.pads.miso,
+        soc.adxl362.done,
+        soc.adxl362_stream.enable.storage,
+    ],
+    "bridge": lambda soc: [
+        soc.serial_bridge.wishbone.cyc,
+        soc.serial_bridge.wishbone.stb,
+        soc.serial_bridge.wishbone.we,
+        soc.serial_bridge.wishbone.ack,
+        soc.serial_bridge.wishbone.adr,
+    ],
+}
+
 # Design -------------------------------------------------------------------------------------------
 
 # Create our platform (fpga interface)
@@ -103,19 +144,24 @@ platform = Platform()
 
 # Create our soc (fpga description)
 class BaseSoC(SoCMini):
-    def __init__(self, platform, **kwargs):
+    def __init__(self, platform, bridge_baudrate=115200, analyzer_probes=[], analyzer_depth=512, **kwargs):
         sys_clk_freq = int(100e6)
 
         # SoCMini (No CPU, we are controlling the SoC over UART)
+        # (bus_timeout is raised above WaitEvent's timeout, but stays below the UART bridge's 100ms one)
         SoCMini.__init__(self, platform, sys_clk_freq, csr_data_width=32,
-            ident="My first LiteX System On Chip", ident_version=True)
+            ident="My first LiteX System On Chip", ident_version=True,
+            bus_timeout=int(60e-3*sys_clk_freq))
 
         # Clock Reset Generation
         self.submodules.crg = CRG(platform.request("clk100"), ~platform.request("cpu_reset"))
 
         # No CPU, use Serial to control Wishbone bus
-        self.submodules.serial_bridge = UARTWishboneBridge(platform.request("serial"), sys_clk_freq)
+        # (the FT2232 supports up to 3Mbaud, the baudrate is exported for the host, see server.py)
+        self.submodules.serial_bridge = UARTWishboneBridge(platform.request("serial"), sys_clk_freq,
+            baudrate=bridge_baudrate)
         self.bus.add_master(master=self.serial_bridge.wishbone)
+        self.add_constant("bridge_baudrate", bridge_baudrate)
 
         # FPGA identification
         self.submodules.dna = dna.DNA()
@@ -144,24 +190,113 @@ class BaseSoC(SoCMini):
         self.submodules.rgbled  = RGBLed(platform.request("user_rgb_led",  0))
         self.add_csr("rgbled")
 
+        # Accelerometer streaming (samples at 400Hz into a ring buffer, see client.adxl362_drain)
+        # (owns the SPI pads while enabled, the CSR SPIMaster below gets them back when disabled)
+        self.submodules.adxl362_stream = ADXL362Stream(platform.request("adxl362_spi"), sys_clk_freq,
+            spi_clk_freq = 1e6,
+            rate         = 400,
+            depth        = 512)
+        self.add_csr("adxl362_stream")
+        self.bus.add_slave("adxl362_stream", self.adxl362_stream.bus,
+            SoCRegion(origin=0x00040000, size=4*4*512, cached=False))
+        self.add_constant("adxl362_stream_depth", 512)
+
         # Accelerometer
-        self.submodules.adxl362 = SPIMaster(platform.request("adxl362_spi"),
+        self.submodules.adxl362 = SPIMaster(self.adxl362_stream.host_pads,
             data_width   = 32,
             sys_clk_freq = sys_clk_freq,
             spi_clk_freq = 1e6)
+        self.adxl362.add_clk_divider() # SPI clk = sys_clk_freq/adxl362_clk_divider (ADXL362: 8MHz max)
         self.add_csr("adxl362")
 
-        # SevenSegmentDisplay
-        self.submodules.display = SevenSegmentDisplay(sys_clk_freq)
+        # SevenSegmentDisplay (scanning a memory-mapped framebuffer, one word per digit)
+        self.submodules.display = FramebufferDisplay(sys_clk_freq, digits=8)
         self.add_csr("display")
+        self.bus.add_slave("framebuffer", self.display.bus, SoCRegion(origin=0x00010000, size=4*8, cached=False))
         self.comb += [
             platform.request("display_cs_n").eq(~self.display.cs),
-            platform.request("display_abcdefg").eq(~self.display.abcdefg)
+            platform.request("display_abcdefg").eq(~Cat(self.display.abcdefg, self.display.dot))
         ]
 
-soc = BaseSoC(platform)
+        # Performance counters (snoop the UART bridge, the only bus master)
+        self.submodules.perfmon = perfmon = PerfMon()
+        self.add_csr("perfmon")
+        bridge = self.serial_bridge
+        perfmon.add_event("bridge_rx_bytes", bridge.sink.valid & bridge.sink.ready)
+        perfmon.add_event("bridge_tx_bytes", bridge.source.valid & bridge.source.ready)
+        perfmon.add_event("bridge_commands", bridge.sink.valid & bridge.sink.ready & bridge.fsm.ongoing("RECEIVE-CMD"))
+        perfmon.add_wishbone("bridge", bridge.wishbone)
+        perfmon.add_wishbone("framebuffer", self.display.bus)
+        # (per-peripheral CSR hits: added in finalize, once all the CSR peripherals are known)
+
+        # Gather engine (snapshot of several registers read back in a single burst, see client.gather)
+        self.submodules.gather = GatherEngine(n_slots=8)
+        self.add_csr("gather")
+        gather_sources = {
+            "buttons_in":       self.buttons._in,
+            "switches_in":      self.switches._in,
+            "leds_out":         self.leds.out,
+            "xadc_temperature": self.xadc.temperature,
+            "xadc_vccint":      self.xadc.vccint,
+            "xadc_vccaux":      self.xadc.vccaux,
+            "xadc_vccbram":     self.xadc.vccbram,
+            "adxl362_miso":     self.adxl362._miso,
+            "display_front":    self.display.front,
+        }
+        for name, source in gather_sources.items():
+            self.add_constant("gather_source_" + name, self.gather.add_source(name, source))
+        self.add_constant("gather_slots", self.gather.n_slots)
+
+        # Wait event (a read of the waitevent region blocks until an event fires, see client.wait_event)
+        self.submodules.waitevent = waitevent = WaitEvent(sys_clk_freq, timeout=50e-3)
+        self.add_csr("waitevent")
+        self.bus.add_slave("waitevent", waitevent.bus, SoCRegion(origin=0x00020000, size=4, cached=False))
+        adxl362_done_d = Signal(reset=1) # (SPIMaster's done is 1 when idle: no event after reset)
+        buttons_d      = Signal(5)
+        self.sync += [
+            adxl362_done_d.eq(self.adxl362.done),
+            buttons_d.eq(self.buttons._in.status),
+        ]
+        waitevent_events = {
+            "adxl362_done":     waitevent.add_event("adxl362_done", self.adxl362.done & ~adxl362_done_d),
+            "buttons":          waitevent.add_event("buttons", self.buttons._in.status != buttons_d),
+            "xadc_temperature": waitevent.add_threshold("xadc_temperature", self.xadc.temperature.status),
+        }
+        for name, bit in waitevent_events.items():
+            self.add_constant("waitevent_" + name, bit)
+
+        # Analyzer (optional, captures are downloaded over the UART bridge by test/test_analyzer.py)
+        if analyzer_probes:
+            from litescope import LiteScopeAnalyzer
+            self.submodules.analyzer = LiteScopeAnalyzer(
+                groups       = {i: analyzer_probe_sets[name](self) for i, name in enumerate(analyzer_probes)},
+                depth        = analyzer_depth,
+                samplerate   = sys_clk_freq,
+                clock_domain = "sys",
+                csr_csv      = "test/analyzer.csv")
+            self.add_csr("analyzer")
+
+    def finalize(self):
+        if not self.finalized:
+            self.perfmon.add_csr_hits("csr", self.serial_bridge.wishbone, self.mem_map["csr"],
+                self.csr.paging, csr_locs(self))
+        SoCMini.finalize(self)
+
+parser = argparse.ArgumentParser(description="Lab003 SoC")
+parser.add_argument("--bridge-baudrate", default=115200, type=int,
+    help="UART bridge baudrate (ex: 1000000, 2000000, 3000000)")
+parser.add_argument("--analyzer-probes", default="",
+    help="Add an analyzer with these probe sets (comma separated: {})".format(",".join(analyzer_probe_sets)))
+parser.add_argument("--analyzer-depth",  default=512, type=int, help="Analyzer depth (samples)")
+args = parser.parse_args()
+
+soc = BaseSoC(platform,
+    bridge_baudrate = args.bridge_baudrate,
+    analyzer_probes = [name for name in args.analyzer_probes.split(",") if name],
+    analyzer_depth  = args.analyzer_depth)
 
 # Build --------------------------------------------------------------------------------------------
 
 builder = Builder(soc, output_dir="build", csr_csv="test/csr.csv")
 builder.build(build_name="top")
+export_csr_map(soc, "test/csr_map.py")
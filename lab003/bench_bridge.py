@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import time
+import argparse
+import statistics
+
+import client
+from server import bridge_baudrate
+
+# Goals:
+# - measure what the UART bridge baudrate (base.py --bridge-baudrate) gives to the host scripts
+# - compare the rates on a SimServer (modeled link) before building/flashing each of them
+
+# Benchmarks ---------------------------------------------------------------------------------------
+
+def bench(wb, n=200):
+    # Register/memory without side effects (addresses from the build's test/csr.csv or csr_map.py:
+    # they move with the SoC's content)
+    scratch     = wb.regs.ctrl_scratch.addr
+    framebuffer = wb.mems.framebuffer.base
+
+    r = {}
+
+    # Single read latency
+    times = []
+    for i in range(n):
+        start = time.perf_counter()
+        wb.read(scratch)
+        times.append(time.perf_counter() - start)
+    r["read latency (us)"] = 1e6*statistics.median(times)
+
+    # Burst read throughput (255 words, Etherbone max)
+    start = time.perf_counter()
+    for i in range(n//10):
+        wb.read(scratch, 255, burst="fixed")
+    r["burst read (KB/s)"] = (n//10)*255*4/(time.perf_counter() - start)/1e3
+
+    # Burst write throughput (8 words, litex_server's CommUART max), final read to wait for the writes
+    start = time.perf_counter()
+    for i in range(n):
+        wb.write(framebuffer, [0x100]*8)
+    wb.read(scratch)
+    r["burst write (KB/s)"] = n*8*4/(time.perf_counter() - start)/1e3
+
+    # CSR ops/s (write + read back)
+    start = time.perf_counter()
+    for i in range(n):
+        wb.write(scratch, i)
+        wb.read(scratch)
+    r["csr ops/s"] = 2*n/(time.perf_counter() - start)
+
+    return r
+
+def report(results):
+    names = list(next(iter(results.values())).keys())
+    print("{:>10s} | ".format("baudrate") + " | ".join("{:>18s}".format(name) for name in names))
+    for baudrate, r in results.items():
+        print("{:>10d} | ".format(baudrate) + " | ".join("{:18.1f}".format(r[name]) for name in names))
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="UART bridge latency/throughput benchmark")
+    parser.add_argument("--sim",       action="store_true", help="Run on SimServers modeling the link")
+    parser.add_argument("--baudrates", default="115200,1000000,2000000,3000000", help="SimServer baudrates")
+    parser.add_argument("--port",      default=None, type=int, help="litex_server port (hardware)")
+    parser.add_argument("-n",          default=200, type=int, help="Iterations")
+    args = parser.parse_args()
+
+    results = {}
+    if args.sim:
+        from simserver import SimServer
+        for baudrate in [int(b) for b in args.baudrates.split(",")]:
+            server = SimServer(port=0, baudrate=baudrate).start()
+            wb = client.connect(port=server.port)
+            results[baudrate] = bench(wb, args.n)
+            wb.close()
+    else:
+        wb = client.connect(port=args.port)
+        results[bridge_baudrate()] = bench(wb, args.n)
+        wb.close()
+    report(results)
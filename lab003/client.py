@@ -1,25 +1,244 @@
+import os
+import math
+import time
+import struct
 from contextlib import chdir, contextmanager
 
-from litex import RemoteClient
-
-def connect():
-    with chdir('test'):
-        wb = RemoteClient()
-        wb.open()
+def connect(host=None, port=None, record=None):
+    # litex_server address defaults to $LITEX_SERVER_HOST:$LITEX_SERVER_PORT, then localhost:1234
+    # (see multiboard.py to run a script on several boards).
+    # With record (or $LITEX_RECORD) set, all the transactions are recorded to this file (see replay.py).
+    host   = host or os.environ.get("LITEX_SERVER_HOST", "localhost")
+    port   = int(port or os.environ.get("LITEX_SERVER_PORT", 1234))
+    record = record or os.environ.get("LITEX_RECORD")
+    # Use the precompiled CSR map (test/csr_map.py, see fastclient.py) when the build generated it,
+    # LiteX's RemoteClient (test/csr.csv) otherwise. (test/ next to this file: works from any directory)
+    test = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test')
+    if os.path.exists(os.path.join(test, 'csr_map.py')):
+        from fastclient import FastClient
+        wb = FastClient(host=host, port=port, csr_map=os.path.join(test, 'csr_map.py'))
+    else:
+        from litex import RemoteClient
+        with chdir(test):
+            wb = RemoteClient(host=host, port=port)
+    wb.open()
+    if record is not None:
+        wb.socket = Recorder(wb.socket, record)
     return wb
 
 @contextmanager
-def connect_ctx():
-    wb = connect()
+def connect_ctx(host=None, port=None, record=None):
+    wb = connect(host, port, record)
     try:
         yield wb
     finally:
         wb.regs.leds_out.write(0)
-        for i in range(6):
-            display_write(wb, i, 0)
+        display_frame(wb, [DISPLAY_RAW]*8)
         wb.close()
 
+# Recording ----------------------------------------------------------------------------------------
+
+# Recording file: RECORD_MAGIC then one entry per transaction:
+# - header: timestamp (float64, seconds from the start, taken when the request is sent), kind
+#   (RECORD_WRITE/RECORD_READ), count.
+# - write: base address + <count> datas.
+# - read: <count> addresses + <count> datas (the results).
+RECORD_MAGIC  = b"LXRC\x01"
+RECORD_WRITE  = 0
+RECORD_READ   = 1
+_record_entry = struct.Struct(">dBB")
+
+class Recorder:
+    """Socket wrapper recording the Etherbone transactions of a client (FastClient or RemoteClient)"""
+    def __init__(self, socket, filename):
+        self.socket   = socket
+        self.file     = open(filename, "wb")
+        self.file.write(RECORD_MAGIC)
+        self.start    = time.perf_counter()
+        self.reads    = None
+        self.read_t   = None
+        self.response = bytearray()
+
+    def sendall(self, packet):
+        t = time.perf_counter() - self.start
+        self.socket.sendall(packet)
+        wcount, rcount = packet[10], packet[11]
+        words = struct.unpack_from(">{}I".format(len(packet)//4 - 3), packet, 12)
+        if wcount:
+            self.file.write(_record_entry.pack(t, RECORD_WRITE, wcount))
+            self.file.write(struct.pack(">{}I".format(wcount + 1), *words[:wcount + 1]))
+            words = words[wcount + 1:]
+        if rcount:
+            # (timestamped at the request, as the writes: the replay sends it at the same time)
+            self.reads    = words[1:]
+            self.read_t   = t
+            self.response = bytearray()
+
+    def recv(self, size):
+        chunk = self.socket.recv(size)
+        if self.reads is not None:
+            self.response += chunk
+            if len(self.response) == 16 + 4*len(self.reads):
+                n     = len(self.reads)
+                datas = struct.unpack_from(">{}I".format(n), self.response, 16)
+                self.file.write(_record_entry.pack(self.read_t, RECORD_READ, n))
+                self.file.write(struct.pack(">{}I".format(2*n), *self.reads, *datas))
+                self.reads = None
+        return chunk
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __getattr__(self, name):
+        return getattr(self.socket, name)
+
+def load_recording(filename):
+    """Return the recorded transactions: [(timestamp, kind, addresses, datas)]."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    assert data[:len(RECORD_MAGIC)] == RECORD_MAGIC
+    transactions = []
+    offset = len(RECORD_MAGIC)
+    while offset < len(data):
+        t, kind, n = _record_entry.unpack_from(data, offset)
+        offset += _record_entry.size
+        if kind == RECORD_WRITE:
+            words  = struct.unpack_from(">{}I".format(n + 1), data, offset)
+            offset += 4*(n + 1)
+            transactions.append((t, kind, [words[0] + 4*i for i in range(n)], list(words[1:])))
+        else:
+            words  = struct.unpack_from(">{}I".format(2*n), data, offset)
+            offset += 8*n
+            transactions.append((t, kind, list(words[:n]), list(words[n:])))
+    return transactions
+
+# Framebuffer word layout (see display.FramebufferDisplay)
+DISPLAY_DOT = 1 << 7
+DISPLAY_RAW = 1 << 8
+
 def display_write(wb, sel, value):
-    wb.regs.display_sel.write(sel)
-    wb.regs.display_value.write(value)
-    wb.regs.display_write.write(1)
+    wb.write(wb.mems.framebuffer.base + 4*sel, value)
+
+def display_frame(wb, values):
+    # Write all the digits in a single burst (digit 0 first)
+    wb.write(wb.mems.framebuffer.base, values)
+
+def display_scan_period(wb, period):
+    # Display scan period in seconds (reset value is set at build time)
+    # (at least 1 cycle: 0 would reload the tick counter with 0xffffffff and stop the scan)
+    sys_clk_freq = int(wb.constants.config_clock_frequency)
+    cycles       = int(period*sys_clk_freq)
+    if cycles < 1:
+        raise ValueError("Scan period too short ({}s, 1 cycle min)".format(period))
+    wb.regs.display_tick_period.write(cycles)
+
+def perfmon_snapshot(wb):
+    # Snapshot and clear the performance counters, return them as a dict (without perfmon_ prefix)
+    wb.regs.perfmon_snapshot.write(1)
+    return {name[len("perfmon_"):]: reg.read() for name, reg in wb.regs.d.items()
+        if name.startswith("perfmon_") and name != "perfmon_snapshot"}
+
+def gather(wb, names):
+    # Read several registers (sampled at the same cycle) in 2 transactions: selection + trigger
+    # burst write (the selection is uploaded on each call: the board may have been reset since the
+    # last one), then burst read.
+    n_slots = int(wb.constants.gather_slots)
+    if len(names) > n_slots:
+        raise ValueError("Too many registers to gather ({} max)".format(n_slots))
+    selects = [int(getattr(wb.constants, "gather_source_" + name)) for name in names]
+    wb.write(wb.regs.gather_select0.addr, selects + [0]*(n_slots - len(names)) + [1])
+    return dict(zip(names, wb.read(wb.regs.gather_slot0.addr, len(names))))
+
+def wait_event(wb, names):
+    # Block (on the FPGA side) until one of the events fires or the waitevent timeout expires.
+    # Return the names of the events that fired ([] on timeout).
+    mask = 0
+    for name in names:
+        mask |= 1 << int(getattr(wb.constants, "waitevent_" + name))
+    if getattr(wb, "waitevent_mask", None) != mask:
+        wb.regs.waitevent_mask.write(mask)
+        wb.waitevent_mask = mask
+    fired = wb.read(wb.mems.waitevent.base)
+    return [name for name in names if (fired >> int(getattr(wb.constants, "waitevent_" + name))) & 0b1]
+
+def wait_event_timeout(wb, timeout):
+    # Timeout in seconds (must stay below the SoC's bus timeout)
+    sys_clk_freq = int(wb.constants.config_clock_frequency)
+    wb.regs.waitevent_timeout.write(int(timeout*sys_clk_freq))
+
+def spi_clk_freq(wb, name, freq=None, max_freq=8e6):
+    # Set the SPI clk of a SPIMaster (adxl362, adxl362_stream_spi) to the highest frequency <= freq
+    # (and <= max_freq: ADXL362's limit), return the effective frequency (read back from the divider).
+    sys_clk_freq = int(wb.constants.config_clock_frequency)
+    divider      = getattr(wb.regs, name + "_clk_divider")
+    if freq is not None:
+        divider.write(max(4, math.ceil(sys_clk_freq/min(freq, max_freq))))
+    return sys_clk_freq/divider.read()
+
+def _s16(v):
+    return v - 0x10000 if v & 0x8000 else v
+
+def adxl362_drain(wb, count):
+    # Read the ADXL362Stream samples acquired since count (number of samples already read) in bursts
+    # of 63 samples (255 words max per read). Return (samples [(timestamp_us, x, y, z)], new count,
+    # lost samples); samples overwritten by the acquisition while reading are counted as lost.
+    depth   = int(wb.constants.adxl362_stream_depth)
+    base    = wb.mems.adxl362_stream.base
+    new     = wb.regs.adxl362_stream_count.read()
+    first   = max(count, new - depth)
+    samples = []
+    n = first
+    while n < new:
+        length = min(new - n, depth - n % depth, 63)
+        words  = wb.read(base + 16*(n % depth), 4*length)
+        for i in range(length):
+            timestamp, xy, z, number = words[4*i:4*i + 4]
+            if number == n + i:
+                samples.append((timestamp, _s16(xy & 0xffff), _s16(xy >> 16), _s16(z & 0xffff)))
+        n += length
+    return samples, new, (new - count) - len(samples)
+
+class Scheduler:
+    """Adaptive polling of host tasks
+
+    Each task is a poll function returning True when it saw some activity. Its interval goes back
+    to min_interval after activity and is multiplied by backoff on each idle poll, up to
+    max_interval. cost is the number of bridge transactions of a poll: polls are delayed so that
+    the total stays under budget transactions per second. Transactions a poll only does sometimes
+    (ex: a display update on a change) are charged with charge when they happen.
+    """
+    def __init__(self, budget=50):
+        self.budget = budget
+        self.tokens = budget
+        self.tasks  = []
+
+    def add(self, poll, min_interval, max_interval, backoff=1.5, cost=1):
+        # (the budget refills up to 1 second of transactions: a costlier poll would never run)
+        if cost > self.budget:
+            raise ValueError("Poll cost ({}) above the budget ({}/s)".format(cost, self.budget))
+        self.tasks.append({"poll": poll, "min": min_interval, "max": max_interval,
+            "backoff": backoff, "cost": cost, "interval": min_interval, "deadline": 0})
+
+    def charge(self, cost):
+        # Account for cost transactions done by the current poll (on top of its fixed cost)
+        self.tokens -= cost
+
+    def run(self):
+        last = time.monotonic()
+        while True:
+            task = min(self.tasks, key=lambda task: task["deadline"])
+            now  = time.monotonic()
+            # Refill the transactions budget (1 second of burst max)
+            self.tokens = min(self.budget, self.tokens + (now - last)*self.budget)
+            last        = now
+            start       = max(task["deadline"], now + max(0, task["cost"] - self.tokens)/self.budget)
+            if start > now:
+                time.sleep(start - now)
+                continue
+            self.tokens -= task["cost"]
+            if task["poll"]():
+                task["interval"] = task["min"]
+            else:
+                task["interval"] = min(task["max"], task["interval"]*task["backoff"])
+            task["deadline"] = time.monotonic() + task["interval"]
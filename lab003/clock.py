@@ -1,20 +1,16 @@
 from datetime import datetime, timedelta
-import time
 
 import client
 
 with client.connect_ctx() as wb:
 
-    def display_write(sel, value):
-        client.display_write(wb, sel, value)
-
     def display_time(hour, minute, second):
-        display_write(0, second%10)
-        display_write(1, (second//10)%10)
-        display_write(2, minute%10)
-        display_write(3, (minute//10)%10)
-        display_write(4, hour%10)
-        display_write(5, (hour//10)%10)
+        scheduler.charge(1)
+        client.display_frame(wb, [
+            second%10, (second//10)%10,
+            minute%10, (minute//10)%10,
+            hour%10,   (hour//10)%10,
+            client.DISPLAY_RAW, client.DISPLAY_RAW])
 
     center = 0
     down = 1
@@ -23,23 +19,27 @@ with client.connect_ctx() as wb:
     up = 4
 
     was_pressed = [False] * 5
-    all_released = False
 
     hms = (0, 0, 0)
     delta = timedelta()
-    while True:
+
+    def poll_time():
+        global hms
         t = datetime.now() + delta
         if (n := (t.hour, t.minute, t.second)) != hms:
             hms = n
             display_time(*hms)
+            return True
+        return False
 
+    def poll_buttons():
+        global was_pressed, delta
+        # (a single register: 1 read transaction, client.gather would take 2)
         buttons = wb.regs.buttons_in.read()
-        if buttons == 0 and all_released:
-            continue
         pressed = [((1 << i) & buttons) > 0 for i in range(5)]
         released = [was_pressed[i] and not pressed[i] for i in range(5)]
+        active = pressed != was_pressed
         was_pressed = pressed
-        all_released = not any(pressed)
 
         if released[up]:
             delta += timedelta(hours=1)
@@ -51,3 +51,14 @@ with client.connect_ctx() as wb:
             delta += timedelta(minutes=-1)
         if released[center]:
             delta = timedelta()
+        if any(released):
+            poll_time()
+        return active
+
+    # Time only costs a transaction when the second changes (charged by display_time), buttons are
+    # read every 20ms while they are used and every 100ms when idle (short enough to catch a
+    # press/release).
+    scheduler = client.Scheduler(budget=50)
+    scheduler.add(poll_time,    min_interval=0.02, max_interval=0.02, cost=0)
+    scheduler.add(poll_buttons, min_interval=0.02, max_interval=0.1)
+    scheduler.run()
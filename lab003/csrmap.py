@@ -0,0 +1,54 @@
+import json
+
+from litex.soc.interconnect.csr import CSRStorage
+from litex.soc.integration import export
+
+# Goals:
+# - resolve the CSR map once at build time instead of on every host script launch
+# - let the host scripts use it without importing LiteX (see fastclient.py)
+
+# CSR Map export -----------------------------------------------------------------------------------
+
+def get_csr_map(soc):
+    """Return the SoC's CSR map as Python source (regs, mems, bases and constants dictionaries)."""
+    d = json.loads(export.get_csr_json(
+        csr_regions = soc.csr.regions,
+        constants   = soc.constants,
+        mem_regions = soc.bus.regions))
+
+    # Widths / reset values are not part of csr.csv, get them from the CSRs.
+    csrs = {}
+    for name, region in soc.csr.regions.items():
+        if isinstance(region.obj, list):
+            for csr in region.obj:
+                csrs[name + "_" + csr.name] = csr
+
+    r = "# Generated by csrmap.py, do not edit.\n\n"
+    r += "csr_data_width = {}\n\n".format(soc.csr.data_width)
+    r += "# name: (address, words, bits, mode, reset)\n"
+    r += "regs = {\n"
+    for name, reg in d["csr_registers"].items():
+        csr   = csrs[name]
+        reset = csr.storage.reset.value if isinstance(csr, CSRStorage) else 0
+        r += "    {!r:40}: (0x{:08x}, {}, {:2d}, {!r}, 0x{:x}),\n".format(
+            name, reg["addr"], reg["size"], csr.size, reg["type"], reset)
+    r += "}\n\n"
+    r += "# name: (base, size)\n"
+    r += "mems = {\n"
+    for name, mem in d["memories"].items():
+        r += "    {!r:40}: (0x{:08x}, 0x{:x}),\n".format(name, mem["base"], mem["size"])
+    r += "}\n\n"
+    r += "# name: base\n"
+    r += "bases = {\n"
+    for name, base in d["csr_bases"].items():
+        r += "    {!r:40}: 0x{:08x},\n".format(name, base)
+    r += "}\n\n"
+    r += "constants = {\n"
+    for name, value in d["constants"].items():
+        r += "    {!r:40}: {!r},\n".format(name, value)
+    r += "}\n"
+    return r
+
+def export_csr_map(soc, filename):
+    with open(filename, "w") as f:
+        f.write(get_csr_map(soc))
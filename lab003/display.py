@@ -1,8 +1,9 @@
 from migen import *
 
-from tick import Tick
+from tick import Tick, CSRTick
 
 from litex.soc.interconnect.csr import *
+from litex.soc.interconnect import wishbone
 
 # _SevenSegment ------------------------------------------------------------------------------------
 
@@ -42,12 +43,12 @@ class _SevenSegment(Module):
 # _SevenSegmentDisplay -----------------------------------------------------------------------------
 
 class _SevenSegmentDisplay(Module):
-    def __init__(self, sys_clk_freq, cs_period=0.001):
+    def __init__(self, sys_clk_freq, cs_period=0.001, tick=None, digits=6, scan="onehot"):
         # Module's interface
-        self.values = Array(Signal(5) for i in range(6))  # input
+        self.values = Array(Signal(5) for i in range(digits))  # input
 
-        self.cs      = Signal(6) # output
-        self.abcdefg = Signal(7) # output
+        self.cs      = Signal(digits) # output
+        self.abcdefg = Signal(7)      # output
 
         # # #
 
@@ -56,50 +57,64 @@ class _SevenSegmentDisplay(Module):
         self.submodules += seven_segment
         self.comb += self.abcdefg.eq(seven_segment.abcdefg)
 
-        # Create a tick every cs_period
-        self.submodules.tick = Tick(sys_clk_freq, cs_period)
-
-        # Rotate cs 6 bits signals to alternate seven segments
-        # cycle 0 : 0b000001
-        # cycle 1 : 0b000010
-        # cycle 2 : 0b000100
-        # cycle 3 : 0b001000
-        # cycle 4 : 0b010000
-        # cycle 5 : 0b100000s
-        # cycle 6 : 0b000001
-        cs = Signal(6, reset=0b000001)
-        # synchronous assigment
-        self.sync += [
-            If(self.tick.ce,     # At the next tick:
-                cs[1].eq(cs[0]), # bit1 takes bit0 value
-                cs[2].eq(cs[1]), # bit2 takes bit1 value
-                cs[3].eq(cs[2]), # bit3 takes bit2 value
-                cs[4].eq(cs[3]), # bit4 takes bit3 value
-                cs[5].eq(cs[4]), # bit5 takes bit4 value
-                cs[0].eq(cs[5])  # bit0 takes bit5 value
-            )
-        ]
-        # Combinatorial assigment
-        self.comb += self.cs.eq(cs)
+        # Create a tick every cs_period (unless provided)
+        if tick is None:
+            tick = Tick(sys_clk_freq, cs_period)
+            self.submodules.tick = tick
 
-        # cs to value selection.
-        # Here we create a table to translate each of the 6 cs possible values
-        # to input value selection.
-        cases = {
-            0b000001 : seven_segment.value.eq(self.values[0]),
-            0b000010 : seven_segment.value.eq(self.values[1]),
-            0b000100 : seven_segment.value.eq(self.values[2]),
-            0b001000 : seven_segment.value.eq(self.values[3]),
-            0b010000 : seven_segment.value.eq(self.values[4]),
-            0b100000 : seven_segment.value.eq(self.values[5])
-        }
-        # Combinatorial assigment
-        self.comb += Case(self.cs, cases)
+        if scan == "onehot":
+            # Rotate cs <digits> bits signals to alternate seven segments
+            # cycle 0 : 0b000001
+            # cycle 1 : 0b000010
+            # cycle 2 : 0b000100
+            # cycle 3 : 0b001000
+            # cycle 4 : 0b010000
+            # cycle 5 : 0b100000
+            # cycle 6 : 0b000001
+            cs = Signal(digits, reset=0b000001)
+            # synchronous assigment
+            self.sync += [
+                If(tick.ce,             # At the next tick:
+                    cs[1:].eq(cs[:-1]), # bit n takes bit n-1 value
+                    cs[0].eq(cs[-1])    # bit0 takes last bit value
+                )
+            ]
+            # Combinatorial assigment
+            self.comb += self.cs.eq(cs)
+
+            # cs to value selection.
+            # Here we create a table to translate each of the <digits> cs possible values
+            # to input value selection.
+            cases = {1 << i : seven_segment.value.eq(self.values[i]) for i in range(digits)}
+            # Combinatorial assigment
+            self.comb += Case(self.cs, cases)
+
+        elif scan == "binary":
+            # Count the digit index in binary (log2(digits) bits) and decode it to cs.
+            index = Signal(max=digits)
+            # synchronous assigment
+            self.sync += [
+                If(tick.ce,
+                    If(index == (digits - 1),
+                        index.eq(0)
+                    ).Else(
+                        index.eq(index + 1)
+                    )
+                )
+            ]
+            # Combinatorial assigment
+            self.comb += Case(index, {i : self.cs.eq(1 << i) for i in range(digits)})
+
+            # index to value selection: directly index the values Array.
+            self.comb += seven_segment.value.eq(self.values[index])
+
+        else:
+            raise ValueError("Unsupported scan encoding: {}".format(scan))
 
 # SevenSegmentDisplay ------------------------------------------------------------------------------
 
 class SevenSegmentDisplay(Module, AutoCSR):
-    def __init__(self, sys_clk_freq):
+    def __init__(self, sys_clk_freq, cs_period=0.001, scan="onehot"):
         self.sel   = CSRStorage(4)
         self.value = CSRStorage(4)
         self.write = CSR()
@@ -109,8 +124,11 @@ class SevenSegmentDisplay(Module, AutoCSR):
 
         # # #
 
+        # Scan rate is runtime-programmable (display_tick_period/enable/count CSRs)
+        self.submodules.tick = CSRTick(sys_clk_freq, cs_period)
+
         # Create _SevenSegmentDisplay module
-        display = _SevenSegmentDisplay(sys_clk_freq)
+        display = _SevenSegmentDisplay(sys_clk_freq, tick=self.tick, scan=scan)
         self.submodules += display
         self.comb += [
             self.cs.eq(display.cs),
@@ -134,6 +152,106 @@ class SevenSegmentDisplay(Module, AutoCSR):
             )
         ]
 
+# FramebufferDisplay -------------------------------------------------------------------------------
+
+class FramebufferDisplay(Module, AutoCSR):
+    """Seven segment display scanning a memory-mapped framebuffer
+
+    The framebuffer is a Wishbone slave with one 32-bit word per digit (digit 0 at offset 0):
+    - bits 0-3: glyph code (0x0-0xf) when raw is 0.
+    - bits 0-6: abcdefg segments when raw is 1.
+    - bit 7   : dot.
+    - bit 8   : raw.
+
+    The framebuffer has two banks. When double_buffer is 0, the bus accesses the displayed (front)
+    bank and writes are visible immediately. When double_buffer is 1, the bus accesses the back bank
+    and a write to swap exchanges the banks at the end of the current scan (tear-free update).
+    """
+    def __init__(self, sys_clk_freq, cs_period=0.001, digits=8):
+        assert digits in [2, 4, 8, 16]
+        self.bus           = wishbone.Interface()
+        self.double_buffer = CSRStorage()
+        self.swap          = CSR()
+        self.front         = CSRStatus()
+        self.pending       = CSRStatus()
+
+        self.cs      = Signal(digits) # output
+        self.abcdefg = Signal(7)      # output
+        self.dot     = Signal()       # output
+
+        # # #
+
+        # Framebuffer: 2 banks of <digits> words (16-bit wide for byte writes: bits 0-7 and raw are
+        # written with sel[0] and sel[1], bits 9-15 are unused)
+        mem = Memory(16, 2*digits)
+        bus_port  = mem.get_port(write_capable=True, we_granularity=8)
+        scan_port = mem.get_port()
+        self.specials += mem, bus_port, scan_port
+
+        # Bank selection / swap (applied at the end of a scan)
+        front   = Signal()
+        pending = Signal()
+        bank    = Signal()
+        self.comb += [
+            bank.eq(front ^ self.double_buffer.storage),
+            self.front.status.eq(front),
+            self.pending.status.eq(pending),
+        ]
+
+        # Wishbone access to the framebuffer
+        self.comb += [
+            bus_port.adr.eq(Cat(self.bus.adr[:log2_int(digits)], bank)),
+            bus_port.dat_w.eq(self.bus.dat_w),
+            If(self.bus.cyc & self.bus.stb & self.bus.we & ~self.bus.ack,
+                bus_port.we.eq(self.bus.sel[:2])
+            ),
+            self.bus.dat_r.eq(bus_port.dat_r[:9]),
+        ]
+        self.sync += [
+            self.bus.ack.eq(0),
+            If(self.bus.cyc & self.bus.stb & ~self.bus.ack,
+                self.bus.ack.eq(1)
+            )
+        ]
+
+        # Scan rate is runtime-programmable (display_tick_period/enable/count CSRs)
+        self.submodules.tick = tick = CSRTick(sys_clk_freq, cs_period)
+
+        # Digit index
+        index = Signal(max=digits)
+        self.sync += [
+            If(tick.ce,
+                index.eq(index + 1),
+                If(index == (digits - 1),
+                    If(pending, front.eq(~front)),
+                    pending.eq(0)
+                )
+            ),
+            If(self.swap.re,
+                pending.eq(1)
+            )
+        ]
+
+        # Read the digit from the front bank (1 cycle latency) and align cs on it
+        index_d = Signal(max=digits)
+        self.comb += scan_port.adr.eq(Cat(index, front))
+        self.sync += index_d.eq(index)
+        self.comb += Case(index_d, {i : self.cs.eq(1 << i) for i in range(digits)})
+
+        # Raw segments or glyph
+        seven_segment = _SevenSegment()
+        self.submodules += seven_segment
+        word = scan_port.dat_r
+        self.comb += [
+            seven_segment.value.eq(word[0:4]),
+            If(word[8],
+                self.abcdefg.eq(word[0:7])
+            ).Else(
+                self.abcdefg.eq(seven_segment.abcdefg)
+            ),
+            self.dot.eq(word[7])
+        ]
+
 # Main ---------------------------------------------------------------------------------------------
 
 if __name__ == '__main__':
@@ -169,3 +287,69 @@ if __name__ == '__main__':
             yield
 
     run_simulation(dut, dut_tb(dut), vcd_name="display.vcd")
+
+    # Binary scan simulation: must drive the same cs/abcdefg as the one-hot scan
+    print("SevenSegmentDisplay binary scan simulation")
+    class DUT(Module):
+        def __init__(self):
+            self.submodules.onehot = _SevenSegmentDisplay(100e6, 0.000001, scan="onehot")
+            self.submodules.binary = _SevenSegmentDisplay(100e6, 0.000001, scan="binary")
+    dut = DUT()
+    def dut_tb(dut):
+        for i in range(4096):
+            for j in range(6):
+                yield dut.onehot.values[j].eq(i + j)
+                yield dut.binary.values[j].eq(i + j)
+            yield
+            assert (yield dut.onehot.cs)      == (yield dut.binary.cs)
+            assert (yield dut.onehot.abcdefg) == (yield dut.binary.abcdefg)
+
+    run_simulation(dut, dut_tb(dut), vcd_name="display_binary.vcd")
+
+    # FramebufferDisplay simulation
+    print("FramebufferDisplay simulation")
+    dut = FramebufferDisplay(100e6, 0.0000001)
+
+    def read_display(dut):
+        # Capture one full scan: digit -> (abcdefg, dot)
+        frame = {}
+        while len(frame) < 8:
+            cs = (yield dut.cs)
+            if cs:
+                frame[log2_int(cs)] = ((yield dut.abcdefg), (yield dut.dot))
+            yield
+        return [frame[i] for i in range(8)]
+
+    def dut_tb(dut):
+        glyphs = [0b0111111, 0b0000110, 0b1011011, 0b1001111, 0b1100110, 0b1101101, 0b1111101, 0b0000111]
+        # Single buffer: glyphs 0-7, dot on digit 0, raw segments on digit 7
+        for i in range(8):
+            yield from dut.bus.write(i, i | ((i == 0) << 7))
+        yield from dut.bus.write(7, (1 << 8) | 0b1000000)
+        frame = yield from read_display(dut)
+        assert frame == [(glyphs[i], int(i == 0)) for i in range(7)] + [(0b1000000, 0)]
+
+        # Byte writes: byte 0 keeps raw, byte 1 only updates raw
+        yield from dut.bus.write(7, 0b0000001, sel=0b0001)
+        assert (yield from dut.bus.read(7)) == (1 << 8) | 0b0000001
+        yield from dut.bus.write(7, 0, sel=0b0010)
+        assert (yield from dut.bus.read(7)) == 0b0000001
+        frame = yield from read_display(dut)
+        assert frame[7] == (glyphs[1], 0)
+
+        # Double buffer: writes go to the back bank and only show up after a swap
+        yield from dut.double_buffer.write(1)
+        yield
+        for i in range(8):
+            yield from dut.bus.write(i, 7 - i)
+        frame = yield from read_display(dut)
+        assert frame[0] == (glyphs[0], 1)
+        yield from dut.swap.write(1)
+        yield
+        while (yield dut.pending.status):
+            yield
+        yield
+        frame = yield from read_display(dut)
+        assert frame == [(glyphs[7 - i], 0) for i in range(8)]
+
+    run_simulation(dut, dut_tb(dut), vcd_name="framebuffer.vcd")
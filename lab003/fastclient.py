@@ -0,0 +1,130 @@
+import os
+import socket
+import struct
+import importlib.util
+
+# Goals:
+# - start host scripts fast: no LiteX import, no csr.csv parsing (uses test/csr_map.py from the build)
+# - keep the per-access overhead low: Etherbone packets of single-word accesses are precomputed
+
+# Etherbone ----------------------------------------------------------------------------------------
+
+# Packet header (magic, version 1, 32-bit addresses/data) + record header (byte enable 0xf)
+_packet_header = struct.pack(">HBB4x", 0x4e6f, 0x10, 0x44)
+
+def _record(wcount, rcount):
+    return _packet_header + struct.pack(">BBBB", 0, 0x0f, wcount, rcount)
+
+def encode_read(addrs):
+    return _record(0, len(addrs)) + struct.pack(">{}I".format(len(addrs) + 1), 0, *addrs)
+
+def encode_write(addr, datas):
+    return _record(len(datas), 0) + struct.pack(">{}I".format(len(datas) + 1), addr, *datas)
+
+# Register -----------------------------------------------------------------------------------------
+
+class Register:
+    """Register handle bound to a FastClient (same read/write API as LiteX's CSRRegister)"""
+    __slots__ = ["client", "name", "addr", "length", "bits", "mode", "reset", "_read"]
+
+    def __init__(self, client, name, addr, length, bits, mode, reset):
+        self.client = client
+        self.name   = name
+        self.addr   = addr
+        self.length = length
+        self.bits   = bits
+        self.mode   = mode
+        self.reset  = reset
+        self._read  = encode_read([addr + 4*i for i in range(length)])
+
+    def read(self):
+        datas = self.client.transfer(self._read, self.length)
+        if self.length == 1:
+            return datas[0]
+        value = 0
+        for data in datas:
+            value = (value << 32) | data
+        return value
+
+    def write(self, value):
+        if self.mode != "rw":
+            raise KeyError(self.name + " register not writable")
+        datas = [(value >> (32*(self.length - 1 - i))) & 0xffffffff for i in range(self.length)]
+        self.client.transfer(encode_write(self.addr, datas))
+
+# FastClient ---------------------------------------------------------------------------------------
+
+class _Elements:
+    def __init__(self, d):
+        self.__dict__.update(d)
+
+    @property
+    def d(self):
+        return self.__dict__
+
+class _Memory:
+    def __init__(self, base, size):
+        self.base = base
+        self.size = size
+
+class FastClient:
+    """Lightweight litex_server client (drop-in for RemoteClient's regs/mems/bases/constants/read/write)"""
+    def __init__(self, host="localhost", port=1234, csr_map=None):
+        # csr_map=False: raw read/write/transfer only (no regs/mems/bases/constants).
+        if csr_map is None:
+            csr_map = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test", "csr_map.py")
+        regs, mems, bases, constants = {}, {}, {}, {}
+        if csr_map:
+            spec = importlib.util.spec_from_file_location("csr_map", csr_map)
+            m    = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(m)
+            assert m.csr_data_width == 32
+            regs, mems, bases, constants = m.regs, m.mems, m.bases, m.constants
+        self.host      = host
+        self.port      = port
+        self.regs      = _Elements({name: Register(self, name, *reg) for name, reg in regs.items()})
+        self.mems      = _Elements({name: _Memory(*mem) for name, mem in mems.items()})
+        self.bases     = _Elements(bases)
+        self.constants = _Elements(constants)
+        self.socket    = None
+
+    def open(self):
+        if self.socket is not None:
+            return
+        self.socket = socket.create_connection((self.host, self.port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.settimeout(2.0)
+        self.socket.recv(128) # Server info
+
+    def close(self):
+        if self.socket is None:
+            return
+        self.socket.close()
+        self.socket = None
+
+    def transfer(self, packet, length=0):
+        # Send an Etherbone packet, return the <length> read datas.
+        self.socket.sendall(packet)
+        if length == 0:
+            return []
+        response = self._receive(12 + 4 + 4*length)
+        return struct.unpack_from(">{}I".format(length), response, 16)
+
+    def _receive(self, size):
+        response = bytearray()
+        while len(response) < size:
+            chunk = self.socket.recv(size - len(response))
+            if not chunk:
+                raise ConnectionError("litex_server closed the connection")
+            response += chunk
+        return response
+
+    def read(self, addr, length=None, burst="incr"):
+        n     = 1 if length is None else length
+        addrs = [addr + 4*i*(burst == "incr") for i in range(n)]
+        datas = self.transfer(encode_read(addrs), n)
+        return datas[0] if length is None else list(datas)
+
+    def write(self, addr, datas):
+        datas = datas if isinstance(datas, list) else [datas]
+        self.transfer(encode_write(addr, datas))
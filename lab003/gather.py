@@ -0,0 +1,81 @@
+from migen import *
+
+from litex.soc.interconnect.csr import *
+
+# Goals:
+# - poll several unrelated registers of the SoC in a single bridge transaction
+# - capture all of them at the same cycle (coherent snapshot)
+
+# GatherEngine -------------------------------------------------------------------------------------
+
+class GatherEngine(Module, AutoCSR):
+    """Snapshot a list of registers into contiguous slots
+
+    Registers are first added as sources with add_source (source n is exported to the host as the
+    gather_source_<name> constant = n). The host writes the source numbers to select0..selectN-1,
+    then each write to trigger copies the selected sources to slot0..slotN-1 at the same cycle.
+    trigger follows the selects so that a single burst can program the selection and trigger, the
+    slots are contiguous and can be read with a single burst.
+    """
+    def __init__(self, n_slots=8, n_sources=64):
+        self.n_slots   = n_slots
+        self.n_sources = n_sources
+        self.sources   = []
+
+        for n in range(n_slots):
+            setattr(self, "select{}".format(n), CSRStorage(bits_for(n_sources - 1), name="select{}".format(n)))
+        self.trigger = CSR()
+        for n in range(n_slots):
+            setattr(self, "slot{}".format(n),   CSRStatus(32, name="slot{}".format(n)))
+
+    def add_source(self, name, source):
+        """Add a source (a Signal or a CSRStatus/CSRStorage of up to 32 bits), return its number."""
+        if isinstance(source, CSRStatus):
+            source = source.status
+        elif isinstance(source, CSRStorage):
+            source = source.storage
+        assert len(source) <= 32
+        assert len(self.sources) < self.n_sources
+        self.sources.append((name, source))
+        return len(self.sources) - 1
+
+    def do_finalize(self):
+        sources = Array(source for name, source in self.sources)
+        for n in range(self.n_slots):
+            select = getattr(self, "select{}".format(n)).storage
+            slot   = getattr(self, "slot{}".format(n)).status
+            self.sync += If(self.trigger.re, slot.eq(sources[select]))
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    print("GatherEngine simulation")
+    class DUT(Module):
+        def __init__(self):
+            self.counter = Signal(32)
+            self.buttons = Signal(5)
+            self.sync += self.counter.eq(self.counter + 1)
+            self.submodules.gather = GatherEngine(n_slots=4)
+            self.gather.add_source("counter", self.counter)
+            self.gather.add_source("counter2", self.counter)
+            self.gather.add_source("buttons", self.buttons)
+
+    dut = DUT()
+    def dut_tb(dut):
+        yield dut.buttons.eq(0b10101)
+        yield from dut.gather.select0.write(0)
+        yield from dut.gather.select1.write(2)
+        yield from dut.gather.select2.write(1)
+        for i in range(4):
+            yield from dut.gather.trigger.write(1)
+            yield
+            slots = []
+            for n in range(3):
+                slots.append((yield getattr(dut.gather, "slot{}".format(n)).status))
+            print(slots)
+            assert slots[0] == slots[2] # same cycle
+            assert slots[1] == 0b10101
+            for j in range(10):
+                yield
+
+    run_simulation(dut, dut_tb(dut), vcd_name="gather.vcd")
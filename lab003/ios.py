@@ -11,10 +11,22 @@ class Led(gpio.GPIOOut):
     pass
 
 class RGBLed(Module, AutoCSR):
+    # r/g/b parameters are applied together on a write to commit, or (widths only) with a single
+    # write to color (0xRRGGBB, fraction of the periods).
+    # Each channel can also use a 16-bit sigma-delta modulator (mode=1) for fine brightness steps.
     def __init__(self, pads):
-        self.submodules.r = PWM(pads.r)
-        self.submodules.g = PWM(pads.g)
-        self.submodules.b = PWM(pads.b)
+        self.pads   = pads
+        self.commit = CSR()
+        self.color  = CSRStorage(24)
+        commit = self.commit.re | self.color.re
+        self.submodules.r = PWM(pads.r, commit=commit, sigma_delta_bits=16)
+        self.submodules.g = PWM(pads.g, commit=commit, sigma_delta_bits=16)
+        self.submodules.b = PWM(pads.b, commit=commit, sigma_delta_bits=16)
+        for i, pwm in enumerate([self.b, self.g, self.r]):
+            self.comb += [
+                pwm.color.eq(self.color.storage[8*i:8*(i + 1)]),
+                pwm.color_we.eq(self.color.re),
+            ]
 
 class Button(gpio.GPIOIn):
     pass
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import client
+from server import start_server
+
+# Goals:
+# - run the same test on several boards at once (test time scales with the slowest board, not N)
+# - aggregate results and per-board timings into one report
+
+# Endpoints ----------------------------------------------------------------------------------------
+
+def discover(ports, host="localhost", timeout=0.2):
+    """Return the ports where a litex_server (or SimServer) is listening."""
+    found = []
+    for port in ports:
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                found.append(port)
+        except OSError:
+            pass
+    return found
+
+def start_servers(serial_ports, base_port=1234, baudrate=None):
+    """Start one litex_server per serial port (at the build's bridge baudrate), return {port: process}."""
+    servers = {}
+    for n, serial_port in enumerate(serial_ports):
+        port = base_port + n
+        servers[port] = start_server(serial_port, port, baudrate,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return servers
+
+# Tasks --------------------------------------------------------------------------------------------
+
+def script_task(script, args=[], timeout=None):
+    """Task running a client.connect() based script (port passed with $LITEX_SERVER_PORT)."""
+    # Run from the script's directory, as the test/*.py scripts expect (sys.path, analyzer.csv).
+    script = os.path.abspath(script)
+    def task(port):
+        env = dict(os.environ, LITEX_SERVER_PORT=str(port))
+        p = subprocess.run([sys.executable, script] + args, env=env, timeout=timeout,
+            cwd=os.path.dirname(script), capture_output=True, text=True)
+        if p.returncode != 0:
+            raise RuntimeError(p.stderr.strip().splitlines()[-1] if p.stderr.strip() else
+                "exit code {}".format(p.returncode))
+        return p.stdout.strip()
+    return task
+
+def csr_task(sequence):
+    """Task running a CSR sequence: "reg" reads reg, "reg=value" writes it. Returns the reads."""
+    def task(port):
+        wb = client.connect(port=port)
+        try:
+            reads = {}
+            for op in sequence:
+                name, _, value = op.partition("=")
+                reg = getattr(wb.regs, name)
+                if value:
+                    reg.write(int(value, 0))
+                else:
+                    reads[name] = reg.read()
+            return reads
+        finally:
+            wb.close()
+    return task
+
+# Orchestration ------------------------------------------------------------------------------------
+
+def run(ports, task, workers=None):
+    """Run task(port) on all the boards concurrently, return {port: (ok, result, seconds)}."""
+    def timed(port):
+        start = time.perf_counter()
+        try:
+            result = (True, task(port))
+        except Exception as e:
+            result = (False, "{}: {}".format(e.__class__.__name__, e))
+        return result + (time.perf_counter() - start,)
+    with ThreadPoolExecutor(max_workers=workers or len(ports)) as pool:
+        return dict(zip(ports, pool.map(timed, ports)))
+
+def report(results, elapsed):
+    print("{:6s} | {:4s} | {:>8s} | result".format("port", "ok", "time"))
+    for port, (ok, result, seconds) in sorted(results.items()):
+        print("{:6d} | {:4s} | {:7.2f}s | {}".format(port, "PASS" if ok else "FAIL", seconds,
+            str(result).replace("\n", " / ")))
+    passed = sum(ok for ok, result, seconds in results.values())
+    serial = sum(seconds for ok, result, seconds in results.values())
+    print("{}/{} boards passed in {:.2f}s ({:.2f}s if run one after the other)".format(
+        passed, len(results), elapsed, serial))
+    return passed == len(results)
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a script or a CSR sequence on several boards")
+    parser.add_argument("--ports",   default="1234-1249", help="litex_server ports to scan (ex: 1234-1237)")
+    parser.add_argument("--serial",  default=None, help="Start a litex_server on each board's UART (ex: /dev/ttyUSB1,/dev/ttyUSB3)")
+    parser.add_argument("--sim",     default=0, type=int, help="Start N SimServers (no board)")
+    parser.add_argument("--workers", default=None, type=int, help="Max concurrent boards")
+    parser.add_argument("--script",  default=None, help="Script using client.connect() to run on each board")
+    parser.add_argument("--timeout", default=None, type=float, help="Script timeout (seconds)")
+    parser.add_argument("csr",       nargs="*", help="CSR sequence when no --script (ex: leds_out=0xff switches_in)")
+    args = parser.parse_args()
+
+    first, _, last = args.ports.partition("-")
+    ports   = range(int(first), int(last or first) + 1)
+    servers = {}
+    if args.serial:
+        # (explicit list: the FT2232's JTAG channels are /dev/ttyUSB* too, no bridge behind them)
+        servers = start_servers(args.serial.split(","), base_port=ports[0])
+        time.sleep(1)
+    if args.sim:
+        from simserver import SimServer
+        for n in range(args.sim):
+            SimServer(port=ports[0] + n).start()
+
+    try:
+        found = discover(ports)
+        if not found:
+            print("No board found on ports {}".format(args.ports))
+            sys.exit(1)
+        if args.script:
+            task = script_task(args.script, timeout=args.timeout)
+        else:
+            task = csr_task(args.csr or ["ctrl_scratch"])
+        start   = time.perf_counter()
+        results = run(found, task, args.workers)
+        sys.exit(0 if report(results, time.perf_counter() - start) else 1)
+    finally:
+        for server in servers.values():
+            server.terminate()
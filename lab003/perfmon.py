@@ -0,0 +1,139 @@
+from migen import *
+
+from litex.soc.interconnect.csr import *
+from litex.soc.interconnect import wishbone
+
+# Goals:
+# - measure how busy the SoC is (bus transactions, wait cycles, bridge bytes)
+# - get coherent measurements with a snapshot of all the counters at the same cycle
+
+# PerfMon ------------------------------------------------------------------------------------------
+
+class PerfMon(Module, AutoCSR):
+    """Performance counters
+
+    A free-running 64-bit cycle counter plus a set of 32-bit event counters added with add_event,
+    add_wishbone and add_csr_hits. A write to snapshot copies the cycle counter and all the event
+    counters to their CSRs at the same cycle and restarts the event counters from 0, so:
+    - events/interval is the event rate over the last measurement window (in sys_clk cycles).
+    - the CSRs can be read at any time, they only change on the next snapshot.
+    """
+    def __init__(self, counter_bits=32):
+        self.counter_bits = counter_bits
+
+        self.snapshot = CSR()
+        self.cycles   = CSRStatus(64) # cycle counter at the last snapshot
+        self.interval = CSRStatus(32) # cycles between the last two snapshots
+
+        # # #
+
+        cycles = Signal(64)
+        last   = Signal(64)
+        self.sync += [
+            cycles.eq(cycles + 1),
+            If(self.snapshot.re,
+                last.eq(cycles),
+                self.cycles.status.eq(cycles),
+                self.interval.status.eq(cycles - last),
+            )
+        ]
+
+    def add_event(self, name, event):
+        """Count the cycles where event is high (CSR <name>)."""
+        status  = CSRStatus(self.counter_bits, name=name)
+        counter = Signal(self.counter_bits, name=name + "_counter")
+        setattr(self, name, status)
+        self.sync += [
+            If(self.snapshot.re,
+                status.status.eq(counter),
+                counter.eq(event),
+            ).Elif(event & (counter != (2**self.counter_bits - 1)),
+                counter.eq(counter + 1),
+            )
+        ]
+
+    def add_wishbone(self, name, bus):
+        """Count the accesses (<name>_accesses) and wait cycles (<name>_waits) of a Wishbone bus."""
+        self.add_event(name + "_accesses", bus.cyc & bus.stb &  bus.ack)
+        self.add_event(name + "_waits",    bus.cyc & bus.stb & ~bus.ack)
+
+    def add_csr_hits(self, name, bus, csr_base, csr_paging, csr_locs):
+        """Count the CSR accesses of a Wishbone master per peripheral (<name>_<peripheral>).
+
+        bus is snooped before the interconnect (word addressing), csr_locs is the SoC's CSR
+        location dictionary (peripheral name -> location, see csr_locs).
+        """
+        page_words = csr_paging//4
+        access     = bus.cyc & bus.stb & bus.ack
+        for csr_name, loc in sorted(csr_locs.items(), key=lambda item: item[1]):
+            page = csr_base//4 + loc*page_words
+            self.add_event(name + "_" + csr_name,
+                access & (bus.adr[log2_int(page_words):] == page//page_words))
+
+def csr_locs(soc):
+    """Allocate the CSR locations of all the SoC's CSR peripherals, return them: {name: location}.
+
+    LiteX only allocates the peripherals not added with add_csr (ctrl, identifier, ...) when the
+    SoC collects its CSRs: call it from the SoC's finalize, before SoC.finalize, so that the
+    counters of add_csr_hits cover all the peripherals, whatever the order they were added in.
+    """
+    for name, obj in xdir(soc, True):
+        # (same names as the CSRBankArray: <name> for the CSRs, <name>_<memory> for the memories)
+        names = []
+        if hasattr(obj, "get_memories"):
+            for memory in obj.get_memories():
+                memory = memory[1] if isinstance(memory, tuple) else memory
+                names.append(name + "_" + memory.name_override)
+        if hasattr(obj, "get_csrs") and obj.get_csrs():
+            names.append(name)
+        for name in names:
+            if name not in soc.csr.locs:
+                soc.csr.add(name, use_loc_if_exists=True)
+    return dict(soc.csr.locs)
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    print("PerfMon simulation")
+    class DUT(Module):
+        def __init__(self):
+            self.bus = wishbone.Interface()
+            self.submodules.perfmon = PerfMon()
+            self.perfmon.add_wishbone("bus", self.bus)
+            self.perfmon.add_csr_hits("csr", self.bus, 0x0, 0x800, {"leds": 0, "display": 3})
+            # Slave acking after 2 wait cycles
+            wait = Signal(2)
+            self.sync += [
+                self.bus.ack.eq(0),
+                If(self.bus.cyc & self.bus.stb & ~self.bus.ack,
+                    wait.eq(wait + 1),
+                    If(wait == 2, wait.eq(0), self.bus.ack.eq(1))
+                )
+            ]
+
+    dut = DUT()
+    def dut_tb(dut):
+        def snapshot():
+            yield from dut.perfmon.snapshot.write(1)
+            yield
+            return {
+                "interval": (yield dut.perfmon.interval.status),
+                "accesses": (yield dut.perfmon.bus_accesses.status),
+                "waits":    (yield dut.perfmon.bus_waits.status),
+                "leds":     (yield dut.perfmon.csr_leds.status),
+                "display":  (yield dut.perfmon.csr_display.status),
+            }
+        yield from snapshot()
+        for adr in [0x0, 0x4, 0x3*0x200, 0x3*0x200 + 1, 0x3*0x200 + 2, 0x10000]:
+            yield from dut.bus.write(adr, 0)
+        counters = yield from snapshot()
+        print(counters)
+        assert counters["accesses"] == 6
+        assert counters["waits"]    == 6*3
+        assert counters["leds"]     == 2
+        assert counters["display"]  == 3
+        # Counters restart from 0 on snapshot
+        counters = yield from snapshot()
+        assert counters["accesses"] == 0
+
+    run_simulation(dut, dut_tb(dut), vcd_name="perfmon.vcd")
@@ -16,10 +16,12 @@ class _PWM(Module, AutoCSR):
         self.enable = enable = Signal()
         self.width  = width  = Signal(32)
         self.period = period = Signal(32)
+        self.end    = Signal() # Last cycle of the period (or disabled)
 
         # # #
 
         count = Signal(32)
+        self.comb += self.end.eq(~enable | (count >= period - 1))
 
         self.sync += [
             If(enable,
@@ -38,24 +40,244 @@ class _PWM(Module, AutoCSR):
             )
         ]
 
+# _SigmaDelta -------------------------------------------------------------------------------------
+
+# Sigma-delta modulation: the density of 1s follows value/2**bits, with the 1s spread as evenly as
+# possible (a PWM groups them in a single pulse per period). Once filtered (LED + eye, RC), the
+# ripple is much lower than a PWM of the same resolution, without a long period.
+# - order 1: a <bits> accumulator, out is its carry.
+# - order 2: two (saturated) integrators, noise pushed to higher frequencies.
+
+class _SigmaDelta(Module):
+    def __init__(self, out, bits=16, order=1):
+        assert order in [1, 2]
+        self.enable = enable = Signal()
+        self.value  = value  = Signal(bits + 1) # 0 to 2**bits
+
+        # # #
+
+        fs = 2**bits
+        if order == 1:
+            acc = Signal(bits)
+            s   = Signal(bits + 1)
+            self.comb += s.eq(acc + value)
+            self.sync += [
+                If(enable,
+                    acc.eq(s[:bits]),
+                    out.eq(s[bits])
+                ).Else(
+                    acc.eq(0),
+                    out.eq(0)
+                )
+            ]
+        else:
+            def saturate(v, limit):
+                return Mux(v < -limit, -limit, Mux(v > limit - 1, limit - 1, v))
+            i1 = Signal((bits + 2, True))
+            i2 = Signal((bits + 3, True))
+            i1_next = Signal((bits + 2, True))
+            i2_next = Signal((bits + 3, True))
+            fb = Signal(bits + 1)
+            self.comb += [
+                fb.eq(Mux(out, fs, 0)),
+                i1_next.eq(saturate(i1 + value - fb, 2*fs)),
+                i2_next.eq(saturate(i2 + i1_next - fb, 4*fs)),
+            ]
+            self.sync += [
+                If(enable,
+                    i1.eq(i1_next),
+                    i2.eq(i2_next),
+                    out.eq(i2_next >= 0)
+                ).Else(
+                    i1.eq(0),
+                    i2.eq(0),
+                    out.eq(0)
+                )
+            ]
+
 # PWM ----------------------------------------------------------------------------------------------
 
 class PWM(Module, AutoCSR):
-    def __init__(self, pwm):
+    """PWM with shadow registers
+
+    Writes to enable/width/period go to shadow registers, copied to the PWM at the end of its
+    current period: a period is always generated with a consistent set of parameters.
+    Without commit, the copy follows any write. With commit (a strobe, shared between PWMs), it
+    only follows a commit: parameters written with several writes are applied together, on all
+    the PWMs sharing the commit.
+
+    The width can also be set from color (0-255 fraction of the period, loaded on color_we).
+
+    With sigma_delta_bits, mode selects a sigma-delta modulator (of sigma_delta_order) instead of
+    the PWM: width is then the level out of 2**sigma_delta_bits and the period is only used by
+    color (set it to 2**sigma_delta_bits). Parameters are applied immediately in this mode.
+    """
+    def __init__(self, pwm, commit=None, sigma_delta_bits=0, sigma_delta_order=1):
         self.enable = CSRStorage()
         self.width  = CSRStorage(32)
         self.period = CSRStorage(32)
+        if sigma_delta_bits:
+            self.mode = CSRStorage() # 0: PWM, 1: Sigma-Delta
+
+        self.color    = Signal(8) # input
+        self.color_we = Signal()  # input
 
         # # #
 
-        _pwm = _PWM(pwm)
+        pwm_out = Signal()
+        _pwm = _PWM(pwm_out)
         self.submodules += _pwm
+        end = _pwm.end
+        if sigma_delta_bits:
+            sd_out = Signal()
+            _sd = _SigmaDelta(sd_out, sigma_delta_bits, sigma_delta_order)
+            self.submodules += _sd
+            self.comb += [
+                _sd.enable.eq(_pwm.enable & self.mode.storage),
+                _sd.value.eq(_pwm.width),
+                pwm.eq(Mux(self.mode.storage, sd_out, pwm_out)),
+            ]
+            end = end | self.mode.storage
+        else:
+            self.comb += pwm.eq(pwm_out)
+
+        # Shadow registers
+        enable = Signal()
+        width  = Signal(32)
+        period = Signal(32)
+        self.sync += [
+            If(self.enable.re, enable.eq(self.enable.storage)),
+            If(self.period.re, period.eq(self.period.storage)),
+            If(self.width.re,
+                width.eq(self.width.storage)
+            ).Elif(self.color_we,
+                # 255 -> period
+                width.eq((period*(self.color + self.color[7])) >> 8)
+            )
+        ]
+
+        # Copy to the PWM at the end of its period
+        if commit is None:
+            commit = self.enable.re | self.width.re | self.period.re | self.color_we
+        pending = Signal()
+        self.sync += [
+            If(pending & end,
+                _pwm.enable.eq(enable),
+                _pwm.width.eq(width),
+                _pwm.period.eq(period),
+                pending.eq(0)
+            ),
+            If(commit,
+                pending.eq(1)
+            )
+        ]
+
+# PWMBank ------------------------------------------------------------------------------------------
+
+class _PWMBank(Module):
+    """PWM channels sharing a period counter
+
+    Channel i is high while (count - phase_i) % period < duty_i (duty <= period, phase < period).
+    Channels are written one at a time (channel/phase/duty + we), the channel stores phase and
+    stop = phase + duty: 2 comparators per channel (+1 when the pulse wraps over the end of the
+    period), no counter.
+
+    With memory, the channels are stored in a distributed RAM scanned one channel per cycle: a
+    single set of comparators, but the counter advances once per scan (PWM period: period*n cycles).
+    """
+    def __init__(self, pwms, width=16, with_phase=True, memory=False):
+        n = len(pwms)
+        self.enable  = Signal(n)
+        self.period  = Signal(width)
+        self.channel = Signal(max=max(n, 2))
+        self.duty    = Signal(width)
+        self.phase   = Signal(width)
+        self.we      = Signal()
+
+        # # #
 
+        # Shared counter (and count + period, for the pulses wrapping over the end of the period)
+        tick  = Signal()
+        count = Signal(width)
+        count_period = Signal(width + 1)
+        self.comb += count_period.eq(count + self.period)
+        self.sync += [
+            If(tick,
+                If(count >= self.period - 1,
+                    count.eq(0)
+                ).Else(
+                    count.eq(count + 1)
+                )
+            )
+        ]
+
+        # Channel entry: phase (start) + stop
+        phase = self.phase if with_phase else 0
+        entry_layout = ([("start", width)] if with_phase else []) + [("stop", width + 1)]
+        entry_data = Cat(phase, phase + self.duty) if with_phase else self.duty
+        def active(entry):
+            if not with_phase:
+                return count < entry.stop
+            return ((count >= entry.start) & (count < entry.stop)) | (count_period < entry.stop)
+
+        out = Signal(n)
+        self.comb += pwms.eq(out)
+        if not memory:
+            self.comb += tick.eq(1)
+            for i in range(n):
+                entry = Record(entry_layout)
+                self.sync += [
+                    If(self.we & (self.channel == i),
+                        entry.raw_bits().eq(entry_data)
+                    ),
+                    out[i].eq(self.enable[i] & active(entry))
+                ]
+        else:
+            entry = Record(entry_layout)
+            mem   = Memory(len(entry), n)
+            write_port = mem.get_port(write_capable=True)
+            read_port  = mem.get_port(async_read=True)
+            self.specials += mem, write_port, read_port
+            index = Signal(max=max(n, 2))
+            self.comb += [
+                write_port.adr.eq(self.channel),
+                write_port.dat_w.eq(entry_data),
+                write_port.we.eq(self.we),
+                read_port.adr.eq(index),
+                entry.raw_bits().eq(read_port.dat_r),
+                tick.eq(index == (n - 1)),
+            ]
+            self.sync += [
+                If(index == (n - 1),
+                    index.eq(0)
+                ).Else(
+                    index.eq(index + 1)
+                ),
+                Case(index, {i: out[i].eq(self.enable[i] & active(entry)) for i in range(n)})
+            ]
+
+class PWMBank(Module, AutoCSR):
+    # Write channel and phase, then duty to update a channel (phase is kept between duty writes).
+    def __init__(self, pwms, width=16, with_phase=True, memory=False):
+        self.enable  = CSRStorage(len(pwms))
+        self.period  = CSRStorage(width)
+        self.channel = CSRStorage(bits_for(len(pwms) - 1))
+        self.duty    = CSRStorage(width)
+        if with_phase:
+            self.phase = CSRStorage(width)
+
+        # # #
+
+        self.submodules.bank = bank = _PWMBank(pwms, width, with_phase, memory)
         self.comb += [
-            _pwm.enable.eq(self.enable.storage),
-            _pwm.width.eq(self.width.storage),
-            _pwm.period.eq(self.period.storage)
+            bank.enable.eq(self.enable.storage),
+            bank.period.eq(self.period.storage),
+            bank.channel.eq(self.channel.storage),
+            bank.duty.eq(self.duty.storage),
+            bank.we.eq(self.duty.re),
         ]
+        if with_phase:
+            self.comb += bank.phase.eq(self.phase.storage)
 
 # Main ---------------------------------------------------------------------------------------------
 
@@ -71,3 +293,154 @@ if __name__ == '__main__':
             for i in range(1000):
                 yield
     run_simulation(dut, dut_tb(dut), vcd_name="pwm.vcd")
+
+    # PWM shadow registers simulation: 2 PWMs sharing a commit
+    class DUT(Module):
+        def __init__(self):
+            self.pwms   = Signal(2)
+            self.commit = Signal()
+            self.submodules.pwm0 = PWM(self.pwms[0], commit=self.commit)
+            self.submodules.pwm1 = PWM(self.pwms[1], commit=self.commit)
+    dut = DUT()
+
+    periods = [[], []]
+    @passive
+    def measure(dut):
+        # Record the (width, period) of each generated period
+        high, length, pwms_d = [0, 0], [0, 0], 0
+        while True:
+            pwms = (yield dut.pwms)
+            for i in range(2):
+                rising = (pwms >> i) & 0b1 and not (pwms_d >> i) & 0b1
+                if rising and length[i]:
+                    periods[i].append((high[i], length[i]))
+                    high[i], length[i] = 0, 0
+                high[i]   += (pwms >> i) & 0b1
+                length[i] += 1 if (length[i] or rising) else 0
+            pwms_d = pwms
+            yield
+
+    def commit(dut):
+        yield dut.commit.eq(1)
+        yield
+        yield dut.commit.eq(0)
+
+    def dut_tb(dut):
+        for pwm in [dut.pwm0, dut.pwm1]:
+            yield from pwm.period.write(100)
+            yield from pwm.width.write(25)
+            yield from pwm.enable.write(1)
+        yield from commit(dut)
+        for i in range(500):
+            yield
+        # Written over several periods: nothing changes before the commit
+        for pwm in [dut.pwm0, dut.pwm1]:
+            yield from pwm.period.write(50)
+            for i in range(120):
+                yield
+            yield from pwm.width.write(40)
+        n = [len(p) for p in periods]
+        yield from commit(dut)
+        for i in range(500):
+            yield
+        # Color (fraction of the period)
+        for color, width in [(0x80, 25), (0x00, 0), (0x40, 12)]:
+            for pwm in [dut.pwm0, dut.pwm1]:
+                yield pwm.color.eq(color)
+                yield pwm.color_we.eq(1)
+            yield
+            for pwm in [dut.pwm0, dut.pwm1]:
+                yield pwm.color_we.eq(0)
+            yield from commit(dut)
+            for i in range(300):
+                yield
+            if width:
+                assert periods[0][-1] == periods[1][-1] == (width, 50)
+        for i in range(2):
+            # Every period is generated with the old or the new parameters, never a mix
+            assert set(periods[i][:n[i]]) == {(25, 100)}
+            assert set(periods[i][n[i]:n[i] + 8]) <= {(25, 100), (40, 50)}
+            assert periods[i][n[i] + 8] == (40, 50)
+        print("PWM periods (width, period): {}".format(sorted(set(periods[0]))))
+
+    run_simulation(dut, [dut_tb(dut), measure(dut)])
+
+    # PWMBank simulation: duty/phase of each channel, with registers and with memory
+    channels = [(5, 0), (10, 5), (10, 15), (20, 3)] # (duty, phase), period 20 (channel 2 wraps)
+    for memory in [False, True]:
+        pwms = Signal(4)
+        dut  = _PWMBank(pwms, width=8, memory=memory)
+        def dut_tb(dut):
+            scale = 4 if memory else 1 # cycles per count
+            yield dut.period.eq(20)
+            for i, (duty, phase) in enumerate(channels):
+                yield dut.channel.eq(i)
+                yield dut.duty.eq(duty)
+                yield dut.phase.eq(phase)
+                yield dut.we.eq(1)
+                yield
+            yield dut.we.eq(0)
+            yield dut.enable.eq(0b1111)
+            for i in range(2*20*scale):
+                yield
+            samples = []
+            for i in range(8*20*scale):
+                samples.append((yield pwms))
+                yield
+            rises = {}
+            for i, (duty, phase) in enumerate(channels):
+                bits = [(v >> i) & 0b1 for v in samples]
+                assert sum(bits) == 8*duty*scale
+                rises[i] = [t for t in range(1, len(bits)) if bits[t] and not bits[t - 1]]
+            for i, (duty, phase) in enumerate(channels[:3]):
+                # Rising edges every period, at the phase offset
+                assert all(b - a == 20*scale for a, b in zip(rises[i], rises[i][1:]))
+                offset = (rises[i][0] - rises[0][0]) % (20*scale)
+                assert offset == (phase*scale + (i if memory else 0)) % (20*scale)
+            print("PWMBank (memory={}): OK".format(memory))
+        run_simulation(dut, dut_tb(dut))
+
+    # Sigma-Delta simulation: duty accuracy and ripple vs PWM at the same resolution (12-bit)
+    # (ripple: peak-to-peak after a RC low-pass filter with a time constant of 512 cycles)
+    class DUT(Module):
+        def __init__(self):
+            self.outs = Signal(3)
+            self.submodules.pwm = _PWM(self.outs[0])
+            self.submodules.sd1 = _SigmaDelta(self.outs[1], bits=12, order=1)
+            self.submodules.sd2 = _SigmaDelta(self.outs[2], bits=12, order=2)
+    names = ["PWM (4096 cycles period)", "Sigma-Delta (order 1)", "Sigma-Delta (order 2)"]
+
+    def dut_tb(dut, level):
+        yield dut.pwm.period.eq(4096)
+        yield dut.pwm.width.eq(level)
+        yield dut.sd1.value.eq(level)
+        yield dut.sd2.value.eq(level)
+        for m in [dut.pwm, dut.sd1, dut.sd2]:
+            yield m.enable.eq(1)
+        filtered = [0, 0, 0]
+        highs    = [0, 0, 0]
+        toggles  = [0, 0, 0]
+        ripple   = [[1, 0], [1, 0], [1, 0]]
+        outs_d   = 0
+        for i in range(2*4096):
+            outs = (yield dut.outs)
+            for n in range(3):
+                out = (outs >> n) & 0b1
+                filtered[n] += (out - filtered[n])/512
+                if i >= 4096: # Measure over a PWM period, after settling
+                    highs[n]  += out
+                    toggles[n] += out != ((outs_d >> n) & 0b1)
+                    ripple[n] = [min(ripple[n][0], filtered[n]), max(ripple[n][1], filtered[n])]
+            outs_d = outs
+            yield
+        print("level {:4d}/4096:".format(level))
+        for n in range(3):
+            print("  {:26s}: duty error {:+3d} LSB, ripple {:8.2f} LSB, {:4d} toggles".format(
+                names[n], highs[n] - level, (ripple[n][1] - ripple[n][0])*4096, toggles[n]))
+            assert abs(highs[n] - level) <= 1
+        if 64 <= level <= 4096 - 64:
+            assert max(ripple[1][1] - ripple[1][0], ripple[2][1] - ripple[2][0]) < (ripple[0][1] - ripple[0][0])/10
+
+    for level in [1, 100, 2048, 4000]:
+        dut = DUT()
+        run_simulation(dut, dut_tb(dut, level))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+
+from migen import *
+
+from litex.soc.interconnect import csr_bus
+from litex.soc.interconnect.csr_bus import CSRBank
+
+from litex.soc.interconnect.csr import AutoCSR, CSRStorage
+
+from pwm import _PWM, PWM, PWMBank
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from synthesis import synthesize, summarize
+
+# Goals:
+# - compare the resources of N independent _PWMs with a PWMBank sharing its counter
+# - synthesized for the Artix7 with Yosys (synth_xilinx, see common/synthesis.py): no Vivado build needed
+
+# Variants -----------------------------------------------------------------------------------------
+
+# Each variant is synthesized with its CSRs in a CSR bank (as in the SoC): the parameters storage
+# and the CSR decoding are part of the comparison. The _PWMs get plain CSRStorages for their
+# parameters (no shadow registers), as the PWMBank: the PWM row (shadow registers, commit and color
+# of the SoC's PWM) shows what these features add.
+
+class _CSRPWM(Module, AutoCSR):
+    def __init__(self, pwm):
+        self.enable = CSRStorage()
+        self.width  = CSRStorage(32)
+        self.period = CSRStorage(32)
+
+        # # #
+
+        self.submodules.pwm = _pwm = _PWM(pwm)
+        self.comb += [
+            _pwm.enable.eq(self.enable.storage),
+            _pwm.width.eq(self.width.storage),
+            _pwm.period.eq(self.period.storage),
+        ]
+
+def with_csr_bank(module, pwms):
+    top = Module()
+    top.submodules.dut  = module
+    top.submodules.bank = bank = CSRBank(module.get_csrs(), bus=csr_bus.Interface(data_width=32))
+    return top, {pwms, bank.bus.adr, bank.bus.re, bank.bus.we, bank.bus.dat_w, bank.bus.dat_r}
+
+def independent_pwms(n, cls):
+    m    = Module()
+    pwms = Signal(n)
+    for i in range(n):
+        setattr(m.submodules, "pwm{}".format(i), cls(pwms[i]))
+    m.get_csrs = lambda: [csr for i in range(n)
+        for csr in getattr(m, "pwm{}".format(i)).get_csrs()]
+    return with_csr_bank(m, pwms)
+
+def pwm_bank(n, **kwargs):
+    pwms = Signal(n)
+    return with_csr_bank(PWMBank(pwms, **kwargs), pwms)
+
+variants = {
+    "N x _PWM (32-bit)":          lambda n: independent_pwms(n, _CSRPWM),
+    "N x PWM (32-bit, shadowed)": lambda n: independent_pwms(n, PWM),
+    "PWMBank (32-bit)":           lambda n: pwm_bank(n, width=32),
+    "PWMBank (16-bit)":           lambda n: pwm_bank(n, width=16),
+    "PWMBank (16-bit, no phase)": lambda n: pwm_bank(n, width=16, with_phase=False),
+    "PWMBank (16-bit, memory)":   lambda n: pwm_bank(n, width=16, memory=True),
+}
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PWM/PWMBank resources comparison")
+    parser.add_argument("--channels",    default="3,16", help="Channel counts to compare")
+    parser.add_argument("--no-map-luts", action="store_true", help="Stop before LUT mapping (unmapped gates)")
+    args = parser.parse_args()
+
+    for n in [int(n) for n in args.channels.split(",")]:
+        results = {}
+        for name, variant in variants.items():
+            results[name] = summarize(synthesize(*variant(n), map_luts=not args.no_map_luts))
+        columns = list(dict.fromkeys(k for r in results.values() for k in r))
+        print("{} channels".format(n))
+        print("  {:28s} | ".format("") + " | ".join("{:>6s}".format(c) for c in columns))
+        for name, r in results.items():
+            print("  {:28s} | ".format(name) + " | ".join("{:6d}".format(r.get(c, 0)) for c in columns))
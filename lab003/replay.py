@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import argparse
+
+import client
+from fastclient import FastClient, encode_read
+
+# Goals:
+# - turn a host script run into a regression test: record its bridge traffic once (LITEX_RECORD=file
+#   or client.connect(record=file)), replay it later without the script and diff the reads
+# - replay as fast as possible (regression) or at the recorded timing (timing sensitive sequences)
+
+# Replay -------------------------------------------------------------------------------------------
+
+def replay(wb, transactions, timing=False):
+    """Re-issue the transactions on wb (FastClient), return the mismatches [(index, addr, expected, got)]."""
+    mismatches = []
+    start = time.perf_counter()
+    for n, (t, kind, addrs, datas) in enumerate(transactions):
+        if timing:
+            delay = t - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        if kind == client.RECORD_WRITE:
+            wb.write(addrs[0], datas)
+        else:
+            got = wb.transfer(encode_read(addrs), len(addrs))
+            for addr, expected, data in zip(addrs, datas, got):
+                if data != expected:
+                    mismatches.append((n, addr, expected, data))
+    return mismatches
+
+def addr_names(csr_map):
+    """Return {address: name} from a csr_map.py (registers words, memories bases)."""
+    if not os.path.exists(csr_map):
+        return {}
+    wb    = FastClient(csr_map=csr_map)
+    names = {}
+    for name, reg in wb.regs.d.items():
+        for i in range(reg.length):
+            names[reg.addr + 4*i] = name if reg.length == 1 else "{}[{}]".format(name, i)
+    for name, mem in wb.mems.d.items():
+        names.setdefault(mem.base, name)
+    return names
+
+def report(mismatches, names, limit=20):
+    for n, addr, expected, got in mismatches[:limit]:
+        print("#{:<6d} {:>24s} @ 0x{:08x}: expected 0x{:08x}, got 0x{:08x}".format(
+            n, names.get(addr, ""), addr, expected, got))
+    if len(mismatches) > limit:
+        print("... {} more".format(len(mismatches) - limit))
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded bridge traffic and diff the reads")
+    parser.add_argument("recording",                     help="Recording (LITEX_RECORD=<file> python3 <script>)")
+    parser.add_argument("--timing",  action="store_true", help="Replay at the recorded timing (default: as fast as possible)")
+    parser.add_argument("--port",    default=None, type=int, help="litex_server port")
+    parser.add_argument("--sim",     action="store_true", help="Replay on a SimServer (no board)")
+    parser.add_argument("--csr-map", default="test/csr_map.py", help="CSR map for the register names")
+    args = parser.parse_args()
+
+    transactions = client.load_recording(args.recording)
+    port = args.port or int(os.environ.get("LITEX_SERVER_PORT", 1234))
+    if args.sim:
+        from simserver import SimServer
+        port = SimServer(port=0).start().port
+    wb = FastClient(port=port, csr_map=False)
+    wb.open()
+    start = time.perf_counter()
+    mismatches = replay(wb, transactions, args.timing)
+    elapsed = time.perf_counter() - start
+    wb.close()
+
+    reads    = sum(len(addrs) for t, kind, addrs, datas in transactions if kind == client.RECORD_READ)
+    recorded = transactions[-1][0] if transactions else 0
+    report(mismatches, addr_names(args.csr_map))
+    print("{} transactions ({} reads, {} mismatches) replayed in {:.3f}s (recorded: {:.3f}s)".format(
+        len(transactions), reads, len(mismatches), elapsed, recorded))
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import os
+import argparse
+import subprocess
+
+# Start litex_server on the board's UART at the bridge baudrate of the current build, so that the
+# host always matches base.py --bridge-baudrate.
+
+def bridge_baudrate(csr_csv=os.path.join("test", "csr.csv")):
+    with open(csr_csv) as f:
+        for line in f:
+            fields = line.strip().split(",")
+            if fields[:2] == ["constant", "bridge_baudrate"]:
+                return int(fields[2])
+    return 115200 # Builds without the constant use UARTWishboneBridge's default
+
+def start_server(uart_port, bind_port=1234, baudrate=None, **kwargs):
+    """Start litex_server in the background, return its Popen."""
+    return subprocess.Popen(["litex_server",
+        "--uart", "--uart-port={}".format(uart_port),
+        "--uart-baudrate={}".format(baudrate or bridge_baudrate()),
+        "--bind-port={}".format(bind_port)], **kwargs)
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="litex_server at the build's bridge baudrate")
+    parser.add_argument("--uart-port", default="/dev/ttyUSB1", help="Board's serial port")
+    parser.add_argument("--bind-port", default=1234, type=int, help="TCP port")
+    parser.add_argument("--baudrate",  default=None, type=int, help="Override the build's baudrate")
+    args = parser.parse_args()
+    print("litex_server on {} at {} baud".format(args.uart_port, args.baudrate or bridge_baudrate()))
+    start_server(args.uart_port, args.bind_port, args.baudrate).wait()
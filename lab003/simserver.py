@@ -0,0 +1,98 @@
+import time
+import socket
+import struct
+import threading
+
+# Goals:
+# - run/benchmark host scripts without a board: stand-in for litex_server speaking Etherbone over TCP
+# - registers are modeled as a simple word memory (reads return the last written value, or 0)
+# - optionally model the UART bridge link time (litex_server's CommUART commands at <baudrate>)
+
+# SimServer ----------------------------------------------------------------------------------------
+
+def uart_bytes(write_count, read_addrs):
+    """Bytes exchanged on the UART bridge by litex_server for an Etherbone record."""
+    n = 0
+    # Writes: 1 command (cmd, length, address) per 8 words + the datas
+    while write_count:
+        size = min(write_count, 8)
+        n += 6 + 4*size
+        write_count -= size
+    # Reads: 1 command per burst of (up to 256) incrementing/fixed addresses + the datas
+    i = 0
+    while i < len(read_addrs):
+        j = i + 1
+        if j < len(read_addrs) and read_addrs[j] - read_addrs[i] in [0, 4]:
+            step = read_addrs[j] - read_addrs[i]
+            while j < len(read_addrs) and (j - i) < 256 and read_addrs[j] == read_addrs[j - 1] + step:
+                j += 1
+        n += 6 + 4*(j - i)
+        i = j
+    return n
+
+class SimServer:
+    def __init__(self, host="localhost", port=1234, baudrate=None):
+        self.mem      = {}
+        self.baudrate = baudrate
+        self.socket = socket.create_server((host, port))
+        self.host, self.port = self.socket.getsockname()[:2]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve(self):
+        while True:
+            client, addr = self.socket.accept()
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client.sendall(bytes("SimServer:{}:{}".format(self.host, self.port), "UTF-8"))
+            threading.Thread(target=self.serve_client, args=(client,), daemon=True).start()
+
+    def serve_client(self, client):
+        with client:
+            while True:
+                header = self._receive(client, 12)
+                if header is None:
+                    return
+                wcount, rcount = header[10], header[11]
+                size = (4*wcount + 4 if wcount else 0) + (4*rcount + 4 if rcount else 0)
+                body = struct.unpack(">{}I".format(size//4), self._receive(client, size))
+                if self.baudrate is not None:
+                    # 10 bits per byte (start + 8 data + stop)
+                    addrs = body[-rcount:] if rcount else []
+                    time.sleep(10*uart_bytes(wcount, addrs)/self.baudrate)
+                if wcount:
+                    base = body[0]
+                    for i, data in enumerate(body[1:wcount + 1]):
+                        self.mem[base + 4*i] = data
+                    body = body[wcount + 1:]
+                if rcount:
+                    datas = [self.mem.get(addr, 0) for addr in body[1:]]
+                    client.sendall(header[:8] + struct.pack(">BBBB", 0, 0x0f, rcount, 0) +
+                        struct.pack(">{}I".format(rcount + 1), body[0], *datas))
+
+    def _receive(self, client, size):
+        data = bytearray()
+        while len(data) < size:
+            try:
+                chunk = client.recv(size - len(data))
+            except ConnectionError:
+                return None
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Etherbone stand-in for litex_server (no board)")
+    parser.add_argument("--port",     default=1234, type=int, help="TCP port")
+    parser.add_argument("--baudrate", default=None, type=int, help="Model the UART bridge at this baudrate")
+    args = parser.parse_args()
+    server = SimServer(port=args.port, baudrate=args.baudrate)
+    print("SimServer listening on {}:{}{}".format(server.host, server.port,
+        "" if args.baudrate is None else " ({} baud)".format(args.baudrate)))
+    server.serve()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+sys.path.append("..")
+
+from simserver import SimServer
+
+# Compare LiteX's RemoteClient with fastclient.FastClient (csr_map.py) on:
+# - startup time: python launch + imports + CSR map loading + connection.
+# - per-call overhead: single register reads/writes.
+# Runs against a SimServer (no board) so that only the host side is measured. Needs csr.csv and
+# csr_map.py from a build.
+
+server = SimServer(port=0).start()
+
+startup = {
+    "python":       "pass",
+    "RemoteClient": "from litex import RemoteClient; wb = RemoteClient(port={}); wb.open(); wb.close()",
+    "FastClient":   "from fastclient import FastClient; wb = FastClient(port={}, csr_map='csr_map.py'); wb.open(); wb.close()",
+}
+
+print("Startup time (median of 10 launches)")
+env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.abspath(".."), os.environ.get("PYTHONPATH", "")]))
+for name, code in startup.items():
+    times = []
+    for i in range(10):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code.format(server.port)], check=True, env=env)
+        times.append(time.perf_counter() - start)
+    print("  {:12s}: {:6.1f}ms".format(name, 1e3*statistics.median(times)))
+
+from litex import RemoteClient
+from fastclient import FastClient
+
+print("Per-call time (median of 2000 calls)")
+for wb in [RemoteClient(port=server.port), FastClient(port=server.port, csr_map="csr_map.py")]:
+    wb.open()
+    for op, call in [("read",  lambda: wb.regs.leds_out.read()),
+                     ("write", lambda: wb.regs.leds_out.write(0x5a))]:
+        times = []
+        for i in range(2000):
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+        print("  {:12s} {:5s}: {:6.1f}us".format(wb.__class__.__name__, op, 1e6*statistics.median(times)))
+    wb.close()
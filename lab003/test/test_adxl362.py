@@ -1,37 +1,46 @@
 #!/usr/bin/env python3
 
+import sys
 import time
 
-from litex import RemoteClient
+sys.path.append("..")
+from client import connect, spi_clk_freq
 
-wb = RemoteClient()
-wb.open()
+wb = connect()
 
 # # #
 
 class ADXL362SPI:
-    def __init__(self, regs):
-        self.regs = regs
+    def __init__(self, wb):
+        self.wb   = wb
+        self.regs = wb.regs
+        # Wait for SPI done with a blocking read of the waitevent region (no polling)
+        self.regs.waitevent_mask.write(1 << int(wb.constants.waitevent_adxl362_done))
+
+    def wait_done(self):
+        if self.wb.read(self.wb.mems.waitevent.base) & (1 << 31):
+            raise TimeoutError("ADXL362 SPI transfer timeout")
 
     def write(self, addr, byte):
         val = (0b00001010 << 16) | ((addr & 0xff) << 8) | (byte & 0xff)
         self.regs.adxl362_length.write(24)
         self.regs.adxl362_mosi.write(val << (32-24))
         self.regs.adxl362_start.write(1)
-        while ((self.regs.adxl362_done.read() & 0x1) != 0):
-            pass
+        self.wait_done()
 
     def read(self, addr):
         val = (0b00001011 << 16) | ((addr & 0xff) << 8)
         self.regs.adxl362_length.write(24)
         self.regs.adxl362_mosi.write(val << (32-24))
         self.regs.adxl362_start.write(1)
-        while ((self.regs.adxl362_done.read() & 0x1) != 0):
-            pass
+        self.wait_done()
         return self.regs.adxl362_miso.read() & 0xff
 
 
-adxl362 = ADXL362SPI(wb.regs)
+# Run the SPI at the ADXL362's max (8MHz) instead of the 1MHz build default
+print("SPI clk: {:.3f}MHz".format(spi_clk_freq(wb, "adxl362", 8e6)/1e6))
+
+adxl362 = ADXL362SPI(wb)
 for i in range(64):
 	print("reg 0x{:02x}: 0x{:02x}".format(i, adxl362.read(i)))
 
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+
+sys.path.append("..")
+from client import connect, adxl362_drain
+
+wb = connect()
+
+# # #
+
+# Acquire for 5s at 400Hz: the FPGA reads the ADXL362, the host only drains the ring buffer.
+# (a drain every 0.5s reads ~200 samples = 3.2KB: use a bridge baudrate >= 1Mbaud, see base.py)
+print("Testing ADXL362 streaming...")
+wb.regs.adxl362_stream_enable.write(1)
+count   = 0
+samples = []
+lost    = 0
+start   = time.time()
+while time.time() - start < 5:
+    time.sleep(0.5)
+    new_samples, count, new_lost = adxl362_drain(wb, count)
+    samples += new_samples
+    lost    += new_lost
+    if new_samples:
+        timestamp, x, y, z = new_samples[-1]
+        print("{:10d}us: x={:5d} y={:5d} z={:5d} ({} samples)".format(timestamp, x, y, z, len(new_samples)))
+wb.regs.adxl362_stream_enable.write(0)
+
+seconds = (samples[-1][0] - samples[0][0])/1e6 if len(samples) > 1 else 0
+print("{} samples in {:.3f}s ({:.1f}Hz), {} lost".format(
+    len(samples), seconds, (len(samples) - 1)/seconds if seconds else 0, lost))
+
+# # #
+
+wb.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import sys
+import argparse
+
+sys.path.append("..")
+from client import connect
+from litescope import LiteScopeAnalyzerDriver
+
+# Build the SoC with an analyzer first, ex: ./base.py --analyzer-probes=display,adxl362
+
+parser = argparse.ArgumentParser(description="Capture analyzer probes to a VCD file")
+parser.add_argument("--group",       default=0,  type=int, help="Probe set (in --analyzer-probes order)")
+parser.add_argument("--rising",      default="",  help="Trigger on rising edge of a probe (ex: display_cs)")
+parser.add_argument("--falling",     default="",  help="Trigger on falling edge of a probe")
+parser.add_argument("--value",       default=[], action="append",
+                                     help="Trigger on probe value, ex: --value adxl362_spi_cs_n=0b0")
+parser.add_argument("--subsampling", default=1,  type=int, help="Capture one sample every N cycles")
+parser.add_argument("--offset",      default=32, type=int, help="Samples captured before the trigger")
+parser.add_argument("--length",      default=None, type=int, help="Samples captured (default: depth)")
+parser.add_argument("--dump",        default="analyzer.vcd", help="Output VCD file")
+args = parser.parse_args()
+
+wb = connect()
+
+# # #
+
+analyzer = LiteScopeAnalyzerDriver(wb.regs, "analyzer", debug=True)
+
+print("Probes:")
+for group, signals in analyzer.layouts.items():
+    print("{} {}: {}".format("*" if group == args.group else " ", group,
+        ", ".join(name for name, length in signals)))
+
+analyzer.configure_group(args.group)
+if args.rising:
+    analyzer.add_rising_edge_trigger(args.rising)
+if args.falling:
+    analyzer.add_falling_edge_trigger(args.falling)
+if args.value:
+    analyzer.add_trigger(cond=dict(value.split("=") for value in args.value))
+if not (args.rising or args.falling or args.value):
+    analyzer.add_trigger(cond={}) # Immediate trigger
+analyzer.configure_subsampler(args.subsampling)
+analyzer.run(offset=args.offset, length=args.length)
+analyzer.wait_done()
+analyzer.upload() # Burst reads over the UART bridge
+analyzer.save(args.dump)
+
+# # #
+
+wb.close()
@@ -1,21 +1,22 @@
 #!/usr/bin/env python3
 
+import sys
 import time
 import random
 
-from litex import RemoteClient
+sys.path.append("..")
+from client import connect, gather
 
-wb = RemoteClient()
-wb.open()
+wb = connect()
 
 # # #
 
 # test buttons
 print("Testing Buttons/Switches...")
 while True:
-    buttons = wb.regs.buttons_in.read()
-    switches = wb.regs.switches_in.read()
-    print("buttons: {:02x} / switches: {:02x}".format(buttons, switches))
+    # snapshot both registers and read them back in one burst
+    r = gather(wb, ["buttons_in", "switches_in"])
+    print("buttons: {:02x} / switches: {:02x}".format(r["buttons_in"], r["switches_in"]))
     time.sleep(0.5)
 
 # # #
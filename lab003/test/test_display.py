@@ -1,27 +1,25 @@
 #!/usr/bin/env python3
 
+import sys
 import time
 import datetime
 
-from litex import RemoteClient
+sys.path.append("..")
+from client import connect
 
-wb = RemoteClient()
-wb.open()
+wb = connect()
 
 # # #
 
-def display_write(sel, value):
-    wb.regs.display_sel.write(sel)
-    wb.regs.display_value.write(value)
-    wb.regs.display_write.write(1)
+DISPLAY_RAW = 1 << 8
 
 def display_time(hour, minute, second):
-    display_write(0, second%10)
-    display_write(1, (second//10)%10)
-    display_write(2, minute%10)
-    display_write(3, (minute//10)%10)
-    display_write(4, hour%10)
-    display_write(5, (hour//10)%10)
+    # One word per digit, written in a single burst to the framebuffer
+    wb.write(wb.mems.framebuffer.base, [
+        second%10, (second//10)%10,
+        minute%10, (minute//10)%10,
+        hour%10,   (hour//10)%10,
+        DISPLAY_RAW, DISPLAY_RAW])
 
 print("Testing SevenSegmentDisplay...")
 while True:
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
-from litex import RemoteClient
+import sys
 
-wb = RemoteClient()
-wb.open()
+sys.path.append("..")
+from client import connect
+
+wb = connect()
 
 # # #
 
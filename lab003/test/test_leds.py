@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 
+import sys
 import time
 import random
 
-from litex import RemoteClient
+sys.path.append("..")
+from client import connect
 
-wb = RemoteClient()
-wb.open()
+wb = connect()
 
 # # #
 
@@ -16,39 +17,51 @@ for i in range(64):
     wb.regs.leds_out.write(i)
     time.sleep(0.1)
 
-# Test rgb led pwm
+# Test rgb led pwm (parameters are applied on commit, at the end of the current period)
 print("Testing RGB Led (PWM)...")
 wb.regs.rgbled_r_period.write(64*1024)
 wb.regs.rgbled_r_enable.write(1)
+wb.regs.rgbled_commit.write(1)
 for i in range(4):
     for j in range(64):
         wb.regs.rgbled_r_width.write(j*1024)
+        wb.regs.rgbled_commit.write(1)
         time.sleep(0.01)
     for j in range(64):
         wb.regs.rgbled_r_width.write((64-j)*1024)
+        wb.regs.rgbled_commit.write(1)
         time.sleep(0.01)
 wb.regs.rgbled_r_enable.write(0)
+wb.regs.rgbled_commit.write(1)
 
-# Test rgb led random
+# Test rgb led sigma-delta (16-bit levels, no long period needed for the fine steps)
+print("Testing RGB Led (Sigma-Delta)...")
+wb.regs.rgbled_r_mode.write(1)
+wb.regs.rgbled_r_enable.write(1)
+for i in range(2):
+    for j in range(256):
+        wb.regs.rgbled_r_width.write(j*j)
+        wb.regs.rgbled_commit.write(1)
+        time.sleep(0.005)
+wb.regs.rgbled_r_enable.write(0)
+wb.regs.rgbled_commit.write(1)
+wb.regs.rgbled_r_mode.write(0)
+
+# Test rgb led random (one color write per change, r/g/b updated together)
 print("Testing RGB Led (Random)...")
 prng = random.Random(42)
 brightness = 10
-wb.regs.rgbled_r_enable.write(1)
-wb.regs.rgbled_g_enable.write(1)
-wb.regs.rgbled_b_enable.write(1)
-wb.regs.rgbled_r_period.write(1024*1024)
-wb.regs.rgbled_g_period.write(1024*1024)
-wb.regs.rgbled_b_period.write(1024*1024)
+for pwm in ["r", "g", "b"]:
+    getattr(wb.regs, "rgbled_" + pwm + "_period").write(1024*1024)
+    getattr(wb.regs, "rgbled_" + pwm + "_enable").write(1)
+wb.regs.rgbled_commit.write(1)
 for i in range(64):
-	wb.regs.rgbled_r_width.write(int(prng.randrange(1024)*1024*brightness/100))
-	wb.regs.rgbled_g_width.write(int(prng.randrange(1024)*1024*brightness/100))
-	wb.regs.rgbled_b_width.write(int(prng.randrange(1024)*1024*brightness/100))
+	r, g, b = [int(prng.randrange(256)*brightness/100) for n in range(3)]
+	wb.regs.rgbled_color.write((r << 16) | (g << 8) | b)
 	time.sleep(0.2)
-wb.regs.rgbled_r_enable.write(0)
-wb.regs.rgbled_g_enable.write(0)
-wb.regs.rgbled_b_enable.write(0)
-
-
+for pwm in ["r", "g", "b"]:
+    getattr(wb.regs, "rgbled_" + pwm + "_enable").write(0)
+wb.regs.rgbled_commit.write(1)
 
 # # #
 
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+
+sys.path.append("..")
+from client import connect, perfmon_snapshot
+
+wb = connect()
+
+# # #
+
+sys_clk_freq = int(wb.constants.config_clock_frequency)
+
+def show(title, counters):
+    seconds = counters["interval"]/sys_clk_freq
+    print("{} ({:.3f}s)".format(title, seconds))
+    for name, value in counters.items():
+        if name in ["cycles", "interval"] or value == 0:
+            continue
+        print("  {:28s}: {:10d} ({:10.1f}/s)".format(name, value, value/seconds))
+
+print("Testing PerfMon...")
+# (the snapshot itself is a CSR access, counted in the next one)
+perfmon_snapshot(wb)
+
+# Idle
+time.sleep(1)
+show("Idle", perfmon_snapshot(wb))
+
+# Single CSR writes
+for i in range(256):
+    wb.regs.leds_out.write(i)
+show("256 leds_out writes", perfmon_snapshot(wb))
+
+# Framebuffer burst
+for i in range(256):
+    wb.write(wb.mems.framebuffer.base, [i%16]*8)
+show("256 framebuffer bursts", perfmon_snapshot(wb))
+
+wb.regs.leds_out.write(0)
+
+# # #
+
+wb.close()
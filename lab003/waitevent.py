@@ -0,0 +1,138 @@
+from migen import *
+
+from litex.soc.interconnect.csr import *
+from litex.soc.interconnect import wishbone
+
+# Goals:
+# - avoid polling status registers from the host over the (slow) UART bridge
+# - understand how a Wishbone slave can delay its ack to block a master
+
+# WaitEvent ----------------------------------------------------------------------------------------
+
+class WaitEvent(Module, AutoCSR):
+    """Block a Wishbone read until an event fires
+
+    Events are added with add_event (event n is bit n) and add_threshold. They are latched in
+    pending as soon as they fire, even when nobody is waiting, so an event can't be missed between
+    starting an operation and waiting for it.
+
+    A read of the Wishbone word only acks when one of the events selected by mask is pending, or
+    after timeout cycles. It returns the pending events selected by mask (bit 31 is set on
+    timeout) and clears them. A write to the Wishbone word clears the pending events of its data.
+
+    Note: the timeout must stay below the bus timeout of the SoC and of the bridge.
+    """
+    def __init__(self, sys_clk_freq, timeout=10e-3):
+        self.bus     = wishbone.Interface()
+        self.mask    = CSRStorage(31)
+        self.timeout = CSRStorage(32, reset=int(timeout*sys_clk_freq))
+        self.pending = CSRStatus(31)
+
+        # # #
+
+        self.events = []
+
+    def add_event(self, name, event):
+        """Add an event (a strobe or a level, active high), return its bit."""
+        assert len(self.events) < 31
+        self.events.append((name, event))
+        return len(self.events) - 1
+
+    def add_threshold(self, name, value):
+        """Add an event firing while value >= <name>_threshold CSR, return its bit."""
+        threshold = CSRStorage(len(value), reset=2**len(value) - 1, name=name + "_threshold")
+        setattr(self, name + "_threshold", threshold)
+        return self.add_event(name, value >= threshold.storage)
+
+    def do_finalize(self):
+        events  = Cat(*[event for name, event in self.events])
+        pending = Signal(len(events))
+        fired   = Signal(len(events))
+        timer   = Signal(32)
+        timeout = Signal()
+        clear   = Signal(len(events))
+        read    = self.bus.cyc & self.bus.stb & ~self.bus.we
+        write   = self.bus.cyc & self.bus.stb &  self.bus.we
+        self.comb += [
+            fired.eq(pending & self.mask.storage),
+            timeout.eq(timer >= self.timeout.storage),
+            self.pending.status.eq(pending),
+            If(read & ~self.bus.ack & ((fired != 0) | timeout),
+                clear.eq(fired)
+            ).Elif(write & ~self.bus.ack,
+                clear.eq(self.bus.dat_w)
+            )
+        ]
+        self.sync += [
+            self.bus.ack.eq(0),
+            If(read & ~self.bus.ack,
+                timer.eq(timer + 1),
+                If((fired != 0) | timeout,
+                    self.bus.ack.eq(1),
+                    self.bus.dat_r.eq(Cat(fired, Replicate(0, 31 - len(fired)), timeout)),
+                    timer.eq(0),
+                )
+            ).Elif(write & ~self.bus.ack,
+                self.bus.ack.eq(1),
+            ).Else(
+                timer.eq(0),
+            ),
+            # Events firing while being cleared are kept.
+            pending.eq((pending & ~clear) | events),
+        ]
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    print("WaitEvent simulation")
+    class DUT(Module):
+        def __init__(self):
+            self.done   = Signal()
+            self.value  = Signal(12)
+            self.submodules.waitevent = WaitEvent(sys_clk_freq=1e6, timeout=100e-6)
+            self.waitevent.add_event("done", self.done)
+            self.waitevent.add_threshold("value", self.value)
+
+    dut = DUT()
+    def dut_tb(dut):
+        yield from dut.waitevent.mask.write(0b01)
+        yield from dut.waitevent.value_threshold.write(100)
+        # Event already pending before the read
+        yield dut.done.eq(1)
+        yield
+        yield dut.done.eq(0)
+        assert (yield from dut.waitevent.bus.read(0)) == 0b01
+        # Event firing during the read
+        t = 0
+        yield dut.waitevent.bus.cyc.eq(1)
+        yield dut.waitevent.bus.stb.eq(1)
+        yield dut.waitevent.bus.we.eq(0)
+        while True:
+            if t == 20:
+                yield dut.done.eq(1)
+            if t == 21:
+                yield dut.done.eq(0)
+            yield
+            t += 1
+            if (yield dut.waitevent.bus.ack):
+                break
+        data = (yield dut.waitevent.bus.dat_r)
+        yield dut.waitevent.bus.cyc.eq(0)
+        yield dut.waitevent.bus.stb.eq(0)
+        yield
+        print("done after {} cycles: 0x{:08x}".format(t, data))
+        assert data == 0b01 and 20 < t < 25
+        # Timeout (threshold not selected)
+        yield dut.value.eq(200)
+        assert (yield from dut.waitevent.bus.read(0)) == 1 << 31
+        print("pending: 0b{:02b}".format((yield dut.waitevent.pending.status)))
+        # Threshold
+        yield from dut.waitevent.mask.write(0b10)
+        assert (yield from dut.waitevent.bus.read(0)) == 0b10
+        # Clear with a write
+        yield dut.value.eq(0)
+        yield
+        yield from dut.waitevent.bus.write(0, 0b11)
+        assert (yield dut.waitevent.pending.status) == 0
+
+    run_simulation(dut, dut_tb(dut), vcd_name="waitevent.vcd")
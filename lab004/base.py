@@ -9,11 +9,13 @@ from litex.build.xilinx import XilinxPlatform
 
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
+from litex.soc.integration.soc import SoCRegion
 from litex.soc.cores import dna, xadc
 from litex.soc.cores.spi import SPIMaster
 
 from ios import Led, RGBLed, Button, Switch
-from display import SevenSegmentDisplay
+from display import FramebufferDisplay
+from perfmon import PerfMon, csr_locs
 
 # IOs ----------------------------------------------------------------------------------------------
 
@@ -153,16 +155,34 @@ class BaseSoC(SoCCore):
             data_width   = 32,
             sys_clk_freq = sys_clk_freq,
             spi_clk_freq = 1e6)
+        self.adxl362.add_clk_divider() # SPI clk = sys_clk_freq/adxl362_clk_divider (ADXL362: 8MHz max)
         self.add_csr("adxl362")
 
-        # SevenSegmentDisplay
-        self.submodules.display = SevenSegmentDisplay(sys_clk_freq)
+        # SevenSegmentDisplay (scanning a memory-mapped framebuffer, one word per digit)
+        self.submodules.display = FramebufferDisplay(sys_clk_freq, digits=8)
         self.add_csr("display")
+        self.bus.add_slave("framebuffer", self.display.bus, SoCRegion(size=4*8, cached=False))
         self.comb += [
             platform.request("display_cs_n").eq(~self.display.cs),
-            platform.request("display_abcdefg").eq(~self.display.abcdefg)
+            platform.request("display_abcdefg").eq(~Cat(self.display.abcdefg, self.display.dot))
         ]
 
+        # Performance counters (snoop the CPU buses and the UART)
+        self.submodules.perfmon = perfmon = PerfMon()
+        self.add_csr("perfmon")
+        perfmon.add_wishbone("cpu_ibus", self.cpu.ibus)
+        perfmon.add_wishbone("cpu_dbus", self.cpu.dbus)
+        perfmon.add_wishbone("framebuffer", self.display.bus)
+        perfmon.add_event("uart_rx_bytes", self.uart_phy.source.valid & self.uart_phy.source.ready)
+        perfmon.add_event("uart_tx_bytes", self.uart_phy.sink.valid & self.uart_phy.sink.ready)
+        # (per-peripheral CSR hits: added in finalize, once all the CSR peripherals are known)
+
+    def finalize(self):
+        if not self.finalized:
+            self.perfmon.add_csr_hits("csr", self.cpu.dbus, self.mem_map["csr"], self.csr.paging,
+                csr_locs(self))
+        SoCCore.finalize(self)
+
 soc = BaseSoC(platform)
 
 # Build --------------------------------------------------------------------------------------------
@@ -3,6 +3,8 @@
 #include <irq.h>
 #include <uart.h>
 
+#include "sched.h"
+
 void isr(void);
 
 #ifdef CONFIG_CPU_HAS_INTERRUPT
@@ -14,9 +16,14 @@ void isr(void)
 	irqs = irq_pending() & irq_getmask();
 
 #ifndef UART_POLLING
+	/* UART RX/TX ring buffers (serial.c) */
 	if(irqs & (1 << UART_INTERRUPT))
 		uart_isr();
 #endif
+
+	/* Scheduler tick (sched.c) */
+	if(irqs & (1 << TIMER0_INTERRUPT))
+		sched_isr();
 }
 
 #else
@@ -7,6 +7,19 @@
 #include <uart.h>
 #include <console.h>
 #include <generated/csr.h>
+#include <generated/soc.h>
+#include <generated/mem.h>
+
+#include "serial.h"
+#include "sched.h"
+#include "prof.h"
+#include "rpc.h"
+
+/* Scheduler tasks (see main) */
+static int console_task, display_task, buttons_task, led_task, ride_task, dump_task;
+
+/* Profiled sections (see main) */
+static int prof_console, prof_display, prof_led, prof_ride;
 
 static char *readstr(void)
 {
@@ -14,9 +27,12 @@ static char *readstr(void)
 	static char s[64];
 	static int ptr = 0;
 
-	if(readchar_nonblock()) {
+	while(readchar_nonblock()) {
 		c[0] = readchar();
 		c[1] = 0;
+		/* Binary RPC frames (rpc.c) are not for the text console */
+		if(rpc_feed(c[0]))
+			continue;
 		switch(c[0]) {
 			case 0x7f:
 			case 0x08:
@@ -72,10 +88,15 @@ static void help(void)
 	puts("Available commands:");
 	puts("help                            - this command");
 	puts("reboot                          - reboot CPU");
-	puts("display                         - display test");
+	puts("display                         - display test / uptime");
 	puts("led                             - led test");
 	puts("switches                        - switches test");
-	puts("ride                            - knight rider animation");
+	puts("ride                            - start/stop knight rider animation");
+	puts("scan <us>                       - set display scan period");
+	puts("perf                            - show performance counters since last perf");
+	puts("serial                          - show UART ring buffers/RPC stats since last serial");
+	puts("tasks                           - show tasks CPU usage since last tasks");
+	puts("prof [clear|dump]               - show/clear/dump (binary) the sections cycles");
 }
 
 static void reboot(void)
@@ -87,21 +108,46 @@ static void display_test(void)
 {
 	int i;
 	printf("display_test...\n");
-	for(i=0; i<6; i++) {
-		display_sel_write(i);
-		display_value_write(i);
-		display_write_write(1);
+	/* Stop the uptime display (display again to restart it) */
+	if(sched_enabled(display_task)) {
+		sched_enable(display_task, 0);
+		for(i=0; i<8; i++)
+			((volatile uint32_t *)FRAMEBUFFER_BASE)[i] = i;
+	} else
+		sched_enable(display_task, 1);
+}
+
+static void display_service(void)
+{
+	unsigned int seconds;
+	int i;
+
+	PROF_ENTER(prof_display);
+	/* Uptime in seconds (decimal) */
+	seconds = sched_ticks()/SCHED_TICK_HZ;
+	for(i=0; i<8; i++) {
+		((volatile uint32_t *)FRAMEBUFFER_BASE)[i] = seconds % 10;
+		seconds /= 10;
 	}
+	PROF_EXIT(prof_display);
 }
 
+static int led_step;
+
 static void led_test(void)
 {
-	int i;
 	printf("led_test...\n");
-	for(i=0; i<32; i++) {
-		leds_out_write(i);
-		busy_wait(1);
-	}
+	led_step = 0;
+	sched_enable(led_task, 1);
+}
+
+static void led_service(void)
+{
+	PROF_ENTER(prof_led);
+	leds_out_write(led_step);
+	if(++led_step == 32)
+		sched_enable(led_task, 0);
+	PROF_EXIT(prof_led);
 }
 
 static void switches_test(void)
@@ -109,32 +155,162 @@ static void switches_test(void)
 	leds_out_write(switches_in_read());
 }
 
+static int ride_position;
+static int ride_delta = 1;
+
 static void knight_rider(void)
 {
-	int i = 0;
-	int delta = 1;
+	/* Toggle the animation (ride again or center button to stop it) */
+	sched_enable(ride_task, !sched_enabled(ride_task));
+}
 
-	while (true) {
-		leds_out_write(1 << i);
-		i += delta;
-		if (i == 15 || i == 0) {
-			delta = -delta;
-		}
-		busy_wait(20);
-		if (readchar_nonblock()) {
-			getchar();
-			break;
+static void ride_service(void)
+{
+	PROF_ENTER(prof_ride);
+	leds_out_write(1 << ride_position);
+	ride_position += ride_delta;
+	if (ride_position == 15 || ride_position == 0) {
+		ride_delta = -ride_delta;
+	}
+	PROF_EXIT(prof_ride);
+}
+
+#define BUTTON_CENTER (1 << 0)
+#define BUTTON_DOWN   (1 << 1)
+#define BUTTON_UP     (1 << 4)
+
+static void buttons_service(void)
+{
+	static unsigned int previous;
+	static unsigned int ride_period = 20;
+	unsigned int buttons, pressed;
+
+	buttons  = buttons_in_read();
+	pressed  = buttons & ~previous;
+	previous = buttons;
+	if(pressed & BUTTON_CENTER)
+		knight_rider();
+	/* Knight rider speed */
+	if((pressed & BUTTON_UP) && ride_period > 5)
+		ride_period -= 5;
+	if((pressed & BUTTON_DOWN) && ride_period < 200)
+		ride_period += 5;
+	sched_set_period(ride_task, ride_period);
+}
+
+static void display_scan(char *period)
+{
+	unsigned long us;
+	char *c;
+
+	us = strtoul(period, &c, 0);
+	/* (at most 0xffffffff cycles: the tick period register is 32-bit) */
+	if((*period == 0) || (*c != 0) || (us == 0) || (us > 0xffffffffUL/(CONFIG_CLOCK_FREQUENCY/1000000))) {
+		printf("scan: invalid period (current: %lu cycles)\n", (unsigned long)display_tick_period_read());
+		return;
+	}
+	display_tick_period_write(us*(CONFIG_CLOCK_FREQUENCY/1000000));
+}
+
+static void perf(void)
+{
+	unsigned long interval;
+
+	/* Snapshot and clear the counters, the interval is the time since the previous perf */
+	perfmon_snapshot_write(1);
+	interval = perfmon_interval_read();
+	printf("interval     : %lu cycles (%lu us)\n", interval, interval/(CONFIG_CLOCK_FREQUENCY/1000000));
+	printf("ibus         : %lu accesses / %lu stall cycles\n",
+		(unsigned long)perfmon_cpu_ibus_accesses_read(), (unsigned long)perfmon_cpu_ibus_waits_read());
+	printf("dbus         : %lu accesses / %lu stall cycles\n",
+		(unsigned long)perfmon_cpu_dbus_accesses_read(), (unsigned long)perfmon_cpu_dbus_waits_read());
+	printf("framebuffer  : %lu accesses\n", (unsigned long)perfmon_framebuffer_accesses_read());
+	printf("uart         : %lu rx bytes / %lu tx bytes\n",
+		(unsigned long)perfmon_uart_rx_bytes_read(), (unsigned long)perfmon_uart_tx_bytes_read());
+	printf("csr leds     : %lu accesses\n", (unsigned long)perfmon_csr_leds_read());
+	printf("csr display  : %lu accesses\n", (unsigned long)perfmon_csr_display_read());
+}
+
+static void serial(void)
+{
+	struct serial_stats stats;
+	struct rpc_stats rpc;
+
+	serial_stats(&stats, 1);
+	rpc_stats(&rpc, 1);
+	printf("rx ring      : %u/%u bytes peak, %u overflows\n", stats.rx_peak, SERIAL_RX_SIZE - 1, stats.rx_overflows);
+	printf("tx ring      : %u/%u bytes peak, %u overflows\n", stats.tx_peak, SERIAL_TX_SIZE - 1, stats.tx_overflows);
+	printf("rpc          : %u frames, %u errors, %u timeouts, %u dropped replies\n", rpc.frames, rpc.errors,
+		rpc.timeouts, rpc.drops);
+}
+
+static void tasks(void)
+{
+	struct sched_task stats[SCHED_MAX_TASKS];
+	unsigned long long elapsed, busy;
+	int i, n;
+
+	n = sched_stats(stats, &elapsed, 1);
+	if(elapsed == 0)
+		elapsed = 1;
+	printf("task         | period |  runs  | late |    cpu | max cycles\n");
+	busy = 0;
+	for(i=0; i<n; i++) {
+		busy += stats[i].cycles;
+		printf("%-12s | %4ums | %6u | %4u | %5u%% | %u%s\n", stats[i].name, stats[i].period,
+			stats[i].runs, stats[i].late, (unsigned int)(100*stats[i].cycles/elapsed),
+			stats[i].max_cycles, stats[i].enabled ? "" : " (disabled)");
+	}
+	printf("%lu ms, scheduler/idle: %u%%\n", (unsigned long)(elapsed/(CONFIG_CLOCK_FREQUENCY/1000)),
+		(unsigned int)(100*(elapsed - busy)/elapsed));
+}
+
+static void prof(char *cmd)
+{
+	struct prof_stats stats[PROF_MAX_SECTIONS];
+	int i, n;
+
+	if(strcmp(cmd, "clear") == 0) {
+		prof_clear();
+		return;
+	}
+	/* Binary export for prof.py (sent by dump_service) */
+	if(strcmp(cmd, "dump") == 0) {
+		/* (no message when refused: it would end up in the dump in progress) */
+		if(prof_dump() == 0)
+			sched_enable(dump_task, 1);
+		return;
+	}
+	n = prof_stats(stats);
+	printf("section      |  count |        min |       mean |        max (cycles, %u overhead removed)\n",
+		prof_overhead());
+	for(i=0; i<n; i++) {
+		if(stats[i].count == 0) {
+			printf("%-12s |      0 |          - |          - |          -\n", stats[i].name);
+			continue;
 		}
+		printf("%-12s | %6u | %10u | %10u | %10u\n", stats[i].name, stats[i].count, stats[i].min,
+			(unsigned int)(stats[i].sum/stats[i].count), stats[i].max);
 	}
 }
 
+static void dump_service(void)
+{
+	if(prof_dump_service())
+		sched_enable(dump_task, 0);
+}
+
 static void console_service(void)
 {
 	char *str;
 	char *token;
 
+	/* No echo, command output or RPC reply during a prof dump: the input waits in the RX ring */
+	if(prof_dump_busy())
+		return;
 	str = readstr();
 	if(str == NULL) return;
+	PROF_ENTER(prof_console);
 	token = get_token(&str);
 	if(strcmp(token, "help") == 0)
 		help();
@@ -148,6 +324,17 @@ static void console_service(void)
 		switches_test();
 	else if (strcmp(token, "ride") == 0)
 		knight_rider();
+	else if (strcmp(token, "scan") == 0)
+		display_scan(get_token(&str));
+	else if (strcmp(token, "perf") == 0)
+		perf();
+	else if (strcmp(token, "serial") == 0)
+		serial();
+	else if (strcmp(token, "tasks") == 0)
+		tasks();
+	else if (strcmp(token, "prof") == 0)
+		prof(get_token(&str));
+	PROF_EXIT(prof_console);
 	prompt();
 }
 
@@ -158,14 +345,31 @@ int main(void)
 	irq_setie(1);
 #endif
 	uart_init();
+	sched_init();
+	prof_init();
 
 	puts("\nLab004 - CPU testing software built "__DATE__" "__TIME__"\n");
 	help();
 	prompt();
 
-	while(1) {
-		console_service();
-	}
+	/* Tasks: name, function, period (ms, 0: at each scheduler pass) */
+	console_task = sched_add("console", console_service, 0);
+	display_task = sched_add("display", display_service, 100);
+	buttons_task = sched_add("buttons", buttons_service, 10);
+	led_task     = sched_add("led",     led_service,     1);
+	ride_task    = sched_add("ride",    ride_service,    20);
+	dump_task    = sched_add("dump",    dump_service,    0);
+	sched_enable(led_task, 0);
+	sched_enable(ride_task, 0);
+	sched_enable(dump_task, 0);
+
+	/* Profiled sections (prof command) */
+	prof_console = prof_section("console");
+	prof_display = prof_section("display");
+	prof_led     = prof_section("led");
+	prof_ride    = prof_section("ride");
+
+	sched_run();
 
 	return 0;
 }
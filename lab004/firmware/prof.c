@@ -0,0 +1,206 @@
+#include <string.h>
+
+#include <generated/soc.h>
+
+#include "prof.h"
+#include "serial.h"
+
+/*
+ * Cycle profiling of code sections.
+ *
+ * Each section (registered with prof_section) keeps its count/min/max/sum of cycles, the last
+ * PROF_MAX_SAMPLES samples (all sections) are also kept in a ring for the binary dump. The cost
+ * of the cycle counter reads (measured at init) is subtracted from each sample.
+ *
+ * Binary dump (little endian, see prof.py for the host side):
+ * - "PROF", version (u8), clock frequency (u32), overhead (u32).
+ * - sections count (u8), per section: name length (u8), name, count (u32), min (u32),
+ *   max (u32), sum (u64).
+ * - samples count (u16), per sample (oldest first): section (u8), cycles (u32).
+ * - checksum (u16): sum of all the previous bytes.
+ * The dump is larger than the TX ring: prof_dump takes a snapshot in a buffer, then
+ * prof_dump_service (run as a scheduler task) sends it with non-blocking writes as the ring drains,
+ * so that the other tasks keep running during the transfer. Nothing else may be sent until the end
+ * of the transfer (it would end up in the binary stream): prof_dump refuses a new dump while one is
+ * in progress, and the console (main.c) leaves its input (commands, RPC frames) in the RX ring.
+ */
+
+#define PROF_VERSION 1
+
+struct prof_sample {
+	unsigned char section;
+	unsigned int cycles;
+};
+
+static struct prof_stats sections[PROF_MAX_SECTIONS];
+static int nsections;
+static struct prof_sample samples[PROF_MAX_SAMPLES];
+static unsigned int nsamples; /* total, samples[nsamples % PROF_MAX_SAMPLES] is the next one */
+static unsigned int overhead;
+
+void prof_init(void)
+{
+	unsigned int start, cycles;
+	int i;
+
+	nsections = 0;
+	prof_clear();
+
+	/* Cost of an empty PROF_ENTER/PROF_EXIT */
+	overhead = ~0;
+	for(i = 0; i < 16; i++) {
+		start  = prof_cycles();
+		cycles = prof_cycles() - start;
+		if(cycles < overhead)
+			overhead = cycles;
+	}
+}
+
+int prof_section(const char *name)
+{
+	if(nsections >= PROF_MAX_SECTIONS)
+		return -1;
+	memset(&sections[nsections], 0, sizeof(sections[nsections]));
+	sections[nsections].name = name;
+	sections[nsections].min  = ~0;
+	return nsections++;
+}
+
+void prof_record(int section, unsigned int cycles)
+{
+	struct prof_stats *s;
+
+	if(section < 0)
+		return;
+	cycles = (cycles > overhead) ? cycles - overhead : 0;
+	s = &sections[section];
+	s->count++;
+	s->sum += cycles;
+	if(cycles < s->min)
+		s->min = cycles;
+	if(cycles > s->max)
+		s->max = cycles;
+	samples[nsamples % PROF_MAX_SAMPLES].section = section;
+	samples[nsamples % PROF_MAX_SAMPLES].cycles  = cycles;
+	nsamples++;
+}
+
+int prof_stats(struct prof_stats *stats)
+{
+	memcpy(stats, sections, nsections*sizeof(*stats));
+	return nsections;
+}
+
+unsigned int prof_overhead(void)
+{
+	return overhead;
+}
+
+void prof_clear(void)
+{
+	int i;
+
+	for(i = 0; i < nsections; i++) {
+		sections[i].count = 0;
+		sections[i].min   = ~0;
+		sections[i].max   = 0;
+		sections[i].sum   = 0;
+	}
+	nsamples = 0;
+}
+
+/* Binary dump ------------------------------------------------------------------------------------*/
+
+#define PROF_NAME_MAX  16 /* longer names are truncated in the dump */
+#define PROF_DUMP_SIZE (13 + 1 + PROF_MAX_SECTIONS*(1 + PROF_NAME_MAX + 20) + 2 + PROF_MAX_SAMPLES*5 + 2)
+
+static unsigned char dump_buf[PROF_DUMP_SIZE];
+static int dump_len;
+static int dump_pos;
+
+static void dump_bytes(const void *data, int len)
+{
+	memcpy(&dump_buf[dump_len], data, len);
+	dump_len += len;
+}
+
+static void dump_u8(unsigned int v)
+{
+	unsigned char b = v;
+	dump_bytes(&b, 1);
+}
+
+static void dump_u16(unsigned int v)
+{
+	dump_u8(v);
+	dump_u8(v >> 8);
+}
+
+static void dump_u32(unsigned int v)
+{
+	dump_u16(v);
+	dump_u16(v >> 16);
+}
+
+/* Start a dump (sent by prof_dump_service), return -1 when a dump is in progress */
+int prof_dump(void)
+{
+	unsigned int first, n, i;
+	unsigned short checksum;
+	int len, j;
+
+	if(prof_dump_busy())
+		return -1;
+	dump_len = 0;
+	dump_pos = 0;
+	dump_bytes("PROF", 4);
+	dump_u8(PROF_VERSION);
+	dump_u32(CONFIG_CLOCK_FREQUENCY);
+	dump_u32(overhead);
+
+	dump_u8(nsections);
+	for(j = 0; j < nsections; j++) {
+		len = strlen(sections[j].name);
+		if(len > PROF_NAME_MAX)
+			len = PROF_NAME_MAX;
+		dump_u8(len);
+		dump_bytes(sections[j].name, len);
+		dump_u32(sections[j].count);
+		dump_u32(sections[j].min);
+		dump_u32(sections[j].max);
+		dump_u32(sections[j].sum);
+		dump_u32(sections[j].sum >> 32);
+	}
+
+	n     = (nsamples < PROF_MAX_SAMPLES) ? nsamples : PROF_MAX_SAMPLES;
+	first = nsamples - n;
+	dump_u16(n);
+	for(i = first; i < first + n; i++) {
+		dump_u8(samples[i % PROF_MAX_SAMPLES].section);
+		dump_u32(samples[i % PROF_MAX_SAMPLES].cycles);
+	}
+
+	checksum = 0;
+	for(j = 0; j < dump_len; j++)
+		checksum += dump_buf[j];
+	dump_u16(checksum);
+	return 0;
+}
+
+int prof_dump_busy(void)
+{
+	return dump_pos < dump_len;
+}
+
+/* Send the next bytes of the dump (what the TX ring takes, never waits), return 1 when done */
+int prof_dump_service(void)
+{
+	int n;
+
+	n = serial_tx_free();
+	if(n > dump_len - dump_pos)
+		n = dump_len - dump_pos;
+	while(n-- > 0)
+		serial_putc_nonblock(dump_buf[dump_pos++]);
+	return dump_pos == dump_len;
+}
@@ -0,0 +1,45 @@
+#ifndef __PROF_H
+#define __PROF_H
+
+/* Cycle profiling of code sections (see prof.c) */
+
+#include "sched.h"
+
+#define PROF_MAX_SECTIONS 16
+#define PROF_MAX_SAMPLES  256 /* last samples kept for the binary dump */
+
+/* Cycle counter: mcycle when the CPU has it (build with -DPROF_MCYCLE), timer0 otherwise */
+static inline unsigned int prof_cycles(void)
+{
+#ifdef PROF_MCYCLE
+	unsigned int cycles;
+	__asm__ volatile("csrr %0, mcycle" : "=r"(cycles));
+	return cycles;
+#else
+	return (unsigned int)sched_cycles();
+#endif
+}
+
+/* section: variable holding the id returned by prof_section */
+#define PROF_ENTER(section) unsigned int prof_start_##section = prof_cycles()
+#define PROF_EXIT(section)  prof_record(section, prof_cycles() - prof_start_##section)
+
+struct prof_stats {
+	const char *name;
+	unsigned int count;
+	unsigned int min;
+	unsigned int max;
+	unsigned long long sum;
+};
+
+void prof_init(void);
+int prof_section(const char *name);
+void prof_record(int section, unsigned int cycles);
+int prof_stats(struct prof_stats *stats);
+unsigned int prof_overhead(void);
+void prof_clear(void);
+int prof_dump(void);
+int prof_dump_busy(void);
+int prof_dump_service(void);
+
+#endif /* __PROF_H */
@@ -0,0 +1,230 @@
+#include <stdint.h>
+
+#include <generated/csr.h>
+#include <generated/mem.h>
+
+#include "rpc.h"
+#include "sched.h"
+#include "serial.h"
+
+/*
+ * Framed binary RPC on the console UART, next to the text console: readstr passes each received
+ * byte to rpc_feed, which takes the bytes of a frame (starting with RPC_SOF, never typed on the
+ * console) and handles it once complete.
+ *
+ * Frame (request and reply, little endian):
+ *   RPC_SOF (u8), opcode (u8), length (u16), payload (<length> bytes, RPC_MAX_PAYLOAD max),
+ *   crc (u16: CRC-16/CCITT-FALSE of opcode, length and payload).
+ *
+ * Requests:
+ * - RPC_PING:          any payload, echoed.
+ * - RPC_CSR_WRITE:     N x (address u32, value u32), empty reply.
+ * - RPC_CSR_READ:      N x address u32, reply: N x value u32.
+ * - RPC_SENSOR_READ:   ADXL362 register address (u8), count (u8), reply: <count> registers.
+ * - RPC_DISPLAY_FRAME: N x framebuffer word u32 (digit 0 first, N <= 8), empty reply.
+ * The reply opcode is opcode | RPC_REPLY, or RPC_ERROR with (opcode, error code) as payload.
+ * A frame not completed RPC_TIMEOUT ms after its previous byte is dropped. The payload and crc of a
+ * frame with a length above RPC_MAX_PAYLOAD are skipped (never passed to the text console).
+ * Replies never wait for the TX ring (a 518-byte reply into a busy ring would stall all the tasks):
+ * a reply that does not fit is dropped whole (counted in the stats), the host times out.
+ */
+
+#define ADXL362_READ 0x0b
+
+static unsigned char frame[3 + RPC_MAX_PAYLOAD + 2]; /* opcode, length, payload, crc */
+static unsigned char reply[RPC_MAX_PAYLOAD];
+static int active;
+static int pos;
+static int skip; /* bytes left of a frame too long to be received */
+static unsigned int last;
+static struct rpc_stats stats;
+
+unsigned short rpc_crc16(const unsigned char *data, int len, unsigned short crc)
+{
+	int i;
+
+	while(len--) {
+		crc ^= *data++ << 8;
+		for(i = 0; i < 8; i++)
+			crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+	}
+	return crc;
+}
+
+static uint32_t get_u32(const unsigned char *p)
+{
+	return p[0] | (p[1] << 8) | (p[2] << 16) | ((uint32_t)p[3] << 24);
+}
+
+static void put_u32(unsigned char *p, uint32_t v)
+{
+	p[0] = v;
+	p[1] = v >> 8;
+	p[2] = v >> 16;
+	p[3] = v >> 24;
+}
+
+static void send(unsigned char opcode, const unsigned char *payload, int len)
+{
+	unsigned char header[3];
+	unsigned short crc;
+	int i;
+
+	header[0] = opcode;
+	header[1] = len;
+	header[2] = len >> 8;
+	crc = rpc_crc16(header, 3, 0xffff);
+	crc = rpc_crc16(payload, len, crc);
+	if(serial_tx_free() < 1 + 3 + len + 2) {
+		stats.drops++;
+		return;
+	}
+	serial_putc_nonblock(RPC_SOF);
+	for(i = 0; i < 3; i++)
+		serial_putc_nonblock(header[i]);
+	for(i = 0; i < len; i++)
+		serial_putc_nonblock(payload[i]);
+	serial_putc_nonblock(crc);
+	serial_putc_nonblock(crc >> 8);
+}
+
+static void send_error(unsigned char opcode, unsigned char code)
+{
+	unsigned char payload[2];
+
+	payload[0] = opcode;
+	payload[1] = code;
+	stats.errors++;
+	send(RPC_ERROR, payload, 2);
+}
+
+/* ADXL362 burst read: up to 2 registers per 32-bit SPI transfer */
+static void sensor_read(unsigned char addr, int count, unsigned char *data)
+{
+	int i, n;
+	uint32_t miso;
+
+	for(i = 0; i < count; i += n) {
+		n = (count - i > 2) ? 2 : count - i;
+		adxl362_mosi_write((ADXL362_READ << 24) | ((addr + i) << 16));
+		adxl362_control_write(((16 + 8*n) << CSR_ADXL362_CONTROL_LENGTH_OFFSET) |
+			(1 << CSR_ADXL362_CONTROL_START_OFFSET));
+		while(!(adxl362_status_read() & (1 << CSR_ADXL362_STATUS_DONE_OFFSET)));
+		miso = adxl362_miso_read();
+		/* Data bytes are the last ones shifted in */
+		if(n == 2) {
+			data[i + 0] = miso >> 8;
+			data[i + 1] = miso;
+		} else
+			data[i] = miso;
+	}
+}
+
+static void handle(unsigned char opcode, unsigned char *payload, int len)
+{
+	int i;
+
+	switch(opcode) {
+		case RPC_PING:
+			send(opcode | RPC_REPLY, payload, len);
+			break;
+		case RPC_CSR_WRITE:
+			if(len % 8) {
+				send_error(opcode, RPC_ERROR_LENGTH);
+				break;
+			}
+			for(i = 0; i < len; i += 8)
+				csr_write_simple(get_u32(&payload[i + 4]), get_u32(&payload[i]));
+			send(opcode | RPC_REPLY, reply, 0);
+			break;
+		case RPC_CSR_READ:
+			if(len % 4) {
+				send_error(opcode, RPC_ERROR_LENGTH);
+				break;
+			}
+			for(i = 0; i < len; i += 4)
+				put_u32(&reply[i], csr_read_simple(get_u32(&payload[i])));
+			send(opcode | RPC_REPLY, reply, len);
+			break;
+		case RPC_SENSOR_READ:
+			if((len != 2) || (payload[1] > 64)) {
+				send_error(opcode, RPC_ERROR_LENGTH);
+				break;
+			}
+			sensor_read(payload[0], payload[1], reply);
+			send(opcode | RPC_REPLY, reply, payload[1]);
+			break;
+		case RPC_DISPLAY_FRAME:
+			if((len % 4) || (len > 4*8)) {
+				send_error(opcode, RPC_ERROR_LENGTH);
+				break;
+			}
+			for(i = 0; i < len; i += 4)
+				((volatile uint32_t *)FRAMEBUFFER_BASE)[i/4] = get_u32(&payload[i]);
+			send(opcode | RPC_REPLY, reply, 0);
+			break;
+		default:
+			send_error(opcode, RPC_ERROR_OPCODE);
+			break;
+	}
+}
+
+/* Return 1 when c is part of a frame (not for the text console) */
+int rpc_feed(unsigned char c)
+{
+	unsigned int now;
+	int len;
+
+	now = sched_ticks();
+	if(active && (now - last) > RPC_TIMEOUT) {
+		active = 0;
+		stats.timeouts++;
+	}
+	last = now;
+
+	if(!active) {
+		if(c != RPC_SOF)
+			return 0;
+		active = 1;
+		pos    = 0;
+		skip   = 0;
+		return 1;
+	}
+
+	if(skip) {
+		if(--skip == 0)
+			active = 0;
+		return 1;
+	}
+
+	frame[pos++] = c;
+	if(pos < 3)
+		return 1;
+	len = frame[1] | (frame[2] << 8);
+	if(len > RPC_MAX_PAYLOAD) {
+		/* Skip the rest of the frame (payload, crc) */
+		skip = len + 2;
+		send_error(frame[0], RPC_ERROR_LENGTH);
+		return 1;
+	}
+	if(pos == 3 + len + 2) {
+		active = 0;
+		stats.frames++;
+		if(rpc_crc16(frame, 3 + len, 0xffff) != (frame[3 + len] | (frame[3 + len + 1] << 8)))
+			send_error(frame[0], RPC_ERROR_CRC);
+		else
+			handle(frame[0], &frame[3], len);
+	}
+	return 1;
+}
+
+void rpc_stats(struct rpc_stats *s, int clear)
+{
+	*s = stats;
+	if(clear) {
+		stats.frames   = 0;
+		stats.errors   = 0;
+		stats.timeouts = 0;
+		stats.drops    = 0;
+	}
+}
@@ -0,0 +1,35 @@
+#ifndef __RPC_H
+#define __RPC_H
+
+/* Framed binary RPC on the console UART (see rpc.c and rpc.py) */
+
+#define RPC_SOF         0xa5
+#define RPC_MAX_PAYLOAD 512
+#define RPC_TIMEOUT     100 /* ms between 2 bytes of a frame */
+
+/* Opcodes (replies: opcode | RPC_REPLY, errors: RPC_ERROR) */
+#define RPC_PING          0x00
+#define RPC_CSR_WRITE     0x01
+#define RPC_CSR_READ      0x02
+#define RPC_SENSOR_READ   0x03
+#define RPC_DISPLAY_FRAME 0x04
+#define RPC_REPLY         0x80
+#define RPC_ERROR         0xff
+
+/* Error codes (RPC_ERROR payload: opcode, code) */
+#define RPC_ERROR_CRC     0x01
+#define RPC_ERROR_OPCODE  0x02
+#define RPC_ERROR_LENGTH  0x03
+
+struct rpc_stats {
+	unsigned int frames;
+	unsigned int errors;
+	unsigned int timeouts;
+	unsigned int drops; /* replies dropped: TX ring full */
+};
+
+int rpc_feed(unsigned char c);
+void rpc_stats(struct rpc_stats *stats, int clear);
+unsigned short rpc_crc16(const unsigned char *data, int len, unsigned short crc);
+
+#endif /* __RPC_H */
@@ -0,0 +1,150 @@
+#include <string.h>
+
+#include <irq.h>
+#include <generated/csr.h>
+#include <generated/soc.h>
+
+#include "sched.h"
+
+/*
+ * Timer-driven cooperative scheduler.
+ *
+ * timer0 generates a periodic tick (SCHED_TICK_HZ) counted by sched_isr (called from isr.c).
+ * sched_run loops over the task table and runs each enabled task when its deadline (in ticks) is
+ * reached, then moves the deadline one period later. Tasks are not preempted: they must do a
+ * small step of work and return (no busy_wait: it uses timer0 too).
+ *
+ * The time spent in each task is measured with sched_cycles (tick count + timer0 value, in CPU
+ * cycles) for the CPU usage accounting.
+ */
+
+static struct sched_task tasks[SCHED_MAX_TASKS];
+static int ntasks;
+static volatile unsigned int ticks;
+static unsigned long long stats_start;
+
+void sched_isr(void)
+{
+	timer0_ev_pending_write(1);
+	ticks++;
+}
+
+void sched_init(void)
+{
+	ntasks = 0;
+	ticks  = 0;
+
+	timer0_en_write(0);
+	timer0_reload_write(SCHED_TICK_CYCLES - 1);
+	timer0_load_write(SCHED_TICK_CYCLES - 1);
+	timer0_en_write(1);
+	timer0_ev_pending_write(timer0_ev_pending_read());
+	timer0_ev_enable_write(1);
+	irq_setmask(irq_getmask() | (1 << TIMER0_INTERRUPT));
+
+	stats_start = sched_cycles();
+}
+
+unsigned int sched_ticks(void)
+{
+	return ticks;
+}
+
+unsigned long long sched_cycles(void)
+{
+	unsigned int t, value, pending;
+
+	do {
+		t = ticks;
+		timer0_update_value_write(1);
+		value   = timer0_value_read();
+		pending = timer0_ev_pending_read() & 1;
+	} while(t != ticks);
+	/* Timer reloaded but tick not counted yet (interrupts disabled, or about to be taken) */
+	if(pending && (value > SCHED_TICK_CYCLES/2))
+		t++;
+	return (unsigned long long)t*SCHED_TICK_CYCLES + (SCHED_TICK_CYCLES - 1 - value);
+}
+
+int sched_add(const char *name, void (*run)(void), unsigned int period)
+{
+	struct sched_task *task;
+
+	if(ntasks >= SCHED_MAX_TASKS)
+		return -1;
+	task = &tasks[ntasks];
+	memset(task, 0, sizeof(*task));
+	task->name     = name;
+	task->run      = run;
+	task->period   = period;
+	task->deadline = ticks + period;
+	task->enabled  = 1;
+	return ntasks++;
+}
+
+void sched_enable(int id, int enable)
+{
+	if(enable && !tasks[id].enabled)
+		tasks[id].deadline = ticks;
+	tasks[id].enabled = enable;
+}
+
+int sched_enabled(int id)
+{
+	return tasks[id].enabled;
+}
+
+void sched_set_period(int id, unsigned int period)
+{
+	tasks[id].period = period;
+}
+
+void sched_run(void)
+{
+	struct sched_task *task;
+	unsigned long long start, cycles;
+	unsigned int now;
+	int i;
+
+	while(1) {
+		for(i = 0; i < ntasks; i++) {
+			task = &tasks[i];
+			now  = ticks;
+			if(!task->enabled || (task->period && (int)(now - task->deadline) < 0))
+				continue;
+			if(task->period && (int)(now - task->deadline) >= (int)task->period)
+				task->late++;
+			start = sched_cycles();
+			task->run();
+			cycles = sched_cycles() - start;
+			task->runs++;
+			task->cycles += cycles;
+			if(cycles > task->max_cycles)
+				task->max_cycles = cycles;
+			/* Next period, skip the missed ones */
+			task->deadline += task->period;
+			if((int)(ticks - task->deadline) >= 0)
+				task->deadline = ticks + task->period;
+		}
+	}
+}
+
+int sched_stats(struct sched_task *copy, unsigned long long *elapsed, int clear)
+{
+	unsigned long long now;
+	int i;
+
+	now = sched_cycles();
+	memcpy(copy, tasks, ntasks*sizeof(*copy));
+	*elapsed = now - stats_start;
+	if(clear) {
+		for(i = 0; i < ntasks; i++) {
+			tasks[i].runs       = 0;
+			tasks[i].late       = 0;
+			tasks[i].cycles     = 0;
+			tasks[i].max_cycles = 0;
+		}
+		stats_start = now;
+	}
+	return ntasks;
+}
@@ -0,0 +1,36 @@
+#ifndef __SCHED_H
+#define __SCHED_H
+
+/* Timer-driven cooperative scheduler (see sched.c) */
+
+#include <generated/soc.h>
+
+#define SCHED_TICK_HZ     1000
+#define SCHED_TICK_CYCLES (CONFIG_CLOCK_FREQUENCY/SCHED_TICK_HZ)
+#define SCHED_MAX_TASKS   8
+
+struct sched_task {
+	const char *name;
+	void (*run)(void);
+	unsigned int period;   /* ticks (0: at each scheduler pass) */
+	unsigned int deadline; /* tick of the next run */
+	int enabled;
+	/* Accounting (since the last sched_stats clear) */
+	unsigned int runs;
+	unsigned int late;     /* runs started one period or more after their deadline */
+	unsigned long long cycles;
+	unsigned int max_cycles;
+};
+
+void sched_init(void);
+void sched_isr(void);
+int sched_add(const char *name, void (*run)(void), unsigned int period);
+void sched_enable(int id, int enable);
+int sched_enabled(int id);
+void sched_set_period(int id, unsigned int period);
+unsigned int sched_ticks(void);
+unsigned long long sched_cycles(void);
+void sched_run(void);
+int sched_stats(struct sched_task *tasks, unsigned long long *elapsed, int clear);
+
+#endif /* __SCHED_H */
@@ -0,0 +1,238 @@
+#include <stdio.h>
+#include <stdarg.h>
+
+#include <irq.h>
+#include <uart.h>
+#include <generated/csr.h>
+#include <generated/soc.h>
+
+#include "serial.h"
+
+/*
+ * Interrupt-driven UART with larger ring buffers than libbase's uart.c, overflow counters and
+ * non-blocking writes. It implements libbase's uart API (uart_init, uart_isr, uart_read,
+ * uart_read_nonblock, uart_write, uart_sync): libbase's uart.o is then not linked and printf,
+ * puts and readchar also go through these rings. uart_isr is called from isr.c.
+ *
+ * - RX: the ISR empties the UART RX FIFO into the RX ring, bytes are only dropped (and counted)
+ *   when the RX ring is full.
+ * - TX: writes go to the TX ring, the ISR refills the UART TX FIFO from it on each TX event.
+ *   uart_write (printf, puts) waits for room in the ring, the serial_*_nonblock functions
+ *   never wait: they drop (and count) what does not fit. The console commands' outputs fit in
+ *   the ring (help, the longest, is ~700 bytes), the larger prof dump is sent with
+ *   serial_putc_nonblock as the ring drains (see prof.c).
+ */
+
+#define SERIAL_RX_MASK (SERIAL_RX_SIZE - 1)
+#define SERIAL_TX_MASK (SERIAL_TX_SIZE - 1)
+
+static char rx_buf[SERIAL_RX_SIZE];
+static volatile unsigned int rx_produce;
+static unsigned int rx_consume;
+
+static char tx_buf[SERIAL_TX_SIZE];
+static unsigned int tx_produce;
+static volatile unsigned int tx_consume;
+
+static struct serial_stats stats;
+
+/* Move the TX ring to the UART TX FIFO (ISR, or with the UART interrupt masked) */
+static void tx_drain(void)
+{
+	while((tx_consume != tx_produce) && !uart_txfull_read()) {
+		uart_rxtx_write(tx_buf[tx_consume]);
+		tx_consume = (tx_consume + 1) & SERIAL_TX_MASK;
+	}
+}
+
+void uart_isr(void)
+{
+	unsigned int stat, rx_produce_next;
+
+	stat = uart_ev_pending_read();
+
+	if(stat & UART_EV_RX) {
+		while(!uart_rxempty_read()) {
+			rx_produce_next = (rx_produce + 1) & SERIAL_RX_MASK;
+			if(rx_produce_next != rx_consume) {
+				rx_buf[rx_produce] = uart_rxtx_read();
+				rx_produce = rx_produce_next;
+			} else {
+				uart_rxtx_read();
+				stats.rx_overflows++;
+			}
+			uart_ev_pending_write(UART_EV_RX);
+		}
+		if(((rx_produce - rx_consume) & SERIAL_RX_MASK) > stats.rx_peak)
+			stats.rx_peak = (rx_produce - rx_consume) & SERIAL_RX_MASK;
+	}
+
+	if(stat & UART_EV_TX) {
+		uart_ev_pending_write(UART_EV_TX);
+		tx_drain();
+	}
+}
+
+/* RX --------------------------------------------------------------------------------------------*/
+
+int uart_read_nonblock(void)
+{
+	return (rx_consume != rx_produce);
+}
+
+char uart_read(void)
+{
+	char c;
+
+	/* As libbase: wait for a byte only when the ISR can bring it */
+	if(irq_getie()) {
+		while(rx_consume == rx_produce);
+	} else if(rx_consume == rx_produce) {
+		return 0;
+	}
+	c = rx_buf[rx_consume];
+	rx_consume = (rx_consume + 1) & SERIAL_RX_MASK;
+	return c;
+}
+
+int serial_read_nonblock(void)
+{
+	if(rx_consume == rx_produce)
+		return -1;
+	return (unsigned char)uart_read();
+}
+
+/* TX --------------------------------------------------------------------------------------------*/
+
+int serial_tx_free(void)
+{
+	return SERIAL_TX_MASK - ((tx_produce - tx_consume) & SERIAL_TX_MASK);
+}
+
+/* Queue len bytes (free space must have been checked) and start the transmission */
+static void tx_queue(const char *s, int len)
+{
+	unsigned int oldmask;
+	int i;
+
+	for(i = 0; i < len; i++) {
+		tx_buf[tx_produce] = s[i];
+		tx_produce = (tx_produce + 1) & SERIAL_TX_MASK;
+	}
+	if(((tx_produce - tx_consume) & SERIAL_TX_MASK) > stats.tx_peak)
+		stats.tx_peak = (tx_produce - tx_consume) & SERIAL_TX_MASK;
+
+	/* The ISR only runs on TX events: start the transmission if the UART is idle */
+	oldmask = irq_getmask();
+	irq_setmask(oldmask & ~(1 << UART_INTERRUPT));
+	tx_drain();
+	irq_setmask(oldmask);
+}
+
+void uart_write(char c)
+{
+	unsigned int oldmask;
+
+	while(serial_tx_free() == 0) {
+		/* Interrupts disabled (ISR, early boot): drain the ring ourselves */
+		if(!irq_getie()) {
+			oldmask = irq_getmask();
+			irq_setmask(oldmask & ~(1 << UART_INTERRUPT));
+			tx_drain();
+			irq_setmask(oldmask);
+		}
+	}
+	tx_queue(&c, 1);
+}
+
+int serial_putc_nonblock(char c)
+{
+	if(serial_tx_free() == 0) {
+		stats.tx_overflows++;
+		return 0;
+	}
+	tx_queue(&c, 1);
+	return 1;
+}
+
+/* All or nothing (a message is never truncated), '\n' is sent as "\n\r" as with printf */
+int serial_write_nonblock(const char *s, int len)
+{
+	char buf[16];
+	int i, n, needed;
+
+	needed = len;
+	for(i = 0; i < len; i++)
+		if(s[i] == '\n')
+			needed++;
+	if(needed > serial_tx_free()) {
+		stats.tx_overflows += needed;
+		return 0;
+	}
+	n = 0;
+	for(i = 0; i < len; i++) {
+		buf[n++] = s[i];
+		if(s[i] == '\n')
+			buf[n++] = '\r';
+		if((n >= (int)sizeof(buf) - 1) || (i == len - 1)) {
+			tx_queue(buf, n);
+			n = 0;
+		}
+	}
+	return needed;
+}
+
+int serial_puts_nonblock(const char *s)
+{
+	int len = 0;
+
+	while(s[len])
+		len++;
+	return serial_write_nonblock(s, len);
+}
+
+int serial_printf_nonblock(const char *fmt, ...)
+{
+	char buf[128];
+	va_list args;
+	int len;
+
+	va_start(args, fmt);
+	len = vsnprintf(buf, sizeof(buf), fmt, args);
+	va_end(args);
+	if(len < 0)
+		return 0;
+	if(len >= (int)sizeof(buf))
+		len = sizeof(buf) - 1;
+	return serial_write_nonblock(buf, len);
+}
+
+void uart_sync(void)
+{
+	while(tx_consume != tx_produce);
+}
+
+/* Init/stats ------------------------------------------------------------------------------------*/
+
+void uart_init(void)
+{
+	rx_produce = 0;
+	rx_consume = 0;
+	tx_produce = 0;
+	tx_consume = 0;
+
+	uart_ev_pending_write(uart_ev_pending_read());
+	uart_ev_enable_write(UART_EV_TX | UART_EV_RX);
+	irq_setmask(irq_getmask() | (1 << UART_INTERRUPT));
+}
+
+void serial_stats(struct serial_stats *s, int clear)
+{
+	*s = stats;
+	if(clear) {
+		stats.rx_overflows = 0;
+		stats.tx_overflows = 0;
+		stats.rx_peak = 0;
+		stats.tx_peak = 0;
+	}
+}
@@ -0,0 +1,24 @@
+#ifndef __SERIAL_H
+#define __SERIAL_H
+
+/* Interrupt-driven UART RX/TX ring buffers (see serial.c) */
+
+#define SERIAL_RX_SIZE 256  /* power of 2 */
+#define SERIAL_TX_SIZE 1024 /* power of 2 */
+
+struct serial_stats {
+	unsigned int rx_overflows; /* bytes dropped: RX ring full */
+	unsigned int tx_overflows; /* bytes dropped: TX ring full on a non-blocking write */
+	unsigned int rx_peak;      /* max RX ring level */
+	unsigned int tx_peak;      /* max TX ring level */
+};
+
+int serial_read_nonblock(void);
+int serial_putc_nonblock(char c);
+int serial_write_nonblock(const char *s, int len);
+int serial_puts_nonblock(const char *s);
+int serial_printf_nonblock(const char *fmt, ...) __attribute__((format(printf, 1, 2)));
+int serial_tx_free(void);
+void serial_stats(struct serial_stats *stats, int clear);
+
+#endif /* __SERIAL_H */
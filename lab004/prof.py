@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import csv
+import time
+import struct
+import argparse
+import statistics
+
+# Goals:
+# - get the firmware's profiling samples (prof dump, see firmware/prof.c) on the host
+# - analyze them beyond min/mean/max: median, percentiles, time in us
+
+# Parser -------------------------------------------------------------------------------------------
+
+PROF_MAGIC   = b"PROF"
+PROF_VERSION = 1
+
+class ProfError(Exception):
+    pass
+
+def parse(data):
+    """Parse a binary dump (starting at the magic), return (dump, size).
+
+    dump: {"clk_freq", "overhead", "sections": [{"name", "count", "min", "max", "sum"}],
+    "samples": [(section name, cycles)]}. Raise ProfError when data is incomplete or corrupted.
+    """
+    offset = 0
+    def take(fmt):
+        nonlocal offset
+        size = struct.calcsize(fmt)
+        if offset + size > len(data):
+            raise ProfError("Incomplete dump")
+        values = struct.unpack_from(fmt, data, offset)
+        offset += size
+        return values
+
+    magic, version, clk_freq, overhead = take("<4sBII")
+    if magic != PROF_MAGIC or version != PROF_VERSION:
+        raise ProfError("Not a version {} dump".format(PROF_VERSION))
+    sections = []
+    for i in range(take("<B")[0]):
+        name = take("<{}s".format(take("<B")[0]))[0].decode()
+        count, min_, max_, sum_ = take("<IIIQ")
+        sections.append({"name": name, "count": count, "min": min_, "max": max_, "sum": sum_})
+    samples = []
+    for i in range(take("<H")[0]):
+        section, cycles = take("<BI")
+        samples.append((sections[section]["name"], cycles))
+    checksum = sum(data[:offset]) & 0xffff
+    if take("<H")[0] != checksum:
+        raise ProfError("Bad checksum")
+    return {"clk_freq": clk_freq, "overhead": overhead, "sections": sections, "samples": samples}, offset
+
+def read_dump(port, baudrate=115200, timeout=5):
+    """Send prof dump on the firmware's console, return the raw dump."""
+    import serial
+    with serial.Serial(port, baudrate, timeout=0.1) as uart:
+        uart.reset_input_buffer()
+        uart.write(b"prof dump\n")
+        data     = b""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data += uart.read(4096)
+            start = data.find(PROF_MAGIC)
+            if start >= 0:
+                try:
+                    dump, size = parse(data[start:])
+                    return data[start:start + size]
+                except ProfError as e:
+                    if str(e) != "Incomplete dump":
+                        raise
+        raise ProfError("No dump received (firmware with the prof command running?)")
+
+# Report -------------------------------------------------------------------------------------------
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p*len(values)))]
+
+def report(dump):
+    us = 1e6/dump["clk_freq"]
+    print("{} samples, {:.0f}MHz, {} cycles overhead removed".format(
+        len(dump["samples"]), dump["clk_freq"]/1e6, dump["overhead"]))
+    print("section      |  count |      min |     mean |      max || samples |   median |      p99 (cycles)")
+    for s in dump["sections"]:
+        line = "{:12s} | {:6d} | ".format(s["name"], s["count"])
+        if s["count"]:
+            line += "{:8d} | {:8d} | {:8d} || ".format(s["min"], s["sum"]//s["count"], s["max"])
+        else:
+            line += "{:>8s} | {:>8s} | {:>8s} || ".format("-", "-", "-")
+        cycles = [c for name, c in dump["samples"] if name == s["name"]]
+        if cycles:
+            line += "{:7d} | {:8d} | {:8d}".format(len(cycles), int(statistics.median(cycles)),
+                percentile(cycles, 0.99))
+            line += "   ({:.1f}us median)".format(statistics.median(cycles)*us)
+        else:
+            line += "{:7d} | {:>8s} | {:>8s}".format(0, "-", "-")
+        print(line)
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Firmware profiling dump (prof dump) analysis")
+    parser.add_argument("--port",     default="/dev/ttyUSB1", help="Board's serial port")
+    parser.add_argument("--baudrate", default=115200, type=int, help="Console baudrate")
+    parser.add_argument("--file",     default=None, help="Analyze a saved dump instead of the board's")
+    parser.add_argument("--save",     default=None, help="Save the raw dump")
+    parser.add_argument("--csv",      default=None, help="Export the samples (section, cycles)")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as f:
+            data = f.read()
+    else:
+        data = read_dump(args.port, args.baudrate)
+    if args.save:
+        with open(args.save, "wb") as f:
+            f.write(data)
+    dump, size = parse(data)
+    report(dump)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["section", "cycles"])
+            writer.writerows(dump["samples"])
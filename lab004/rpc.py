@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import struct
+import binascii
+import argparse
+
+# Goals:
+# - control the lab004 firmware from the host with binary frames (see firmware/rpc.c) instead of
+#   text commands: batches of CSR accesses limited by the UART line rate, not by printf/parsing
+# - run without a board on a model of the firmware (--sim: functional check only, no timing)
+
+# Protocol -----------------------------------------------------------------------------------------
+
+RPC_SOF         = 0xa5
+RPC_MAX_PAYLOAD = 512
+
+RPC_PING          = 0x00
+RPC_CSR_WRITE     = 0x01
+RPC_CSR_READ      = 0x02
+RPC_SENSOR_READ   = 0x03
+RPC_DISPLAY_FRAME = 0x04
+RPC_REPLY         = 0x80
+RPC_ERROR         = 0xff
+
+rpc_errors = {0x01: "bad CRC", 0x02: "bad opcode", 0x03: "bad length"}
+
+class RPCError(Exception):
+    pass
+
+def crc16(data, crc=0xffff):
+    # CRC-16/CCITT-FALSE
+    return binascii.crc_hqx(data, crc)
+
+def encode(opcode, payload=b""):
+    body = struct.pack("<BH", opcode, len(payload)) + payload
+    return bytes([RPC_SOF]) + body + struct.pack("<H", crc16(body))
+
+def read_frame(port):
+    """Read a frame from port (skipping the bytes before RPC_SOF), return (opcode, payload)."""
+    def read(n):
+        data = port.read(n)
+        if len(data) != n:
+            raise RPCError("Timeout")
+        return data
+    while read(1)[0] != RPC_SOF:
+        pass
+    header = read(3)
+    opcode, length = struct.unpack("<BH", header)
+    payload = read(length)
+    if struct.unpack("<H", read(2))[0] != crc16(header + payload):
+        raise RPCError("Bad reply CRC")
+    return opcode, payload
+
+# Client -------------------------------------------------------------------------------------------
+
+def csr_map(csr_csv=os.path.join("test", "csr.csv")):
+    """Return the CSR addresses from the build's csr.csv: {name: address}."""
+    regs = {}
+    with open(csr_csv) as f:
+        for line in f:
+            fields = line.strip().split(",")
+            if fields[0] == "csr_register":
+                regs[fields[1]] = int(fields[2], 0)
+    return regs
+
+class RPCClient:
+    def __init__(self, port, regs={}):
+        self.port = port
+        self.regs = regs
+
+    def call(self, opcode, payload=b""):
+        self.port.write(encode(opcode, payload))
+        reply, data = read_frame(self.port)
+        if reply == RPC_ERROR:
+            raise RPCError("Opcode 0x{:02x}: {}".format(data[0], rpc_errors.get(data[1], data[1])))
+        if reply != opcode | RPC_REPLY:
+            raise RPCError("Unexpected reply 0x{:02x}".format(reply))
+        return data
+
+    def _addr(self, reg):
+        return self.regs[reg] if isinstance(reg, str) else reg
+
+    def ping(self, data=b""):
+        return self.call(RPC_PING, data)
+
+    def csr_write(self, values):
+        """Write CSRs ({name or address: value} or [(name or address, value)], in order), in
+        batches of up to 64."""
+        items = values.items() if isinstance(values, dict) else values
+        items = [(self._addr(reg), value) for reg, value in items]
+        for i in range(0, len(items), RPC_MAX_PAYLOAD//8):
+            self.call(RPC_CSR_WRITE, b"".join(struct.pack("<II", addr, value)
+                for addr, value in items[i:i + RPC_MAX_PAYLOAD//8]))
+
+    def csr_read(self, regs):
+        """Read CSRs (names or addresses), return the values in the same order."""
+        addrs  = [self._addr(reg) for reg in regs]
+        values = []
+        for i in range(0, len(addrs), RPC_MAX_PAYLOAD//4):
+            chunk = addrs[i:i + RPC_MAX_PAYLOAD//4]
+            data  = self.call(RPC_CSR_READ, struct.pack("<{}I".format(len(chunk)), *chunk))
+            values += struct.unpack("<{}I".format(len(chunk)), data)
+        return values
+
+    def sensor_read(self, addr, count):
+        """Read count ADXL362 registers from addr (64 max)."""
+        return self.call(RPC_SENSOR_READ, bytes([addr, count]))
+
+    def display_frame(self, words):
+        """Write the framebuffer (digit 0 first, see display.FramebufferDisplay for the format)."""
+        self.call(RPC_DISPLAY_FRAME, struct.pack("<{}I".format(len(words)), *words))
+
+# Firmware model -----------------------------------------------------------------------------------
+
+class SimFirmware:
+    """Serial port stand-in answering the requests as firmware/rpc.c (CSRs modeled as a simple
+    word memory). Replies are immediate: it models the protocol, not the UART/firmware timings."""
+    def __init__(self):
+        self.csrs     = {}
+        self.sensor   = bytes([0xad, 0x1d, 0xf2] + [0]*61) # ADXL362 ID registers
+        self.display  = [0]*8
+        self.rx       = b""
+        self.tx       = b""
+
+    def write(self, data):
+        self.rx += data
+        while True:
+            start = self.rx.find(bytes([RPC_SOF]))
+            if start < 0 or len(self.rx) < start + 4:
+                break
+            opcode, length = struct.unpack_from("<BH", self.rx, start + 1)
+            if len(self.rx) < start + 6 + length:
+                break
+            body, crc = self.rx[start + 1:start + 4 + length], self.rx[start + 4 + length:start + 6 + length]
+            self.rx   = self.rx[start + 6 + length:]
+            if struct.unpack("<H", crc)[0] != crc16(body):
+                self.tx += encode(RPC_ERROR, bytes([opcode, 0x01]))
+            else:
+                self.tx += self.handle(opcode, body[3:])
+
+    def handle(self, opcode, payload):
+        if opcode == RPC_PING:
+            return encode(opcode | RPC_REPLY, payload)
+        elif opcode == RPC_CSR_WRITE and len(payload) % 8 == 0:
+            for i in range(0, len(payload), 8):
+                addr, value = struct.unpack_from("<II", payload, i)
+                self.csrs[addr] = value
+            return encode(opcode | RPC_REPLY)
+        elif opcode == RPC_CSR_READ and len(payload) % 4 == 0:
+            addrs = struct.unpack("<{}I".format(len(payload)//4), payload)
+            return encode(opcode | RPC_REPLY, b"".join(struct.pack("<I", self.csrs.get(a, 0)) for a in addrs))
+        elif opcode == RPC_SENSOR_READ and len(payload) == 2 and payload[1] <= 64:
+            return encode(opcode | RPC_REPLY, self.sensor[payload[0]:payload[0] + payload[1]])
+        elif opcode == RPC_DISPLAY_FRAME and len(payload) % 4 == 0 and len(payload) <= 32:
+            words = struct.unpack("<{}I".format(len(payload)//4), payload)
+            self.display[:len(words)] = words
+            return encode(opcode | RPC_REPLY)
+        elif opcode in [RPC_PING, RPC_CSR_WRITE, RPC_CSR_READ, RPC_SENSOR_READ, RPC_DISPLAY_FRAME]:
+            return encode(RPC_ERROR, bytes([opcode, 0x03]))
+        return encode(RPC_ERROR, bytes([opcode, 0x02]))
+
+    def read(self, n):
+        data, self.tx = self.tx[:n], self.tx[n:]
+        return data
+
+# Benchmark ----------------------------------------------------------------------------------------
+
+def bench(client, n=256):
+    # Measured CSR writes/reads per second (on ctrl_scratch: no side effects)
+    r = {}
+    start = time.perf_counter()
+    client.csr_write([("ctrl_scratch", i) for i in range(n)])
+    r["csr writes/s"] = n/(time.perf_counter() - start)
+    start = time.perf_counter()
+    assert client.csr_read(["ctrl_scratch"]*n) == [n - 1]*n
+    r["csr reads/s"]  = n/(time.perf_counter() - start)
+    return r
+
+def line_rate(baudrate, n=256):
+    # Model: CSR writes/reads per second if only the UART limited them (request + reply bytes,
+    # 10 bits per byte, no firmware time)
+    return {
+        "csr writes/s": n/(10*(8*n + 2*6*((n + 63)//64))/baudrate),  # payload + request/reply framing
+        "csr reads/s":  n/(10*(8*n + 2*6*((n + 127)//128))/baudrate),
+    }
+
+# Main ---------------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="lab004 firmware binary RPC client")
+    parser.add_argument("--port",     default="/dev/ttyUSB1", help="Board's serial port")
+    parser.add_argument("--baudrate", default=115200, type=int, help="Console baudrate")
+    parser.add_argument("--sim",      action="store_true", help="Run on a model of the firmware (no board)")
+    parser.add_argument("--csr-csv",  default=os.path.join("test", "csr.csv"), help="Build's CSR map")
+    args = parser.parse_args()
+
+    if args.sim:
+        port = SimFirmware()
+        regs = {"ctrl_scratch": 0xf0000004, "leds_out": 0xf0001800}
+    else:
+        import serial
+        port = serial.Serial(args.port, args.baudrate, timeout=1)
+        regs = csr_map(args.csr_csv)
+    client = RPCClient(port, regs)
+
+    assert client.ping(b"lab004") == b"lab004"
+    client.csr_write({"leds_out": 0xa5a5})
+    print("leds_out: 0x{:04x}".format(*client.csr_read(["leds_out"])))
+    print("ADXL362 DEVID_AD/MST/PARTID: " + " ".join("0x{:02x}".format(b) for b in client.sensor_read(0x00, 3)))
+    client.display_frame(list(range(8)))
+    measured = bench(client)
+    model    = line_rate(args.baudrate)
+    if args.sim:
+        # (the firmware model has no timings: only the line rate model is meaningful)
+        print("Line rate model at {} bauds (not measured):".format(args.baudrate))
+        for name, value in model.items():
+            print("  {:14s}: {:8.1f}".format(name, value))
+    else:
+        print("Measured at {} bauds (line rate model):".format(args.baudrate))
+        for name, value in measured.items():
+            print("  {:14s}: {:8.1f} ({:8.1f}, {:3.0f}%)".format(name, value, model[name],
+                100*value/model[name]))
+    client.csr_write({"leds_out": 0})
@@ -1,5 +1,7 @@
 from migen import *
 
+from litex.soc.interconnect.csr import *
+
 # Goals:
 # - understand Migen's Modules/IOs
 # - understand Migen's syntax
@@ -30,6 +32,40 @@ class Tick(Module):
             )
         ]
 
+# CSRTick ------------------------------------------------------------------------------------------
+
+class CSRTick(Module, AutoCSR):
+    """Tick with a runtime-programmable period
+
+    The period (in sys_clk cycles) is reloaded from a CSR, so it can be tuned over the bridge or from
+    the firmware without rebuilding. The build-time period is used as reset value.
+    """
+    def __init__(self, sys_clk_freq, period):
+        self.period = CSRStorage(32, reset=int(period*sys_clk_freq))
+        self.enable = CSRStorage(reset=1)
+        self.count  = CSRStatus(32)
+
+        self.ce = Signal() # output
+
+        # # #
+
+        counter = Signal(32)
+
+        # Combinatorial assignements
+        self.comb += [
+            self.ce.eq(self.enable.storage & (counter == 0)),
+            self.count.status.eq(counter)
+        ]
+
+        # Synchronous assignments
+        self.sync += [
+            If(~self.enable.storage | self.ce | self.period.re,
+                counter.eq(self.period.storage - 1)
+            ).Else(
+                counter.eq(counter - 1)
+            )
+        ]
+
 # Main ---------------------------------------------------------------------------------------------
 
 if __name__ == '__main__':